@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Benchmark volume curve conversions with the old per-call math against the curve classes, which
+precompute their constants.
+
+Run from the top level directory with: python -m benchmarks.curve_bench
+"""
+
+import math
+import timeit
+
+from volcorner.alsa.curves import AlsaCurve, SND_CTL_TLV_DB_GAIN_MUTE
+from volcorner.alsa.curves import exp10, use_linear_db_scale
+
+# Number of conversions per run
+CONVERSIONS = 100000
+
+# A typical onboard sound card's Master range, in dB × 100
+MIN_DB = -6400
+MAX_DB = 0
+
+
+def per_call_normalized(value, min, max):
+    """Convert dB to a normalized volume the way ALSAMixer used to, on every read."""
+    if use_linear_db_scale(min, max):
+        return (value - min) / float(max - min)
+    normalized = exp10((value - max) / 6000.0)
+    if min != SND_CTL_TLV_DB_GAIN_MUTE:
+        min_norm = exp10((min - max) / 6000.0)
+        normalized = (normalized - min_norm) / (1 - min_norm)
+    return normalized
+
+
+def per_call_db(value, min, max):
+    """Convert a normalized volume to dB the way ALSAMixer used to, on every write."""
+    if use_linear_db_scale(min, max):
+        return round(value * (max - min)) + min
+    if min != SND_CTL_TLV_DB_GAIN_MUTE:
+        min_norm = exp10((min - max) / 6000.0)
+        value = value * (1 - min_norm) + min_norm
+    return round(6000.0 * math.log10(value))
+
+
+def run_per_call_normalized(values):
+    for value in values:
+        per_call_normalized(value, MIN_DB, MAX_DB)
+
+
+def run_per_call_db(volumes):
+    for volume in volumes:
+        per_call_db(volume, MIN_DB, MAX_DB)
+
+
+def run_normalized(curve, values):
+    to_normalized = curve.to_normalized
+    for value in values:
+        to_normalized(value)
+
+
+def run_db(curve, volumes):
+    to_value = curve.to_value
+    for volume in volumes:
+        to_value(volume)
+
+
+def bench(name, func, count=CONVERSIONS):
+    seconds = min(timeit.repeat(func, number=1, repeat=5))
+    print("{:<32} {:>12,.0f} conversions/s".format(name, count / seconds))
+
+
+def main():
+    values = [MIN_DB + (i * 37) % (MAX_DB - MIN_DB) for i in range(CONVERSIONS)]
+    volumes = [0.01 + (i % 990) / 1000.0 for i in range(CONVERSIONS)]
+    curve = AlsaCurve(MIN_DB, MAX_DB)
+    bench("per-call dB to normalized", lambda: run_per_call_normalized(values))
+    bench("AlsaCurve dB to normalized", lambda: run_normalized(curve, values))
+    bench("per-call normalized to dB", lambda: run_per_call_db(volumes))
+    bench("AlsaCurve normalized to dB", lambda: run_db(curve, volumes))
+
+
+if __name__ == '__main__':
+    main()
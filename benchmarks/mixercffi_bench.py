@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Benchmark ALSA mixer calls in CFFI's ABI and API modes, with fresh and reused out-parameters.
+
+This needs a sound card with a Master control.  The API mode binding is only benchmarked if it
+has been built, with: python volcorner/alsa/mixercffi_build.py
+
+Run from the top level directory with: python -m benchmarks.mixercffi_bench
+"""
+
+import timeit
+
+from cffi import FFI
+
+from volcorner.alsa.mixercffi_build import CDEF
+
+# Number of calls per run
+CALLS = 100000
+
+# Mixer device and control to read
+DEVICE = "default"
+CONTROL = "Master"
+
+
+def load_abi():
+    """Load libasound in ABI mode."""
+    ffi = FFI()
+    ffi.cdef(CDEF)
+    return ffi, ffi.dlopen("libasound.so.2")
+
+
+def load_api():
+    """Load the compiled API mode module, or return None if it isn't built."""
+    try:
+        from volcorner.alsa._mixercffi import ffi, lib
+    except ImportError:
+        return None
+    return ffi, lib
+
+
+def check(rc):
+    if rc < 0:
+        raise RuntimeError("ALSA error {}".format(rc))
+
+
+def open_element(ffi, lib):
+    """Open the mixer and find the control's element."""
+    mixer_ptr = ffi.new("snd_mixer_t **")
+    check(lib.snd_mixer_open(mixer_ptr, 0))
+    mixer = mixer_ptr[0]
+    check(lib.snd_mixer_attach(mixer, DEVICE.encode('utf-8')))
+    check(lib.snd_mixer_selem_register(mixer, ffi.NULL, ffi.NULL))
+    check(lib.snd_mixer_load(mixer))
+
+    id_ptr = ffi.new("snd_mixer_selem_id_t **")
+    check(lib.snd_mixer_selem_id_malloc(id_ptr))
+    lib.snd_mixer_selem_id_set_name(id_ptr[0], CONTROL.encode('utf-8'))
+    elem = lib.snd_mixer_find_selem(mixer, id_ptr[0])
+    lib.snd_mixer_selem_id_free(id_ptr[0])
+    if not elem:
+        raise RuntimeError("No control {} on {}".format(CONTROL, DEVICE))
+    return mixer, elem
+
+
+def run_fresh(ffi, lib, elem):
+    get_volume = lib.snd_mixer_selem_get_playback_volume
+    for _ in range(CALLS):
+        get_volume(elem, 0, ffi.new("long *"))
+
+
+def run_reused(ffi, lib, elem):
+    get_volume = lib.snd_mixer_selem_get_playback_volume
+    out = ffi.new("long *")
+    for _ in range(CALLS):
+        get_volume(elem, 0, out)
+
+
+def run_control(control):
+    get_raw_volume = control.get_raw_volume
+    for _ in range(CALLS):
+        get_raw_volume()
+
+
+def bench(name, func):
+    seconds = min(timeit.repeat(func, number=1, repeat=5))
+    print("{:<32} {:>12,.0f} calls/s".format(name, CALLS / seconds))
+
+
+def main():
+    try:
+        modes = [('ABI', load_abi())]
+    except OSError:
+        print("libasound.so.2 isn't installed")
+        return
+    api = load_api()
+    if api is not None:
+        modes.append(('API', api))
+    else:
+        print("API mode isn't built; build it with: python volcorner/alsa/mixercffi_build.py")
+
+    for mode, (ffi, lib) in modes:
+        mixer, elem = open_element(ffi, lib)
+        bench("{} fresh out-parameter".format(mode), lambda: run_fresh(ffi, lib, elem))
+        bench("{} reused out-parameter".format(mode), lambda: run_reused(ffi, lib, elem))
+        lib.snd_mixer_close(mixer)
+
+    from volcorner.alsa import mixercffi
+    mixer = mixercffi.Mixer(DEVICE)
+    control = mixer.find_control(CONTROL)
+    mode = 'API' if mixercffi.API_MODE else 'ABI'
+    bench("Control.get_raw_volume ({})".format(mode), lambda: run_control(control))
+    mixer.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Benchmark point tests with Rect.contains against Bounds, and the MouseTracker Point path against
+the integer path.
+
+Run from the top level directory with: python -m benchmarks.rect_bench
+"""
+
+import timeit
+
+from volcorner.rect import Bounds, Point, Rect
+from volcorner.tracker import MouseTracker
+
+# Number of points per run
+POINTS = 100000
+
+
+class BenchTracker(MouseTracker):
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def grab_scroll(self):
+        pass
+
+    def ungrab_scroll(self):
+        pass
+
+
+def make_coords():
+    return [(500 + (i % 800), 300 + (i % 400)) for i in range(POINTS)]
+
+
+def run_rect(rect, coords):
+    # Events arrive as ints, so building the Point is part of the cost.
+    contains = rect.contains
+    for x, y in coords:
+        contains(Point(x, y))
+
+
+def run_bounds(bounds, coords):
+    contains_xy = bounds.contains_xy
+    for x, y in coords:
+        contains_xy(x, y)
+
+
+def run_last_point(tracker, coords):
+    for x, y in coords:
+        tracker.last_point = Point(x, y)
+
+
+def run_update_point(tracker, coords):
+    update_point = tracker.update_point
+    for x, y in coords:
+        update_point(x, y)
+
+
+def bench(name, func, arg, coords):
+    seconds = min(timeit.repeat(lambda: func(arg, coords), number=1, repeat=5))
+    print("{:<24} {:>12,.0f} points/s".format(name, POINTS / seconds))
+
+
+def main():
+    coords = make_coords()
+    rect = Rect.make(0, 0, 10, 10)
+    bench("Rect.contains", run_rect, rect, coords)
+    bench("Bounds.contains_xy", run_bounds, Bounds.from_rect(rect), coords)
+    bench("MouseTracker.last_point", run_last_point, BenchTracker(rect), coords)
+    bench("MouseTracker.update_point", run_update_point, BenchTracker(rect), coords)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Benchmark region lookups with RegionGrid against testing every Rect, at 1, 16 and 256 regions.
+
+Run from the top level directory with: python -m benchmarks.region_bench
+"""
+
+import random
+import timeit
+
+from volcorner.rect import Point, Rect
+from volcorner.regionindex import RegionGrid
+
+# Number of lookups per run
+LOOKUPS = 100000
+
+# Screen size to spread the regions and points over
+SCREEN_WIDTH = 3840
+SCREEN_HEIGHT = 2160
+
+
+def make_regions(count):
+    """Regions of 50x50 pixels spread evenly over the screen."""
+    side = int(count ** 0.5)
+    step_x = SCREEN_WIDTH // side
+    step_y = SCREEN_HEIGHT // side
+    return {(col, row): Rect.make(col * step_x, row * step_y, 50, 50)
+            for col in range(side) for row in range(side)}
+
+
+def make_points():
+    rand = random.Random(0)
+    return [Point(rand.randrange(SCREEN_WIDTH), rand.randrange(SCREEN_HEIGHT))
+            for _ in range(LOOKUPS)]
+
+
+def run_linear(regions, points):
+    items = list(regions.items())
+    for point in points:
+        for region_id, rect in items:
+            if rect.contains(point):
+                break
+
+
+def run_grid(grid, points):
+    lookup = grid.lookup
+    for x, y in points:
+        lookup(x, y)
+
+
+def bench(count, points):
+    regions = make_regions(count)
+    grid = RegionGrid(regions)
+    linear = min(timeit.repeat(lambda: run_linear(regions, points), number=1, repeat=5))
+    indexed = min(timeit.repeat(lambda: run_grid(grid, points), number=1, repeat=5))
+    print("{:>4} regions  linear {:>12,.0f} lookups/s  grid {:>12,.0f} lookups/s".format(
+        count, LOOKUPS / linear, LOOKUPS / indexed))
+
+
+def main():
+    points = make_points()
+    for count in (1, 16, 256):
+        bench(count, points)
+
+
+if __name__ == '__main__':
+    main()
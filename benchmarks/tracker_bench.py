@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Benchmark MouseTracker motion event throughput, with and without the ArrivalGate.
+
+Run from the top level directory with: python -m benchmarks.tracker_bench
+"""
+
+import timeit
+
+from volcorner.rect import Point, Rect
+from volcorner.tracker import MouseTracker
+
+# Number of motion events per run
+EVENTS = 100000
+
+# Maximum pointer speed for the gated tracker, in pixels per second
+MAX_SPEED = 20000
+
+
+class BenchTracker(MouseTracker):
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def grab_scroll(self):
+        pass
+
+    def ungrab_scroll(self):
+        pass
+
+
+def make_points():
+    """Points on a slow diagonal sweep across the middle of a 1920x1080 screen."""
+    return [Point(500 + (i % 800), 300 + (i % 400)) for i in range(EVENTS)]
+
+
+def run(tracker, points):
+    for point in points:
+        tracker.last_point = point
+
+
+def bench(name, max_speed):
+    tracker = BenchTracker(Rect.make(0, 0, 1, 1))
+    tracker.max_speed = max_speed
+    points = make_points()
+    seconds = min(timeit.repeat(lambda: run(tracker, points), number=1, repeat=5))
+    print("{:<10} {:>12,.0f} events/s".format(name, EVENTS / seconds))
+
+
+def main():
+    bench("ungated", None)
+    bench("gated", MAX_SPEED)
+
+
+if __name__ == '__main__':
+    main()
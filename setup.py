@@ -1,3 +1,5 @@
+import os
+
 from setuptools import setup, find_packages
 
 requires = [
@@ -13,6 +15,15 @@ tests_require = [
     'nose',
 ]
 
+# Set VOLCORNER_CFFI_API=1 to compile the ALSA binding in CFFI's API mode, which needs a C
+# compiler and the ALSA headers.  Otherwise it loads libasound.so.2 at runtime in ABI mode.
+cffi_options = {}
+if os.environ.get('VOLCORNER_CFFI_API'):
+    cffi_options = {
+        'setup_requires': ['cffi'],
+        'cffi_modules': ['volcorner/alsa/mixercffi_build.py:ffibuilder'],
+    }
+
 setup(name='volcorner',
       version='0.3.1',
       description='Volume hot corner utility',
@@ -39,4 +50,5 @@ setup(name='volcorner',
       },
       install_requires=requires,
       tests_require=tests_require,
-      test_suite='nose.collector')
+      test_suite='nose.collector',
+      **cffi_options)
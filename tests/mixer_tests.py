@@ -29,3 +29,17 @@ def test_emit_volume_changed():
     mixer.on_volume_changed(0.5)
     assert volume_changed.received
     assert volume_changed.args[0] == 0.5
+
+
+def test_drop_unchanged_volume():
+    """Test that the volume changed signal isn't emitted again for the same volume."""
+    mixer = MockMixer()
+    mixer.on_volume_changed(0.5)
+    volume_changed = SignalReceiver(signals.CHANGE_VOLUME)
+    mixer.on_volume_changed(0.5)
+    assert not volume_changed.received
+    mixer.on_volume_changed(0.25)
+    assert volume_changed.received
+    assert volume_changed.args[0] == 0.25
+    assert mixer.volume_changes == 3
+    assert mixer.dropped_volume_changes == 1
@@ -0,0 +1,76 @@
+"""Activation state machine tests."""
+
+from volcorner.activation import Activation
+from .util import FakeLoop
+
+
+def make_activation(dwell=0.0, leave_grace=0.0):
+    calls = []
+    loop = FakeLoop()
+    activation = Activation(lambda: calls.append('activate'), lambda: calls.append('deactivate'),
+                            dwell, leave_grace, loop=loop)
+    return activation, calls, loop
+
+
+def test_immediate():
+    """Test activating and deactivating immediately without a dwell time or grace period."""
+    activation, calls, loop = make_activation()
+    activation.enter()
+    assert activation.active
+    activation.leave()
+    assert calls == ['activate', 'deactivate']
+    assert loop.timers == []
+
+
+def test_dwell():
+    """Test activating only after the dwell time."""
+    activation, calls, loop = make_activation(dwell=0.1)
+    activation.enter()
+    assert calls == []
+    loop.run_timers()
+    assert calls == ['activate']
+
+
+def test_dwell_jitter():
+    """Test that leaving before the dwell time doesn't activate."""
+    activation, calls, loop = make_activation(dwell=0.1)
+    for _ in range(3):
+        activation.enter()
+        activation.leave()
+    loop.run_timers()
+    assert calls == []
+    assert activation.suppressed_enters == 3
+
+
+def test_leave_grace_jitter():
+    """Test that coming back during the grace period doesn't deactivate."""
+    activation, calls, loop = make_activation(leave_grace=0.1)
+    activation.enter()
+    for _ in range(3):
+        activation.leave()
+        assert activation.active
+        activation.enter()
+    loop.run_timers()
+    assert calls == ['activate']
+    assert activation.suppressed_leaves == 3
+
+
+def test_leave_grace():
+    """Test deactivating after the grace period."""
+    activation, calls, loop = make_activation(leave_grace=0.1)
+    activation.enter()
+    activation.leave()
+    loop.run_timers()
+    assert calls == ['activate', 'deactivate']
+    assert not activation.active
+
+
+def test_redundant():
+    """Test that repeated enters and leaves are ignored."""
+    activation, calls, loop = make_activation()
+    activation.enter()
+    activation.enter()
+    activation.leave()
+    activation.leave()
+    assert calls == ['activate', 'deactivate']
+    assert activation.redundant == 2
@@ -0,0 +1,103 @@
+"""BarrierMouseTracker pressure tests."""
+
+from collections import namedtuple
+
+import smokesignal
+from xcffib.xinput import BarrierHitEvent, BarrierLeaveEvent
+
+from volcorner import signals
+from volcorner.corner import Corner
+from volcorner.rect import Rect
+from volcorner.x11.barriertracker import BarrierMouseTracker
+from .util import SignalReceiver
+
+ROOT = 1
+X_BARRIER = 10
+Y_BARRIER = 11
+
+FP3232 = namedtuple('FP3232', 'integral frac')
+
+
+class FakeUI:
+    def __init__(self):
+        self.xcb_connection = None
+
+
+class FakeHit(BarrierHitEvent):
+    def __init__(self, barrier, eventid, dx=0, dy=0, x=0, y=0):
+        self.barrier = barrier
+        self.eventid = eventid
+        self.dx = FP3232(dx, 0)
+        self.dy = FP3232(dy, 0)
+        # Barrier event root coordinates are FP1616 fixed point.
+        self.root_x = x << 16
+        self.root_y = y << 16
+
+
+class FakeLeave(BarrierLeaveEvent):
+    def __init__(self, barrier, eventid):
+        self.barrier = barrier
+        self.eventid = eventid
+
+
+def make_tracker(threshold=10):
+    tracker = BarrierMouseTracker(FakeUI(), Corner.TOP_LEFT, threshold)
+    tracker._root = ROOT
+    tracker._barriers = [X_BARRIER, Y_BARRIER]
+    tracker.region = Rect.make(0, 0, 10, 10)
+    return tracker
+
+
+def test_pressure():
+    """Test that each barrier's hits add up its own axis of motion."""
+    tracker = make_tracker()
+    # Only dx counts against the X barrier, and only dy against the Y barrier.
+    tracker.on_event(FakeHit(X_BARRIER, 1, dx=-3, dy=5))
+    assert tracker.pressure == 3
+    tracker.on_event(FakeHit(Y_BARRIER, 1, dx=7, dy=-2))
+    assert tracker.pressure == 5
+    assert not tracker.in_region
+
+
+def test_threshold():
+    """Test that the region is only entered once the pressure reaches the threshold."""
+    try:
+        tracker = make_tracker()
+        receiver = SignalReceiver(signals.ENTER_REGION)
+        tracker.on_event(FakeHit(X_BARRIER, 1, dx=-4))
+        tracker.on_event(FakeHit(X_BARRIER, 1, dx=-5))
+        assert not receiver.received
+        tracker.on_event(FakeHit(X_BARRIER, 1, dx=-1, y=5))
+        assert receiver.received
+        assert tracker.in_region
+        assert (tracker.last_point.x, tracker.last_point.y) == (0, 5)
+    finally:
+        smokesignal.clear_all()
+
+
+def test_new_hit_resets():
+    """Test that a new approach to the barriers starts from no pressure."""
+    tracker = make_tracker()
+    tracker.on_event(FakeHit(X_BARRIER, 1, dx=-9))
+    tracker.on_event(FakeHit(X_BARRIER, 2, dx=-2))
+    assert tracker.pressure == 2
+    assert not tracker.in_region
+
+
+def test_leave_resets():
+    """Test that leaving the barriers drops the pressure."""
+    tracker = make_tracker()
+    tracker.on_event(FakeHit(Y_BARRIER, 1, dy=-9))
+    tracker.on_event(FakeLeave(Y_BARRIER, 1))
+    assert tracker.pressure == 0
+    tracker.on_event(FakeHit(Y_BARRIER, 1, dy=-2))
+    assert tracker.pressure == 2
+    assert not tracker.in_region
+
+
+def test_unknown_barrier():
+    """Test that hits on other clients' barriers are ignored."""
+    tracker = make_tracker(threshold=0)
+    tracker.on_event(FakeHit(99, 1, dx=-20))
+    assert tracker.pressure == 0
+    assert not tracker.in_region
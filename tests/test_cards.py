@@ -0,0 +1,56 @@
+"""Sound card hotplug monitoring tests."""
+
+import os
+import shutil
+import struct
+import tempfile
+
+from volcorner.alsa.cards import CardMonitor, ControlSpec, IN_CREATE, IN_DELETE
+from volcorner.alsa.cards import card_events, parse_control_specs
+from .util import FakeLoop
+
+
+def inotify_event(mask, name):
+    """Pack an inotify event, with its name padded like the kernel does."""
+    name = name.encode('utf-8') + b'\0' * 4
+    return struct.pack("iIII", 1, mask, 0, len(name)) + name
+
+
+def test_parse_control_specs():
+    """Test parsing controls with and without devices."""
+    specs = parse_control_specs("Master@default, Headphone Front,PCM@hw:1,")
+    assert specs == [ControlSpec('Master', 'default'), ControlSpec('Headphone Front', None),
+                     ControlSpec('PCM', 'hw:1')]
+
+
+def test_card_events():
+    """Test that only card control nodes are reported."""
+    data = (inotify_event(IN_CREATE, "pcmC1D0p") +
+            inotify_event(IN_CREATE, "controlC1") +
+            inotify_event(IN_DELETE, "controlC12"))
+    assert card_events(data) == [(1, True), (12, False)]
+
+
+def test_monitor():
+    """Test watching a device directory for cards."""
+    path = tempfile.mkdtemp()
+    try:
+        added = []
+        removed = []
+        loop = FakeLoop()
+        monitor = CardMonitor(added.append, removed.append, path=path, loop=loop)
+        monitor.open()
+        on_ready, = loop.readers.values()
+
+        node = os.path.join(path, "controlC2")
+        open(node, 'w').close()
+        on_ready()
+        os.remove(node)
+        on_ready()
+        assert added == [2]
+        assert removed == [2]
+
+        monitor.close()
+        assert loop.readers == {}
+    finally:
+        shutil.rmtree(path)
@@ -2,8 +2,8 @@
 
 from nose.tools import raises
 
-from volcorner.rect import Rect, Size
-from volcorner.corner import Corner
+from volcorner.rect import Point, Rect, Size
+from volcorner.corner import Corner, corner_geometry
 
 
 TEST_SCREEN = Size(100, 100)
@@ -46,3 +46,22 @@ def test_get_from_id():
 def test_get_from_invalid_id():
     """Test getting an invalid corner."""
     Corner.from_id('aoeu')
+
+
+def test_monitor_origin():
+    """Test calculating a corner of a monitor that isn't at the root window origin."""
+    corner = Corner.BOTTOM_RIGHT.rect(TEST_SCREEN, TEST_SIZE, Point(1920, 0))
+    assert corner == Rect.make(2019, 99, 1, 1)
+
+
+def test_geometry_memoized():
+    """Test that the corner geometry is only calculated once per monitor layout."""
+    corner_geometry.cache_clear()
+    monitor = Rect.make(1920, 0, 100, 100)
+    geometry = corner_geometry(Corner.TOP_RIGHT, monitor, TEST_SIZE, Size(10, 10), Size(20, 20))
+    assert geometry.activate == Rect.make(2019, 0, 1, 1)
+    assert geometry.deactivate == Rect.make(2010, 0, 10, 10)
+    assert geometry.overlay == Rect.make(2000, 0, 20, 20)
+    assert corner_geometry(Corner.TOP_RIGHT, monitor, TEST_SIZE, Size(10, 10),
+                           Size(20, 20)) is geometry
+    assert corner_geometry.cache_info().hits == 1
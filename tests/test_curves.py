@@ -0,0 +1,60 @@
+"""Volume curve tests."""
+
+from volcorner.alsa.curves import AlsaCurve, CubicCurve, LinearCurve
+from volcorner.alsa.curves import SND_CTL_TLV_DB_GAIN_MUTE
+
+
+def close(a, b, tolerance=1e-6):
+    return abs(a - b) <= tolerance
+
+
+def test_alsa_linear_range():
+    """Test that ranges up to 24 dB are linear in dB, like volume_mapping.c."""
+    curve = AlsaCurve(-2400, 0)
+    assert curve.linear
+    assert close(curve.to_normalized(-1200), 0.5)
+    assert close(curve.to_value(0.25), -1800)
+
+
+def test_alsa_log_range():
+    """Test the logarithmic scale for larger ranges, like volume_mapping.c."""
+    curve = AlsaCurve(-6400, 0)
+    assert not curve.linear
+    # 10^(-20/60) = 0.464, scaled so -64 dB is 0.0
+    min_norm = 10 ** (-6400 / 6000.0)
+    assert close(curve.to_normalized(-2000), (10 ** (-2000 / 6000.0) - min_norm) / (1 - min_norm))
+    assert close(curve.to_normalized(-6400), 0.0)
+    assert close(curve.to_normalized(0), 1.0)
+    assert close(curve.to_value(curve.to_normalized(-2000)), -2000, 1e-6)
+
+
+def test_alsa_mute_range():
+    """Test that a range that mutes at the bottom isn't rescaled."""
+    curve = AlsaCurve(SND_CTL_TLV_DB_GAIN_MUTE, 0)
+    assert curve.min_norm == 0.0
+    assert close(curve.to_normalized(-6000), 0.1)
+
+
+def test_max_offset():
+    """Test a range that doesn't end at 0 dB."""
+    curve = AlsaCurve(-6000, 600)
+    assert close(curve.to_value(1.0), 600)
+    assert close(curve.to_value(curve.to_normalized(-1000)), -1000, 1e-6)
+
+
+def test_cubic():
+    """Test that the cubic curve is the cube root of the amplitude."""
+    curve = CubicCurve(SND_CTL_TLV_DB_GAIN_MUTE, 0)
+    # -60 dB is an amplitude of 0.001
+    assert close(curve.to_normalized(-6000), 0.1)
+    assert close(curve.to_value(0.1), -6000, 1e-6)
+
+
+def test_round_trip():
+    """Test that converting a volume to a control value and back gives the same volume."""
+    for curve in (AlsaCurve(-6400, 0), AlsaCurve(-2400, 0), AlsaCurve(SND_CTL_TLV_DB_GAIN_MUTE, 0),
+                  CubicCurve(-9600, 0), LinearCurve(0, 87)):
+        for i in range(1, 101):
+            normalized = i / 100.0
+            assert close(curve.to_normalized(curve.to_value(normalized)), normalized), \
+                (curve, normalized)
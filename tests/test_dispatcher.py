@@ -0,0 +1,118 @@
+"""EventDispatcher tests."""
+
+import logging
+
+import xcffib
+from xcffib import ffi
+import xcffib.xinput
+from xcffib.xinput import ButtonPressEvent, MotionEvent
+import xcffib.xproto
+from xcffib.xproto import ButtonPressEvent as CoreButtonPressEvent
+from xcffib.xproto import PropertyNotifyEvent
+
+from volcorner.x11.events import EventDispatcher, event_key
+
+# Made up extension opcode for XInput
+XINPUT_OPCODE = 131
+
+
+class FakeConnection:
+    """Just enough of an xcffib connection to hoist events."""
+    hoist_event = xcffib.Connection.hoist_event
+
+    def __init__(self):
+        self._event_offsets = xcffib.OffsetMap(xcffib.xproto._events)
+        self._event_offsets.add(64, XINPUT_OPCODE, xcffib.xinput._events)
+
+
+def core_event(response_type):
+    """Make a zeroed core event buffer."""
+    buf = ffi.new("uint8_t[32]")
+    buf[0] = response_type
+    return ffi.cast("xcb_generic_event_t *", buf), buf
+
+
+def ge_event(extension, evtype):
+    """Make a zeroed GenericEvent buffer."""
+    buf = ffi.new("uint8_t[256]")
+    buf[0] = 35
+    buf[1] = extension
+    ffi.cast("uint16_t *", buf)[4] = evtype
+    return ffi.cast("xcb_generic_event_t *", buf), buf
+
+
+def make_dispatcher(event_types=None):
+    received = []
+    dispatcher = EventDispatcher(FakeConnection())
+    dispatcher.install(received.append, event_types)
+    return dispatcher, received
+
+
+def test_event_key():
+    """Test looking up the dispatch keys of core and GenericEvent events."""
+    conn = FakeConnection()
+    assert event_key(conn, CoreButtonPressEvent) == 4
+    assert event_key(conn, MotionEvent) == (XINPUT_OPCODE, 6)
+
+
+def test_skip_unwanted_events():
+    """Test that only wanted events are hoisted."""
+    dispatcher, received = make_dispatcher([ButtonPressEvent])
+    event, buf = core_event(28)  # PropertyNotify
+    dispatcher.push(event)
+    event, buf = ge_event(XINPUT_OPCODE, 6)  # XI_Motion
+    dispatcher.push(event)
+    event, buf = ge_event(XINPUT_OPCODE, 4)  # XI_ButtonPress
+    dispatcher.push(event)
+    assert [type(e) for e in received] == [ButtonPressEvent]
+    assert dispatcher.hoisted == 1
+    assert dispatcher.skipped == 2
+
+
+def test_catch_all():
+    """Test that a filter without event types gets every event."""
+    dispatcher, received = make_dispatcher()
+    event, buf = core_event(28 | 0x80)  # Sent with SendEvent
+    dispatcher.push(event)
+    assert [type(e) for e in received] == [PropertyNotifyEvent]
+
+
+def test_remove_filter():
+    """Test that nothing is hoisted after the last filter is removed."""
+    dispatcher, received = make_dispatcher([PropertyNotifyEvent])
+    dispatcher.remove(received.append)
+    event, buf = core_event(28)
+    dispatcher.push(event)
+    assert received == []
+    assert dispatcher.skipped == 1
+
+
+class LogRecorder(logging.Handler):
+    """Log handler that keeps its records."""
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def test_report_errors():
+    """Test that X errors from unchecked requests are logged as warnings."""
+    dispatcher, received = make_dispatcher()
+    event, buf = core_event(0)
+    error = ffi.cast("xcb_generic_error_t *", event)
+    error.error_code = 3  # BadWindow
+    error.major_code = 12  # ConfigureWindow
+    error.sequence = 42
+    recorder = LogRecorder()
+    logger = logging.getLogger("events")
+    logger.addHandler(recorder)
+    try:
+        assert not dispatcher.push(event)
+    finally:
+        logger.removeHandler(recorder)
+    assert received == []
+    assert dispatcher.errors == 1
+    warnings = [r.getMessage() for r in recorder.records if r.levelno == logging.WARNING]
+    assert warnings == ["X error 3 on request 12.0 (sequence 42, resource 0x0)"]
@@ -0,0 +1,64 @@
+"""EventCoalescer tests."""
+
+from xcffib.xinput import MotionEvent
+from xcffib.xproto import ButtonPressEvent
+
+from volcorner.x11.events import EventCoalescer
+
+
+class FakeMotion(MotionEvent):
+    def __init__(self, n):
+        self.n = n
+
+
+class FakeButton(ButtonPressEvent):
+    def __init__(self, n):
+        self.n = n
+
+
+def make_coalescer():
+    dispatched = []
+    return EventCoalescer(dispatched.append), dispatched
+
+
+def test_coalesce_motion():
+    """Test that a run of motion events is collapsed into the newest one."""
+    coalescer, dispatched = make_coalescer()
+    for i in range(5):
+        coalescer.push(FakeMotion(i))
+    assert dispatched == []
+    coalescer.flush()
+    assert [e.n for e in dispatched] == [4]
+    assert coalescer.coalesced == 4
+
+
+def test_other_events_keep_order():
+    """Test that other events flush pending motion first, and are never dropped."""
+    coalescer, dispatched = make_coalescer()
+    coalescer.push(FakeMotion(0))
+    coalescer.push(FakeMotion(1))
+    coalescer.push(FakeButton(2))
+    coalescer.push(FakeButton(3))
+    coalescer.push(FakeMotion(4))
+    coalescer.flush()
+    assert [e.n for e in dispatched] == [1, 2, 3, 4]
+    assert coalescer.coalesced == 1
+
+
+def test_flush_without_pending():
+    """Test that flushing an empty batch dispatches nothing."""
+    coalescer, dispatched = make_coalescer()
+    coalescer.flush()
+    assert dispatched == []
+
+
+def test_coalesce_per_device():
+    """Test that each master device keeps its own newest motion event."""
+    coalescer, dispatched = make_coalescer()
+    for i, device in enumerate([2, 2, 3, 2, 3, 3]):
+        event = FakeMotion(i)
+        event.deviceid = device
+        coalescer.push(event)
+    coalescer.flush()
+    assert [e.n for e in dispatched] == [3, 5]
+    assert coalescer.coalesced == 4
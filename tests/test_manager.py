@@ -0,0 +1,269 @@
+"""ALSAMixerManager tests."""
+
+import sys
+import types
+
+from nose import with_setup
+import smokesignal
+
+from volcorner import signals
+from volcorner.alsa.cards import ControlSpec
+
+try:
+    from volcorner.alsa import mixercffi
+except OSError:
+    # Without libasound, stand in for the bindings; the tests replace everything they call.
+    class ALSAMixerError(Exception):
+        def __init__(self, message=None, code=None):
+            self.message = message
+            self.code = code
+
+    mixercffi = types.ModuleType('volcorner.alsa.mixercffi')
+    mixercffi.ALSAMixerError = ALSAMixerError
+    mixercffi.card_indexes = mixercffi.Mixer = None
+    sys.modules[mixercffi.__name__] = mixercffi
+
+from volcorner.alsa import manager
+from volcorner.alsa.manager import CARD_OPEN_ATTEMPTS, ALSAMixerManager
+from .util import FakeLoop, SignalReceiver
+
+ALSAMixerError = mixercffi.ALSAMixerError
+
+
+class FakeHardware:
+    """The sound cards present, and the controls on them."""
+    def __init__(self):
+        self.cards = {}
+        self.locked = set()
+        self.open_mixers = []
+
+    def add(self, index, *controls, volume=0.5):
+        self.cards[index] = {control: volume for control in controls}
+
+
+class FakeHWMixer:
+    def __init__(self, hardware, device):
+        index = int(device[3:])
+        if (index not in hardware.cards) or (index in hardware.locked):
+            raise ALSAMixerError(code=-13)
+        self.hardware = hardware
+        self.device = device
+        self.controls = hardware.cards[index]
+        hardware.open_mixers.append(self)
+
+    def get_poll_fds(self):
+        return [100 + int(self.device[3:])]
+
+    def handle_events(self):
+        pass
+
+    def close(self):
+        self.hardware.open_mixers.remove(self)
+
+
+class FakeControl:
+    def __init__(self, device, control, curve, hw_mixer):
+        self.device_name = device
+        self.control_name = control
+        self.hw_mixer = hw_mixer
+        self.removed = False
+        self.changed = False
+        # Stands in for the control's StepTable.
+        self.steps = (device, control)
+
+    def open(self):
+        if self.control_name not in self.hw_mixer.controls:
+            raise ALSAMixerError(code=-2)
+
+    def close(self):
+        pass
+
+    @property
+    def volume(self):
+        return self.hw_mixer.controls[self.control_name]
+
+    @volume.setter
+    def volume(self, value):
+        self.hw_mixer.controls[self.control_name] = value
+
+    def next_step(self, volume, delta):
+        return volume + delta
+
+    def handle_changes(self):
+        changed, self.changed = self.changed, False
+        return changed
+
+
+hardware = None
+_real = None
+
+
+def setup_fakes():
+    """Replace the ALSA bindings used by the manager with fakes over some hardware."""
+    global hardware, _real
+    hardware = FakeHardware()
+    _real = manager.mixercffi.card_indexes, manager.mixercffi.Mixer, manager.ALSAMixer
+    manager.mixercffi.card_indexes = lambda: sorted(hardware.cards)
+    manager.mixercffi.Mixer = lambda device: FakeHWMixer(hardware, device)
+    manager.ALSAMixer = FakeControl
+
+
+def teardown_fakes():
+    manager.mixercffi.card_indexes, manager.mixercffi.Mixer, manager.ALSAMixer = _real
+    smokesignal.clear_all()
+
+
+def make_manager(specs):
+    loop = FakeLoop()
+    mixer = ALSAMixerManager(specs, hotplug=False, loop=loop)
+    return mixer, loop
+
+
+@with_setup(setup_fakes, teardown_fakes)
+def test_open_every_card():
+    """Test that a control without a device is opened on every card, sharing the card."""
+    hardware.add(0, 'Master', 'PCM', volume=0.2)
+    hardware.add(1, 'Master', volume=0.7)
+    mixer, loop = make_manager([ControlSpec('Master', None), ControlSpec('PCM', None)])
+    mixer.open()
+    assert mixer.controls == [('hw:0', 'Master'), ('hw:0', 'PCM'), ('hw:1', 'Master')]
+    assert mixer.active == ('hw:1', 'Master')
+    assert mixer.volume == 0.7
+    assert len(hardware.open_mixers) == 2
+    assert sorted(loop.readers) == [100, 101]
+
+    mixer.volume = 0.4
+    assert hardware.cards[1]['Master'] == 0.4
+    assert hardware.cards[0]['Master'] == 0.2
+
+
+@with_setup(setup_fakes, teardown_fakes)
+def test_skip_card_without_controls():
+    """Test that a card without any of the controls is closed again."""
+    hardware.add(0, 'Master')
+    hardware.add(1, 'Headphone')
+    mixer, loop = make_manager([ControlSpec('Master', None)])
+    mixer.open()
+    assert mixer.controls == [('hw:0', 'Master')]
+    assert [m.device for m in hardware.open_mixers] == ['hw:0']
+    assert list(loop.readers) == [100]
+
+
+@with_setup(setup_fakes, teardown_fakes)
+def test_select():
+    """Test switching the active control without reopening anything."""
+    hardware.add(0, 'Master', 'PCM', volume=0.2)
+    hardware.add(1, 'Master', volume=0.7)
+    mixer, loop = make_manager([ControlSpec('Master', None), ControlSpec('PCM', None)])
+    mixer.open()
+    open_mixers = list(hardware.open_mixers)
+    switches = mixer.switches
+    volume_changed = SignalReceiver(signals.CHANGE_VOLUME)
+
+    mixer.select('hw:0', 'PCM')
+    assert mixer.active == ('hw:0', 'PCM')
+    assert volume_changed.args == (0.2,)
+    assert hardware.open_mixers == open_mixers
+    assert mixer.switches == switches + 1
+
+    mixer.volume = 0.3
+    assert hardware.cards[0] == {'Master': 0.2, 'PCM': 0.3}
+    try:
+        mixer.select('hw:1', 'PCM')
+        assert False, "Selected a control that isn't open"
+    except KeyError:
+        pass
+    assert mixer.active == ('hw:0', 'PCM')
+
+
+@with_setup(setup_fakes, teardown_fakes)
+def test_publish_steps():
+    """Test that the active control's step table is published whenever it changes."""
+    hardware.add(0, 'Master', 'PCM')
+    mixer, loop = make_manager([ControlSpec('Master', None), ControlSpec('PCM', None)])
+    published = []
+    mixer.steps_listener = published.append
+    mixer.open()
+    assert published[-1] == ('hw:0', 'PCM')
+    mixer.select('hw:0', 'Master')
+    assert published[-1] == ('hw:0', 'Master')
+    assert mixer.steps == ('hw:0', 'Master')
+    mixer.on_card_removed(0)
+    assert published[-1] is None
+
+
+@with_setup(setup_fakes, teardown_fakes)
+def test_unplug():
+    """Test that unplugging the active card switches to the newest control left."""
+    hardware.add(0, 'Master', volume=0.2)
+    hardware.add(1, 'Master', volume=0.7)
+    mixer, loop = make_manager([ControlSpec('Master', None)])
+    mixer.open()
+    volume_changed = SignalReceiver(signals.CHANGE_VOLUME)
+    mixer.on_card_removed(1)
+    assert mixer.controls == [('hw:0', 'Master')]
+    assert mixer.active == ('hw:0', 'Master')
+    assert volume_changed.args == (0.2,)
+    assert list(loop.readers) == [100]
+
+    mixer.on_card_removed(0)
+    assert mixer.active is None
+    assert mixer.volume == 0.0
+    assert hardware.open_mixers == []
+    assert loop.readers == {}
+
+
+@with_setup(setup_fakes, teardown_fakes)
+def test_plug_in():
+    """Test that a card that's plugged in is retried until it opens, and becomes active."""
+    hardware.add(0, 'Master')
+    mixer, loop = make_manager([ControlSpec('Master', None)])
+    mixer.open()
+    hardware.add(1, 'Master', volume=0.9)
+    hardware.locked.add(1)
+    mixer.on_card_added(1)
+    assert mixer.active == ('hw:0', 'Master')
+    assert len(loop.timers) == 1
+
+    hardware.locked.clear()
+    loop.run_timers()
+    assert mixer.active == ('hw:1', 'Master')
+    assert mixer.volume == 0.9
+    assert loop.timers == []
+
+
+@with_setup(setup_fakes, teardown_fakes)
+def test_plug_in_gives_up():
+    """Test that a card that never opens is only tried CARD_OPEN_ATTEMPTS times."""
+    hardware.add(1, 'Master')
+    hardware.locked.add(1)
+    mixer, loop = make_manager([ControlSpec('Master', None)])
+    mixer.open()
+    mixer.on_card_added(1)
+    attempts = 1
+    while loop.timers:
+        loop.run_timers()
+        attempts += 1
+    assert attempts == CARD_OPEN_ATTEMPTS
+    assert mixer.active is None
+
+
+@with_setup(setup_fakes, teardown_fakes)
+def test_inactive_card_changes():
+    """Test that only changes to the active control are sent."""
+    hardware.add(0, 'Master', volume=0.2)
+    hardware.add(1, 'Master', volume=0.7)
+    mixer, loop = make_manager([ControlSpec('Master', None)])
+    mixer.open()
+    first, second = mixer._controls
+    volume_changed = SignalReceiver(signals.CHANGE_VOLUME)
+
+    hardware.cards[0]['Master'] = 0.3
+    first.changed = True
+    loop.readers[100]()
+    assert not volume_changed.received
+
+    hardware.cards[1]['Master'] = 0.8
+    second.changed = True
+    loop.readers[101]()
+    assert volume_changed.args == (0.8,)
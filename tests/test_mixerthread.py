@@ -0,0 +1,216 @@
+"""Threaded mixer tests."""
+
+import asyncio
+import os
+import threading
+import time
+
+import smokesignal
+
+from volcorner import signals
+from volcorner.alsa.steps import StepTable
+from volcorner.mixer import Mixer
+from volcorner.mixerthread import ThreadedMixer
+
+
+class FakeMixer(Mixer):
+    """Mixer that records which thread it's called on."""
+    def __init__(self, loop):
+        self.loop = loop
+        self.threads = set()
+        self.writes = []
+        self.writing = threading.Event()
+        self.release = threading.Event()
+        self.release.set()
+        self._volume = 0.5
+        self._pipe = None
+        self._steps = None
+        self.selected = []
+
+    def open(self):
+        self.threads.add(threading.get_ident())
+        self._pipe = os.pipe()
+        self.loop.add_reader(self._pipe[0], self.on_ready)
+
+    def close(self):
+        self.threads.add(threading.get_ident())
+        self.release.wait()
+        self.loop.remove_reader(self._pipe[0])
+        for fd in self._pipe:
+            os.close(fd)
+
+    @property
+    def volume(self):
+        return self._volume
+
+    @volume.setter
+    def volume(self, value):
+        self.threads.add(threading.get_ident())
+        self.writing.set()
+        self.release.wait()
+        self.writes.append(value)
+
+    def select(self, device, control):
+        self.threads.add(threading.get_ident())
+        self.selected.append((device, control))
+        # Switch to a control with four steps.
+        self._steps = StepTable((raw, raw / 3) for raw in range(4))
+        self.on_steps_changed()
+
+    def next_step(self, volume, delta):
+        raise AssertionError("Called the mixer for a step")
+
+    @property
+    def steps(self):
+        return self._steps
+
+    def on_ready(self):
+        """Simulate a volume change from another program."""
+        self.threads.add(threading.get_ident())
+        value = os.read(self._pipe[0], 1)[0] / 100
+        self.on_volume_changed(value)
+
+
+def make_mixer(**kwargs):
+    loop = asyncio.new_event_loop()
+    threaded = ThreadedMixer(FakeMixer, loop=loop, **kwargs)
+    threaded.open()
+    return threaded, threaded._mixer, loop
+
+
+def run_once(loop):
+    """Run one iteration of the event loop."""
+    loop.call_soon(loop.stop)
+    loop.run_forever()
+
+
+def test_writes_on_worker():
+    """Test that the mixer is only called on the worker thread."""
+    threaded, mixer, loop = make_mixer()
+    try:
+        assert threaded.volume == 0.5
+        threaded.volume = 0.75
+        assert threaded.volume == 0.75
+        threaded.close()
+        assert mixer.writes == [0.75]
+        assert len(mixer.threads) == 1
+        assert threading.get_ident() not in mixer.threads
+    finally:
+        loop.close()
+
+
+def test_coalesce_writes():
+    """Test that only the newest volume is written while a write is in progress."""
+    threaded, mixer, loop = make_mixer()
+    try:
+        mixer.release.clear()
+        threaded.volume = 0.1
+        mixer.writing.wait(1)
+        threaded.volume = 0.2
+        threaded.volume = 0.3
+        threaded.volume = 0.4
+        mixer.release.set()
+        threaded.close()
+        assert mixer.writes == [0.1, 0.4]
+        assert threaded.commands == 4
+        assert threaded.dropped_commands == 0
+    finally:
+        loop.close()
+
+
+def test_select_on_worker():
+    """Test that switching controls is forwarded to the worker thread."""
+    threaded, mixer, loop = make_mixer()
+    try:
+        assert threaded.select('hw:1', 'PCM')
+        threaded.close()
+        assert mixer.selected == [('hw:1', 'PCM')]
+        assert threading.get_ident() not in mixer.threads
+    finally:
+        loop.close()
+
+
+def test_steps_on_loop():
+    """Test that steps come from the step table the worker published, not from the mixer."""
+    threaded, mixer, loop = make_mixer()
+    try:
+        # Without a step table, volumes are continuous.
+        assert threaded.next_step(0.5, 0.01) == 0.51
+        threaded.select('hw:1', 'PCM')
+        deadline = time.monotonic() + 1
+        while (threaded.steps is None) and (time.monotonic() < deadline):
+            run_once(loop)
+        # The change rounds to the same step, so it moves to the next one.
+        assert abs(threaded.next_step(1 / 3, 0.01) - 2 / 3) < 1e-9
+        assert threading.get_ident() not in mixer.threads
+    finally:
+        threaded.close()
+        loop.close()
+
+
+def test_volume_change_on_loop():
+    """Test that a volume change read on the worker is sent on the event loop's thread."""
+    threaded, mixer, loop = make_mixer()
+    received = []
+
+    def on_change_volume(value):
+        received.append((value, threading.get_ident()))
+        loop.stop()
+
+    smokesignal.on(signals.CHANGE_VOLUME, on_change_volume, max_calls=1)
+    try:
+        os.write(mixer._pipe[1], bytes([70]))
+        loop.call_later(1, loop.stop)
+        loop.run_forever()
+        assert received == [(0.7, threading.get_ident())]
+        assert threaded.volume == 0.7
+        assert threading.get_ident() not in mixer.threads
+    finally:
+        threaded.close()
+        loop.close()
+
+
+def test_full_queue_pauses_reader():
+    """Test that a reader stays paused while the queue is full, and resumes once it drains."""
+    threaded, mixer, loop = make_mixer(queue_size=1)
+    received = []
+
+    def on_change_volume(value):
+        received.append(value)
+        loop.stop()
+
+    smokesignal.on(signals.CHANGE_VOLUME, on_change_volume, max_calls=1)
+    try:
+        # Stall the worker on one write, with another one filling the queue.
+        mixer.release.clear()
+        threaded.volume = 0.1
+        mixer.writing.wait(1)
+        threaded.volume = 0.2
+        os.write(mixer._pipe[1], bytes([70]))
+        for _ in range(10):
+            run_once(loop)
+        assert threaded.dropped_commands == 1
+        assert received == []
+
+        mixer.release.set()
+        loop.call_later(1, loop.stop)
+        loop.run_forever()
+        assert received == [0.7]
+        assert mixer.writes == [0.1, 0.2]
+    finally:
+        mixer.release.set()
+        threaded.close()
+        loop.close()
+
+
+def test_close_timeout():
+    """Test that closing gives up on a hung mixer instead of blocking forever."""
+    threaded, mixer, loop = make_mixer(close_timeout=0.05)
+    try:
+        mixer.release.clear()
+        start = time.monotonic()
+        threaded.close()
+        assert time.monotonic() - start < 1
+    finally:
+        mixer.release.set()
+        loop.close()
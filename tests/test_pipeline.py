@@ -0,0 +1,184 @@
+"""RequestBatcher tests."""
+
+import asyncio
+
+import xcffib
+
+from volcorner.x11 import pipeline
+from volcorner.x11.pipeline import AtomCache, RequestBatcher, VersionCache, negotiate
+
+
+class FakeCookie:
+    def __init__(self, sequence, error=False):
+        self.sequence = sequence
+        self.error = error
+        self.done = False
+
+    def discard_reply(self):
+        pass
+
+
+class FakeReplyCookie:
+    def __init__(self, log, name, reply):
+        self.log = log
+        self.name = name
+        self._reply = reply
+        log.append(('send', name))
+
+    def reply(self):
+        self.log.append(('wait', self.name))
+        return self._reply
+
+
+class FakeVersionReply:
+    def __init__(self, major_version, minor_version):
+        self.major_version = major_version
+        self.minor_version = minor_version
+
+
+class FakeAtomReply:
+    def __init__(self, atom):
+        self.atom = atom
+
+
+class FakeExtension:
+    def __init__(self, log, key):
+        self.log = log
+        self.key = key
+
+    def QueryVersion(self, major, minor):
+        return FakeReplyCookie(self.log, (self.key, major, minor),
+                               FakeVersionReply(major, minor))
+
+
+class FakeCore:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def InternAtom(self, only_if_exists, name_len, name):
+        return FakeReplyCookie(self.conn.log, name, FakeAtomReply(len(self.conn.log)))
+
+    def GetInputFocus(self):
+        self.conn.sequence += 1
+        cookie = FakeCookie(self.conn.sequence)
+        self.conn.markers.append(cookie)
+        return cookie
+
+
+class FakeConnection:
+    def __init__(self):
+        self.core = FakeCore(self)
+        self.flushes = 0
+        self.sequence = 0
+        self.markers = []
+        self.log = []
+
+    def __call__(self, key):
+        return FakeExtension(self.log, key)
+
+    def flush(self):
+        self.flushes += 1
+
+    def request(self, error=False):
+        self.sequence += 1
+        return FakeCookie(self.sequence, error)
+
+
+def fake_poll_for_reply(cookie):
+    if not cookie.done:
+        return False, None
+    if cookie.error:
+        raise xcffib.ProtocolException("BadWindow")
+    return True, None
+
+
+def run_once(loop):
+    loop.run_until_complete(asyncio.sleep(0))
+
+
+def new_event_loop():
+    """Set a new event loop, returning it and the old one to restore."""
+    old_loop = asyncio.get_event_loop()
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    return loop, old_loop
+
+
+def test_flush_once_per_iteration():
+    """Test that several flush requests in one event loop iteration flush once."""
+    loop, old_loop = new_event_loop()
+    try:
+        conn = FakeConnection()
+        batcher = RequestBatcher(conn)
+        for _ in range(3):
+            batcher.flush_soon()
+        assert conn.flushes == 0
+        run_once(loop)
+        assert conn.flushes == 1
+        assert batcher.flush_requests == 3
+    finally:
+        loop.close()
+        asyncio.set_event_loop(old_loop)
+
+
+def test_collect_errors():
+    """Test that request errors are collected once the sync marker reply arrives."""
+    loop, old_loop = new_event_loop()
+    real_poll_for_reply = pipeline.poll_for_reply
+    pipeline.poll_for_reply = fake_poll_for_reply
+    try:
+        conn = FakeConnection()
+        batcher = RequestBatcher(conn)
+        good = conn.request()
+        bad = conn.request(error=True)
+        batcher.check(good, "do something")
+        batcher.check(bad, "fail")
+        run_once(loop)
+        assert len(conn.markers) == 1
+
+        # Nothing is collected until the server has processed the marker.
+        batcher._collect_errors()
+        assert batcher.errors == 0
+        for cookie in (good, bad, conn.markers[0]):
+            cookie.done = True
+        batcher._collect_errors()
+        assert batcher.errors == 1
+        assert batcher._checks == []
+    finally:
+        pipeline.poll_for_reply = real_poll_for_reply
+        batcher.close()
+        loop.close()
+        asyncio.set_event_loop(old_loop)
+
+
+def test_version_cache():
+    """Test that each extension version is only queried again for a higher version."""
+    conn = FakeConnection()
+    versions = VersionCache(conn)
+    assert versions.reply('ext', (1, 0)).minor_version == 0
+    assert versions.reply('ext', (1, 0)).minor_version == 0
+    assert versions.reply('ext', (1, 2)).minor_version == 2
+    assert [name for action, name in conn.log if action == 'send'] == [('ext', 1, 0),
+                                                                        ('ext', 1, 2)]
+
+
+def test_atom_cache():
+    """Test that atoms are only interned once."""
+    conn = FakeConnection()
+    atoms = AtomCache(conn)
+    atom = atoms.get('FOO')
+    assert atoms.get('FOO') == atom
+    assert conn.log == [('send', 'FOO'), ('wait', 'FOO')]
+
+
+def test_negotiate():
+    """Test that all the requests are sent before waiting for any reply."""
+    conn = FakeConnection()
+    conn.versions = VersionCache(conn)
+    conn.atoms = AtomCache(conn)
+    negotiate(conn, versions=[('a', (1, 0)), ('b', (2, 0))], atoms=['FOO', 'BAR'])
+    actions = [action for action, name in conn.log]
+    assert actions == ['send'] * 4 + ['wait'] * 4
+    conn.versions.reply('a', (1, 0))
+    conn.atoms.get('BAR')
+    assert len(conn.log) == 8
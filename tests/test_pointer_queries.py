@@ -0,0 +1,234 @@
+"""XInput2MouseTracker pipelined QueryPointer tests."""
+
+import asyncio
+from collections import namedtuple
+
+from nose import with_setup
+import xcffib
+from xcffib.xinput import MotionEvent, RawMotionEvent
+
+from volcorner.rect import Point, Rect
+from volcorner.x11 import xinput2tracker
+from volcorner.x11.xinput2tracker import MAX_POINTER_QUERIES, POINTER_QUERY_RETRY
+from volcorner.x11.xinput2tracker import XInput2MouseTracker
+
+ROOT = 1
+
+PointerReply = namedtuple('PointerReply', 'same_screen root_x root_y')
+
+
+class FakeCookie:
+    """QueryPointer cookie whose reply arrives when the test says so."""
+    def __init__(self):
+        self.reply = None
+        self.error = None
+        self.discarded = False
+
+    def discard_reply(self):
+        self.discarded = True
+
+
+class FakeCore:
+    def __init__(self):
+        self.cookies = []
+
+    def QueryPointer(self, window):
+        cookie = FakeCookie()
+        self.cookies.append(cookie)
+        return cookie
+
+
+class FakeBatcher:
+    def flush_soon(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self):
+        self.core = FakeCore()
+        self.batcher = FakeBatcher()
+
+
+class FakeUI:
+    def __init__(self):
+        self.xcb_connection = FakeConnection()
+
+
+class FakeRawMotion(RawMotionEvent):
+    def __init__(self):
+        pass
+
+
+class FakeMotion(MotionEvent):
+    def __init__(self, x, y):
+        self.root = ROOT
+        self.deviceid = 2
+        self.sourceid = 2
+        # XI_Motion root coordinates are FP1616 fixed point.
+        self.root_x = x << 16
+        self.root_y = y << 16
+
+
+def fake_poll_for_reply(cookie):
+    if cookie.error is not None:
+        raise xcffib.ProtocolException(cookie.error)
+    return cookie.reply is not None, cookie.reply
+
+
+_real_poll_for_reply = xinput2tracker.poll_for_reply
+loop = None
+
+
+def setup_loop():
+    global loop
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    xinput2tracker.poll_for_reply = fake_poll_for_reply
+
+
+def teardown_loop():
+    xinput2tracker.poll_for_reply = _real_poll_for_reply
+    asyncio.set_event_loop(None)
+    loop.close()
+
+
+def run_once():
+    """Run one iteration of the event loop."""
+    loop.call_soon(loop.stop)
+    loop.run_forever()
+
+
+def make_tracker(raw_motion=True):
+    ui = FakeUI()
+    tracker = XInput2MouseTracker(ui, raw_motion=raw_motion)
+    tracker._root = ROOT
+    tracker.region = Rect.make(0, 0, 10, 10)
+    return tracker, ui.xcb_connection.core.cookies
+
+
+@with_setup(setup_loop, teardown_loop)
+def test_in_flight_cap():
+    """Test that no more than MAX_POINTER_QUERIES requests are in flight."""
+    tracker, cookies = make_tracker()
+    for _ in range(MAX_POINTER_QUERIES + 3):
+        tracker.on_event(FakeRawMotion())
+    assert len(cookies) == MAX_POINTER_QUERIES
+    assert tracker.queries_in_flight == MAX_POINTER_QUERIES
+    assert tracker.queries_sent == MAX_POINTER_QUERIES
+
+
+@with_setup(setup_loop, teardown_loop)
+def test_drop_stale_replies():
+    """Test that the newest reply wins, and older requests in flight are discarded."""
+    tracker, cookies = make_tracker()
+    tracker.on_event(FakeRawMotion())
+    tracker.on_event(FakeRawMotion())
+    cookies[0].reply = PointerReply(True, 50, 50)
+    cookies[1].reply = PointerReply(True, 5, 5)
+    tracker._on_resolve_ready()
+    assert tracker.last_point == Point(5, 5)
+    assert cookies[0].discarded
+    assert not cookies[1].discarded
+    assert tracker.queries_dropped == 1
+    assert tracker.replies_received == 1
+    assert tracker.queries_in_flight == 0
+
+
+@with_setup(setup_loop, teardown_loop)
+def test_catch_up_after_full_pipeline():
+    """Test that motion while the pipeline was full sends one more request after a reply."""
+    tracker, cookies = make_tracker()
+    for _ in range(MAX_POINTER_QUERIES + 2):
+        tracker.on_event(FakeRawMotion())
+    cookies[0].reply = PointerReply(True, 5, 5)
+    tracker._on_resolve_ready()
+    assert tracker.last_point == Point(5, 5)
+    assert len(cookies) == MAX_POINTER_QUERIES + 1
+    assert tracker.queries_in_flight == MAX_POINTER_QUERIES
+
+    # Without more motion, another reply doesn't send anything.
+    for cookie in cookies[1:]:
+        cookie.reply = PointerReply(True, 6, 6)
+    tracker._on_resolve_ready()
+    assert len(cookies) == MAX_POINTER_QUERIES + 1
+    assert tracker.queries_in_flight == 0
+
+
+@with_setup(setup_loop, teardown_loop)
+def test_retry_timer():
+    """Test that replies are checked again after POINTER_QUERY_RETRY until they arrive."""
+    tracker, cookies = make_tracker()
+    tracker.on_event(FakeRawMotion())
+    first = tracker._resolve_handle
+    assert first is not None
+    tracker._on_resolve_ready()
+    retry = tracker._resolve_handle
+    assert retry is not None
+    assert abs(retry.when() - loop.time() - POINTER_QUERY_RETRY) < 0.005
+
+    cookies[0].reply = PointerReply(True, 5, 5)
+    tracker._on_resolve_ready()
+    assert tracker._resolve_handle is None
+    assert tracker.in_region
+
+
+@with_setup(setup_loop, teardown_loop)
+def test_cancel():
+    """Test that cancelling discards every request in flight and the retry timer."""
+    tracker, cookies = make_tracker()
+    tracker.on_event(FakeRawMotion())
+    tracker.on_event(FakeRawMotion())
+    handle = tracker._resolve_handle
+    tracker._cancel_pointer_queries()
+    assert handle.cancelled()
+    assert tracker._resolve_handle is None
+    assert all(cookie.discarded for cookie in cookies)
+    assert tracker.queries_dropped == 2
+    assert tracker.queries_in_flight == 0
+
+
+@with_setup(setup_loop, teardown_loop)
+def test_motion_mode_uses_motion():
+    """Test that raw motion doesn't query the pointer when XI_Motion arrives in the same batch."""
+    tracker, cookies = make_tracker(raw_motion=False)
+    tracker.on_event(FakeRawMotion())
+    tracker.on_event(FakeMotion(5, 5))
+    run_once()
+    assert cookies == []
+    assert tracker.in_region
+
+
+@with_setup(setup_loop, teardown_loop)
+def test_motion_mode_fallback():
+    """Test that raw motion without XI_Motion queries the pointer after the batch."""
+    tracker, cookies = make_tracker(raw_motion=False)
+    tracker.on_event(FakeRawMotion())
+    tracker.on_event(FakeRawMotion())
+    assert cookies == []
+    run_once()
+    assert len(cookies) == 1
+    assert tracker.raw_fallbacks == 1
+
+    cookies[0].reply = PointerReply(True, 5, 5)
+    tracker._on_resolve_ready()
+    assert tracker.in_region
+
+
+@with_setup(setup_loop, teardown_loop)
+def test_failed_query():
+    """Test that a failed request is dropped, and doesn't stop the pipeline."""
+    tracker, cookies = make_tracker()
+    for _ in range(MAX_POINTER_QUERIES + 1):
+        tracker.on_event(FakeRawMotion())
+    cookies[-1].error = "BadWindow"
+    tracker._on_resolve_ready()
+    assert tracker.queries_failed == 1
+    assert tracker._resolve_handle is not None
+
+    # The motion while the pipeline was full sends another request in its place.
+    assert len(cookies) == MAX_POINTER_QUERIES + 1
+    assert tracker.queries_in_flight == MAX_POINTER_QUERIES
+    cookies[-1].reply = PointerReply(True, 5, 5)
+    tracker._on_resolve_ready()
+    assert tracker.in_region
+    assert tracker.queries_in_flight == 0
@@ -0,0 +1,95 @@
+"""VolumeRamp tests."""
+
+from volcorner.ramp import RAMP_DURATION, RAMP_TICK, VolumeRamp
+from volcorner.volume import VolumeWriter
+from .util import FakeClock, FakeLoop, FakeMixer
+
+
+class FakeWriter:
+    def __init__(self, volume=0.0):
+        self.volume = volume
+        self.writes = []
+
+    def set(self, value, interval=None):
+        self.volume = value
+        self.writes.append(value)
+        return value
+
+
+def make_ramp(volume=0.0, duration=1.0):
+    writer = FakeWriter(volume)
+    steps = []
+    loop = FakeLoop()
+    clock = FakeClock()
+    ramp = VolumeRamp(writer, steps.append, duration, tick=0.25, loop=loop, clock=clock)
+    return ramp, writer, steps, loop, clock
+
+
+def approx(values, expected):
+    return (len(values) == len(expected) and
+            all(abs(value - other) < 1e-9 for value, other in zip(values, expected)))
+
+
+def run_ticks(loop, clock, count):
+    for _ in range(count):
+        clock.time += 0.25
+        loop.run_timers()
+
+
+def test_ramp():
+    """Test ramping to a target in steps."""
+    ramp, writer, steps, loop, clock = make_ramp()
+    assert ramp.ramp_to(0.4) == 0.4
+    assert steps == []
+    run_ticks(loop, clock, 4)
+    assert approx(steps, [0.1, 0.2, 0.3, 0.4])
+    assert writer.writes == steps
+    assert not ramp.active
+    assert ramp.volume == 0.4
+
+
+def test_retarget():
+    """Test that a new target mid-ramp ramps from the current volume."""
+    ramp, writer, steps, loop, clock = make_ramp()
+    ramp.ramp_to(0.4)
+    run_ticks(loop, clock, 2)
+    assert ramp.change(0.4) == 0.8
+    assert ramp.retargets == 1
+    run_ticks(loop, clock, 4)
+    assert approx(steps, [0.1, 0.2, 0.35, 0.5, 0.65, 0.8])
+    assert len(loop.timers) == 0
+
+
+def test_no_ramp():
+    """Test jumping straight to the target without a ramp duration."""
+    ramp, writer, steps, loop, clock = make_ramp(0.5, duration=0)
+    ramp.change(-0.7)
+    assert steps == [0.0]
+    assert loop.timers == []
+
+
+def test_finish():
+    """Test jumping to the end of a ramp."""
+    ramp, writer, steps, loop, clock = make_ramp()
+    ramp.ramp_to(1.0)
+    run_ticks(loop, clock, 1)
+    ramp.finish()
+    assert writer.volume == 1.0
+    assert not ramp.active
+
+
+def test_mixer_writes():
+    """Test that every step of a default ramp is written to the mixer."""
+    mixer = FakeMixer(0.0)
+    clock = FakeClock()
+    loop = FakeLoop(clock)
+    writer = VolumeWriter(mixer, loop=loop, clock=clock)
+    ramp = VolumeRamp(writer, lambda value: None, loop=loop, clock=clock)
+    ramp.ramp_to(0.5)
+    while ramp.active or writer.pending:
+        clock.time += RAMP_TICK
+        loop.run_timers()  # The ramp tick
+        loop.run_timers()  # The write it scheduled
+    assert len(mixer.writes) >= round(RAMP_DURATION / RAMP_TICK)
+    assert mixer.writes == sorted(mixer.writes)
+    assert mixer.writes[-1] == 0.5
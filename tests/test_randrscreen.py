@@ -0,0 +1,74 @@
+"""RandRScreen screen change debounce tests."""
+
+import smokesignal
+from xcffib.randr import ScreenChangeNotifyEvent
+
+from volcorner import signals
+from volcorner.rect import Size
+from volcorner.x11.randrscreen import RandRScreen
+from .util import FakeLoop, SignalReceiver
+
+
+ROOT = 1
+
+
+class FakeUI:
+    xcb_connection = None
+
+
+def make_screen():
+    loop = FakeLoop()
+    screen = RandRScreen(FakeUI(), loop=loop)
+    # Pretend the screen was opened, without monitor support.
+    screen._root = ROOT
+    screen._size = Size(800, 600)
+    screen._listening = True
+    return screen, loop
+
+
+def notify(screen, width, height, root=ROOT):
+    event = ScreenChangeNotifyEvent.__new__(ScreenChangeNotifyEvent)
+    event.root = root
+    event.width = width
+    event.height = height
+    screen.handle_event(event)
+
+
+def test_notification_burst():
+    """Test that a burst of screen change notifications only updates once it settles."""
+    screen, loop = make_screen()
+    receiver = SignalReceiver(signals.CHANGE_RESOLUTION)
+    try:
+        notify(screen, 1024, 768)
+        notify(screen, 1280, 1024)
+        notify(screen, 1920, 1080)
+        assert screen.size == Size(800, 600)
+        loop.run_timers()
+        assert screen.size == Size(1920, 1080)
+        assert receiver.received
+        assert screen.notifications == 3
+        assert screen.updates == 1
+    finally:
+        smokesignal.clear_all()
+
+
+def test_unchanged_geometry():
+    """Test that a notification which doesn't change the geometry isn't published."""
+    screen, loop = make_screen()
+    receiver = SignalReceiver(signals.CHANGE_RESOLUTION)
+    try:
+        notify(screen, 1024, 768)
+        notify(screen, 800, 600)
+        loop.run_timers()
+        assert not receiver.received
+        assert screen.updates == 0
+    finally:
+        smokesignal.clear_all()
+
+
+def test_other_screen():
+    """Test that notifications for another screen's root window are ignored."""
+    screen, loop = make_screen()
+    notify(screen, 1024, 768, root=ROOT + 1)
+    assert screen.notifications == 0
+    assert loop.timers == []
@@ -0,0 +1,40 @@
+"""RegionGrid tests."""
+
+from volcorner.rect import Bounds, Rect
+from volcorner.regionindex import RegionGrid
+
+
+def test_empty_grid():
+    """Test that nothing is found in an empty grid."""
+    grid = RegionGrid()
+    assert grid.lookup(0, 0) is None
+    assert grid.bounds is None
+
+
+def test_lookup_many_regions():
+    """Test looking up points in a grid of many small regions."""
+    regions = {(col, row): Rect.make(col * 10, row * 10, 5, 5)
+               for col in range(16) for row in range(16)}
+    grid = RegionGrid(regions, cell_size=8)
+    assert grid.lookup(0, 0) == (0, 0)
+    assert grid.lookup(154, 64) == (15, 6)
+    assert grid.lookup(155, 64) is None
+    assert grid.lookup(-1, 0) is None
+    assert grid.lookup(200, 200) is None
+    assert grid.bounds == Bounds(0, 0, 154, 154)
+
+
+def test_overlap_priority():
+    """Test that the first region wins where regions overlap."""
+    grid = RegionGrid({'small': Rect.make(0, 0, 10, 10), 'big': Rect.make(0, 0, 100, 100)})
+    assert grid.lookup(5, 5) == 'small'
+    assert grid.lookup(50, 50) == 'big'
+
+
+def test_large_bounds():
+    """Test that the grid cells grow to cover far apart regions."""
+    grid = RegionGrid({'a': Rect.make(0, 0, 1, 1), 'b': Rect.make(100000, 100000, 1, 1)})
+    assert grid.cell_size > 64
+    assert grid.lookup(0, 0) == 'a'
+    assert grid.lookup(100000, 100000) == 'b'
+    assert grid.lookup(50000, 50000) is None
@@ -0,0 +1,47 @@
+"""Screen monitor table tests."""
+
+from volcorner.rect import Rect, Size
+from volcorner.screen import Monitor, Screen
+
+LEFT = Monitor('DP-1', False, Rect.make(0, 0, 1920, 1080))
+RIGHT = Monitor('HDMI-1', True, Rect.make(1920, 0, 2560, 1440))
+
+
+class FakeScreen(Screen):
+    def __init__(self, monitors):
+        self._monitors = monitors
+
+    def open(self):
+        pass
+
+    def close(self):
+        pass
+
+    @property
+    def size(self):
+        return Size(4480, 1440)
+
+    @property
+    def monitors(self):
+        return self._monitors
+
+
+def test_primary_monitor():
+    """Test finding the primary monitor."""
+    assert FakeScreen((LEFT, RIGHT)).monitor_rect() == RIGHT.rect
+
+
+def test_named_monitor():
+    """Test finding a monitor by name."""
+    assert FakeScreen((LEFT, RIGHT)).monitor_rect('DP-1') == LEFT.rect
+
+
+def test_no_primary_monitor():
+    """Test using the first monitor when none is primary."""
+    assert FakeScreen((LEFT,)).monitor_rect() == LEFT.rect
+
+
+def test_unknown_monitor():
+    """Test using the whole screen without a matching monitor."""
+    assert FakeScreen((LEFT, RIGHT)).monitor_rect('VGA-1') == Rect.make(0, 0, 4480, 1440)
+    assert FakeScreen(()).monitor_rect() == Rect.make(0, 0, 4480, 1440)
@@ -0,0 +1,100 @@
+"""Smooth scroll tests."""
+
+from xcffib.xinput import DeviceClassType, ScrollType
+
+from volcorner.x11.scroll import SmoothScroll, valuator_values
+
+
+class FakeFP3232:
+    def __init__(self, value):
+        self.integral = int(value)
+        self.frac = int((value - self.integral) * (1 << 32))
+
+
+class FakeScrollClass:
+    type = DeviceClassType.Scroll
+
+    def __init__(self, number, scroll_type, increment):
+        self.number = number
+        self.scroll_type = scroll_type
+        self.increment = FakeFP3232(increment)
+
+
+class FakeEvent:
+    def __init__(self, valuator_mask, axisvalues):
+        self.valuator_mask = valuator_mask
+        self.axisvalues = [FakeFP3232(v) for v in axisvalues]
+
+
+def make_scroll():
+    scroll = SmoothScroll(quantum=0.5)
+    scroll.set_device_classes(2, [FakeScrollClass(2, ScrollType.Horizontal, 15.0),
+                                  FakeScrollClass(3, ScrollType.Vertical, 15.0)])
+    return scroll
+
+
+def test_valuator_values():
+    """Test decoding the valuators set in an event."""
+    event = FakeEvent([0b1011, 0b1], [1.0, 2.5, 4.0, 32.0])
+    assert valuator_values(event) == {0: 1.0, 1: 2.5, 3: 4.0, 32: 32.0}
+
+
+def test_vertical_scroll_only():
+    """Test that only devices with a vertical scroll class have smooth scrolling."""
+    scroll = make_scroll()
+    assert scroll.has_smooth_scroll(2)
+    scroll.set_device_classes(2, [FakeScrollClass(2, ScrollType.Horizontal, 15.0)])
+    assert not scroll.has_smooth_scroll(2)
+
+
+def test_accumulate_scroll():
+    """Test that small scrolls are accumulated up to the quantum."""
+    scroll = make_scroll()
+    # The first event only sets the position.
+    assert scroll.add_valuators(2, {3: 100.0}) == 0.0
+    assert scroll.add_valuators(2, {3: 95.0}) == 0.0
+    assert abs(scroll.add_valuators(2, {3: 90.0}) - 2 / 3) < 1e-6
+    # Scrolling down is negative.
+    assert scroll.add_valuators(2, {3: 120.0}) == -2.0
+    # Other valuators are ignored.
+    assert scroll.add_valuators(2, {2: 0.0}) == 0.0
+
+
+def test_reset():
+    """Test that resetting forgets the last position and the partial scroll."""
+    scroll = make_scroll()
+    scroll.add_valuators(2, {3: 100.0})
+    scroll.add_valuators(2, {3: 95.0})
+    scroll.reset()
+    assert scroll.add_valuators(2, {3: 0.0}) == 0.0
+    assert scroll.add_valuators(2, {3: 3.0}) == 0.0
+
+
+def test_devices_accumulate_separately():
+    """Test that partial scrolls from different devices aren't added together."""
+    scroll = make_scroll()
+    scroll.set_device_classes(3, [FakeScrollClass(1, ScrollType.Vertical, 10.0)])
+    scroll.add_valuators(2, {3: 100.0})
+    scroll.add_valuators(3, {1: 100.0})
+    assert scroll.add_valuators(2, {3: 94.0}) == 0.0
+    assert scroll.add_valuators(3, {1: 104.0}) == 0.0
+    assert abs(scroll.add_valuators(2, {3: 90.0}) - 2 / 3) < 1e-6
+
+    # Resetting one device keeps the other's partial scroll.
+    scroll.reset(2)
+    assert abs(scroll.add_valuators(3, {1: 105.0}) + 0.5) < 1e-6
+
+
+def test_emulated_clicks():
+    """Test that only the emulated clicks already counted from the valuators are ignored."""
+    scroll = make_scroll()
+    # Without valuator motion, an emulated click is the only report of the scroll.
+    assert not scroll.take_emulated_click(2)
+    scroll.add_valuators(2, {3: 100.0})
+    assert not scroll.take_emulated_click(2)
+
+    # Two clicks at once are followed by two emulated clicks.
+    scroll.add_valuators(2, {3: 70.0})
+    assert scroll.take_emulated_click(2)
+    assert scroll.take_emulated_click(2)
+    assert not scroll.take_emulated_click(2)
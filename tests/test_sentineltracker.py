@@ -0,0 +1,118 @@
+"""SentinelMouseTracker arming tests."""
+
+import smokesignal
+from xcffib.xproto import ConfigWindow, EnterNotifyEvent, StackMode
+
+from volcorner import signals
+from volcorner.corner import Corner
+from volcorner.rect import Size
+from volcorner.x11.sentineltracker import SentinelMouseTracker
+from .util import SignalReceiver
+
+ROOT = 1
+WINDOW = 100
+CORNER_RECT = Corner.TOP_RIGHT.rect(Size(100, 50), Size(10, 10))
+
+
+class FakeExtension:
+    """X extension that records the requests sent to it."""
+    def __init__(self):
+        self.requests = []
+
+    def __getattr__(self, name):
+        def request(*args, **kwargs):
+            self.requests.append((name,) + args)
+        return request
+
+
+class FakeBatcher:
+    def flush(self):
+        pass
+
+    def flush_soon(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self):
+        self.core = FakeExtension()
+        self.xinput = FakeExtension()
+        self.batcher = FakeBatcher()
+
+    def generate_id(self):
+        return WINDOW
+
+
+class FakeUI:
+    def __init__(self):
+        self.xcb_connection = FakeConnection()
+
+
+class FakeEnter(EnterNotifyEvent):
+    def __init__(self, window, x, y):
+        self.event = window
+        self.root_x = x
+        self.root_y = y
+
+
+def make_tracker():
+    """Make a listening tracker with its sentinel window created, but no region."""
+    ui = FakeUI()
+    tracker = SentinelMouseTracker(ui)
+    tracker._root = ROOT
+    tracker._setup()
+    tracker._is_listening = True
+    return tracker, ui.xcb_connection.core.requests
+
+
+def test_arm():
+    """Test that the sentinel window is placed over the region and mapped."""
+    tracker, requests = make_tracker()
+    assert [r[0] for r in requests] == ['CreateWindow']
+    del requests[:]
+
+    tracker.region = CORNER_RECT
+    value_mask = (ConfigWindow.X | ConfigWindow.Y | ConfigWindow.Width | ConfigWindow.Height |
+                  ConfigWindow.StackMode)
+    assert requests == [('ConfigureWindow', WINDOW, value_mask, [90, 0, 10, 10, StackMode.Above]),
+                        ('MapWindow', WINDOW)]
+
+    # Arming again for the same region doesn't send anything.
+    del requests[:]
+    assert not tracker._arm(CORNER_RECT)
+    assert requests == []
+
+
+def test_disarm():
+    """Test that the sentinel window is unmapped once the pointer is inside."""
+    tracker, requests = make_tracker()
+    tracker.region = CORNER_RECT
+    del requests[:]
+    tracker.update_point(95, 5)
+    assert requests == [('UnmapWindow', WINDOW)]
+    assert tracker._tracking_motion
+
+    # Leaving the region maps it again.
+    del requests[:]
+    tracker.update_point(50, 25)
+    assert [r[0] for r in requests] == ['ConfigureWindow', 'MapWindow']
+    assert not tracker._tracking_motion
+
+
+def test_enter_window():
+    """Test that entering the sentinel window enters the region."""
+    try:
+        tracker, requests = make_tracker()
+        tracker.region = CORNER_RECT
+        receiver = SignalReceiver(signals.ENTER_REGION)
+
+        # Other windows' EnterNotify events aren't ours.
+        tracker.on_event(FakeEnter(WINDOW + 1, 95, 5))
+        assert not receiver.received
+
+        tracker.on_event(FakeEnter(WINDOW, 95, 5))
+        assert receiver.received
+        assert (tracker.last_point.x, tracker.last_point.y) == (95, 5)
+        assert ('UnmapWindow', WINDOW) in requests
+    finally:
+        smokesignal.clear_all()
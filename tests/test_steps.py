@@ -0,0 +1,42 @@
+"""Hardware volume step table tests."""
+
+from nose.tools import raises
+
+from volcorner.alsa.steps import StepTable
+
+
+def make_steps():
+    # Raw values 0-7, where pairs of raw values have the same volume.
+    return StepTable((raw, (raw // 2) / 3.0) for raw in range(8))
+
+
+def test_distinct_steps():
+    """Test that raw values with the same volume are one step."""
+    steps = make_steps()
+    assert len(steps) == 4
+    assert steps.volume(3) == steps.volume(2) == 1 / 3.0
+    assert steps.raw(1 / 3.0) == 2
+
+
+def test_nearest_step():
+    """Test rounding a volume to the nearest step."""
+    steps = make_steps()
+    assert steps.raw(0.1) == 0
+    assert steps.raw(0.2) == 2
+    assert steps.raw(1.0) == 6
+
+
+def test_step_past_rounding():
+    """Test that a small step still moves to the next hardware step."""
+    steps = make_steps()
+    assert steps.step(1 / 3.0, 0.05) == 2 / 3.0
+    assert steps.step(1 / 3.0, -0.05) == 0.0
+    assert steps.step(0.0, -0.05) == 0.0
+    # A big enough step is left as it is.
+    assert steps.step(0.0, 0.3) == 0.3
+
+
+@raises(ValueError)
+def test_no_steps():
+    """Test that a control needs at least one step."""
+    StepTable([])
@@ -0,0 +1,47 @@
+"""VolumeWriter tests."""
+
+from volcorner.volume import VolumeWriter
+from .util import FakeClock, FakeLoop, FakeMixer
+
+
+def make_writer(volume=0.5):
+    mixer = FakeMixer(volume)
+    loop = FakeLoop()
+    clock = FakeClock()
+    return VolumeWriter(mixer, interval=0.1, loop=loop, clock=clock), mixer, loop, clock
+
+
+def test_coalesce_changes():
+    """Test that a burst of changes is written once."""
+    writer, mixer, loop, _ = make_writer()
+    for _ in range(10):
+        writer.change(0.05)
+    assert writer.volume == 1.0
+    assert writer.pending
+    assert mixer.writes == []
+    loop.run_timers()
+    assert mixer.writes == [1.0]
+    assert not writer.pending
+    assert writer.changes == 10
+
+
+def test_write_interval():
+    """Test that changes after a write wait for the write interval."""
+    writer, mixer, loop, clock = make_writer()
+    writer.change(0.1)
+    loop.run_timers()
+    writer.change(0.1)
+    assert loop.timers[0].delay == 0.1
+    clock.time = 0.1
+    loop.run_timers()
+    assert mixer.writes == [0.6, 0.7]
+
+
+def test_unchanged_volume():
+    """Test that a target equal to the mixer volume isn't written."""
+    writer, mixer, loop, _ = make_writer()
+    writer.change(0.1)
+    writer.change(-0.1)
+    loop.run_timers()
+    assert mixer.writes == []
+    assert writer.writes == 0
@@ -0,0 +1,67 @@
+"""XInput2MouseTracker multiple screen tests."""
+
+import smokesignal
+from xcffib.xinput import LeaveEvent, MotionEvent, NotifyDetail
+
+from volcorner import signals
+from volcorner.rect import Rect
+from volcorner.x11.xinput2tracker import XInput2MouseTracker
+from .util import SignalReceiver
+
+ROOT = 1
+OTHER_ROOT = 2
+DEVICE = 2
+
+
+class FakeUI:
+    xcb_connection = None
+
+
+class FakeMotion(MotionEvent):
+    def __init__(self, root, x, y):
+        self.root = root
+        self.deviceid = DEVICE
+        self.sourceid = DEVICE
+        # XI_Motion root coordinates are FP1616 fixed point.
+        self.root_x = x << 16
+        self.root_y = y << 16
+
+
+class FakeLeave(LeaveEvent):
+    def __init__(self, root, detail):
+        self.root = root
+        self.event = root
+        self.deviceid = DEVICE
+        self.detail = detail
+
+
+def make_tracker():
+    tracker = XInput2MouseTracker(FakeUI(), screen_num=1)
+    tracker._root = ROOT
+    tracker.region = Rect.make(0, 0, 10, 10)
+    return tracker
+
+
+def test_other_screen_motion():
+    """Test that motion on another screen's root window is ignored."""
+    tracker = make_tracker()
+    tracker.on_event(FakeMotion(OTHER_ROOT, 5, 5))
+    assert tracker.last_point is None
+    tracker.on_event(FakeMotion(ROOT, 5, 5))
+    assert tracker.in_region
+
+
+def test_leave_screen():
+    """Test that the pointer leaves the region when it moves to another screen."""
+    tracker = make_tracker()
+    tracker.on_event(FakeMotion(ROOT, 5, 5))
+    leave = SignalReceiver(signals.LEAVE_REGION)
+    try:
+        # Entering a child window isn't leaving the screen.
+        tracker.on_event(FakeLeave(ROOT, NotifyDetail.Inferior))
+        assert tracker.in_region
+        tracker.on_event(FakeLeave(ROOT, NotifyDetail.Nonlinear))
+        assert not tracker.in_region
+        assert leave.kwargs == {'screen_num': 1}
+    finally:
+        smokesignal.clear_all()
@@ -0,0 +1,76 @@
+"""XInput2MouseTracker scroll wheel tests."""
+
+import smokesignal
+from xcffib.xinput import ButtonPressEvent, MotionEvent, PointerEventFlags
+from xcffib.xinput import ScrollType
+
+from volcorner import signals
+from volcorner.rect import Rect
+from volcorner.x11.xinput2tracker import XInput2MouseTracker
+from .test_scroll import FakeFP3232, FakeScrollClass
+from .util import SignalReceiver
+
+ROOT = 1
+DEVICE = 2
+SOURCE = 9
+
+
+class FakeUI:
+    xcb_connection = None
+
+
+class FakeButtonPress(ButtonPressEvent):
+    def __init__(self, button, flags=0):
+        self.root = ROOT
+        self.deviceid = DEVICE
+        self.sourceid = SOURCE
+        self.detail = button
+        self.flags = flags
+
+
+class FakeMotion(MotionEvent):
+    def __init__(self, value):
+        self.root = ROOT
+        self.deviceid = DEVICE
+        self.sourceid = SOURCE
+        self.root_x = 5 << 16
+        self.root_y = 5 << 16
+        # Only valuator 3 is set.
+        self.valuator_mask = [0b1000]
+        self.axisvalues = [FakeFP3232(value)]
+
+
+def make_tracker(raw_motion):
+    tracker = XInput2MouseTracker(FakeUI(), raw_motion=raw_motion)
+    tracker._root = ROOT
+    tracker.region = Rect.make(0, 0, 10, 10)
+    tracker._scroll.set_device_classes(SOURCE, [FakeScrollClass(3, ScrollType.Vertical, 15.0)])
+    tracker._scroll_grabbed = True
+    return tracker
+
+
+def test_emulated_press_without_valuators():
+    """Test that emulated wheel presses scroll when the valuator motion wasn't received."""
+    # Raw motion mode doesn't select XI_Motion, so only the emulated press arrives.
+    tracker = make_tracker(raw_motion=True)
+    scroll_up = SignalReceiver(signals.SCROLL_UP)
+    try:
+        tracker.on_event(FakeButtonPress(4, PointerEventFlags.PointerEmulated))
+        assert scroll_up.received
+    finally:
+        smokesignal.clear_all()
+
+
+def test_emulated_press_after_valuators():
+    """Test that emulated wheel presses aren't counted again after the valuator motion."""
+    tracker = make_tracker(raw_motion=False)
+    scroll = SignalReceiver(signals.SCROLL)
+    scroll_up = SignalReceiver(signals.SCROLL_UP)
+    try:
+        tracker.on_event(FakeMotion(100.0))
+        tracker.on_event(FakeMotion(85.0))
+        tracker.on_event(FakeButtonPress(4, PointerEventFlags.PointerEmulated))
+        assert scroll.args == (1.0,)
+        assert not scroll_up.received
+    finally:
+        smokesignal.clear_all()
@@ -1,10 +1,14 @@
 """Abstract base mouse tracker unit tests."""
 
+import gc
+import sys
+import tracemalloc
+
 from nose import with_setup
 
 from volcorner import signals
 from volcorner.rect import Rect, Point
-from volcorner.tracker import MouseTracker
+from volcorner.tracker import ArrivalGate, MouseTracker
 from .util import SignalReceiver
 
 
@@ -102,3 +106,149 @@ def test_none_region():
     tracker.region = None
     tracker.last_point = Point(1, 1)
     assert not tracker.in_region
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def gated_tracker():
+    """Make a tracker with an ArrivalGate at 100 px/s and a fake clock."""
+    gated = MockTracker(Rect.make(0, 0, 10, 10))
+    clock = FakeClock()
+    gated._gate = ArrivalGate(100, clock=clock)
+    return gated, clock
+
+
+def test_gate_skips_unreachable_points():
+    """Test that points that can't have reached the region yet aren't tested."""
+    gated, clock = gated_tracker()
+    gated.last_point = Point(109, 9)  # 100 px away, can arrive in 1s
+    gated.last_point = Point(60, 9)
+    clock.now = 0.5
+    gated.last_point = Point(11, 9)
+    assert gated._gate.skipped == 2
+
+
+def test_gate_tests_after_deadline():
+    """Test that points are tested again once the pointer could have arrived."""
+    gated, clock = gated_tracker()
+    gated.last_point = Point(109, 9)
+    clock.now = 1.0
+    enter = SignalReceiver(signals.ENTER_REGION)
+    gated.last_point = Point(9, 9)
+    assert enter.received
+    assert gated._gate.skipped == 0
+
+
+def test_gate_detects_jumps():
+    """Test that a warp into the region is detected before the deadline."""
+    gated, clock = gated_tracker()
+    gated.last_point = Point(109, 9)
+    enter = SignalReceiver(signals.ENTER_REGION)
+    gated.last_point = Point(5, 5)
+    assert enter.received
+
+
+def test_gate_reset_on_region_change():
+    """Test that changing the region tests the next point."""
+    gated, clock = gated_tracker()
+    gated.last_point = Point(109, 9)
+    enter = SignalReceiver(signals.ENTER_REGION)
+    gated.region = Rect.make(100, 0, 20, 20)
+    assert enter.received
+
+
+def test_gate_detects_leaving():
+    """Test that leaving the region is never skipped."""
+    gated, clock = gated_tracker()
+    gated.last_point = Point(20, 5)
+    clock.now = 1.0
+    gated.last_point = Point(9, 5)
+    assert gated.in_region
+    leave = SignalReceiver(signals.LEAVE_REGION)
+    gated.last_point = Point(10, 5)
+    assert leave.received
+
+
+def multi_tracker():
+    """Make a tracker with two adjacent regions."""
+    multi = MockTracker()
+    multi.regions = {'left': Rect.make(0, 0, 10, 10), 'right': Rect.make(10, 0, 10, 10)}
+    return multi
+
+
+def test_enter_region_id():
+    """Test that the enter signal carries the region ID."""
+    multi = multi_tracker()
+    enter = SignalReceiver(signals.ENTER_REGION)
+    multi.last_point = Point(15, 5)
+    assert enter.args == ('right',)
+    assert multi.region_id == 'right'
+
+
+def test_move_between_regions():
+    """Test leaving one region and entering the next when moving between adjacent regions."""
+    multi = multi_tracker()
+    multi.last_point = Point(5, 5)
+    leave = SignalReceiver(signals.LEAVE_REGION)
+    enter = SignalReceiver(signals.ENTER_REGION)
+    multi.last_point = Point(10, 5)
+    assert leave.args == ('left',)
+    assert enter.args == ('right',)
+
+
+def test_remove_region():
+    """Test that removing the current region leaves it."""
+    multi = multi_tracker()
+    multi.last_point = Point(5, 5)
+    leave = SignalReceiver(signals.LEAVE_REGION)
+    multi.set_region('left', None)
+    assert leave.args == ('left',)
+    assert not multi.in_region
+
+
+def test_update_point():
+    """Test that the last point is built lazily from integer coordinates."""
+    fast = MockTracker(Rect.make(0, 0, 10, 10))
+    enter = SignalReceiver(signals.ENTER_REGION)
+    fast.update_point(5, 5)
+    assert enter.received
+    assert fast.last_point == Point(5, 5)
+
+
+def peak_allocated(func, coords):
+    """Get the peak memory allocated while calling func(x, y) for each coordinate, in bytes."""
+    # Garbage from other tests mustn't be freed while measuring.
+    gc.collect()
+    gc.disable()
+    tracemalloc.start()
+    try:
+        start = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        for x, y in coords:
+            func(x, y)
+        return tracemalloc.get_traced_memory()[1] - start
+    finally:
+        tracemalloc.stop()
+        gc.enable()
+
+
+def test_update_point_no_allocations():
+    """Test that motion events don't allocate memory in steady state."""
+    fast = MockTracker(Rect.make(0, 0, 10, 10))
+    coords = [(500 + i, 300 + i) for i in range(100)]
+
+    def no_op(x, y):
+        pass
+
+    # Warm up, then compare with a call that does nothing, to leave out the loop's own memory.
+    for func in (fast.update_point, no_op):
+        peak_allocated(func, coords)
+    allocated = peak_allocated(fast.update_point, coords) - peak_allocated(no_op, coords)
+    # Freed memory is reused, so any object built per event shows up at least once.
+    assert allocated < sys.getsizeof(Point(0, 0)), allocated
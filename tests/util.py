@@ -2,7 +2,7 @@
 from asyncio import Event
 
 import asyncio
-from functools import wraps
+from functools import partial, wraps
 import subprocess
 
 from nose import with_setup
@@ -15,6 +15,73 @@ from volcorner.x11.x11emptyui import X11EmptyUI
 _has_xte = None
 
 
+class FakeHandle:
+    """Timer handle from :class:`FakeLoop`."""
+    def __init__(self, callback, delay=0):
+        self.callback = callback
+        self.delay = delay
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class FakeLoop:
+    """Event loop that only records its readers, and only runs timers when told to.
+
+    With a clock, only the timers that are due by the clock's time are run.
+    """
+    def __init__(self, clock=None):
+        self.timers = []
+        self.readers = {}
+        self._clock = clock
+
+    def add_reader(self, fd, callback, *args):
+        self.readers[fd] = partial(callback, *args)
+
+    def remove_reader(self, fd):
+        del self.readers[fd]
+
+    def call_later(self, delay, callback, *args):
+        handle = FakeHandle(partial(callback, *args), delay)
+        handle.when = self._clock() + delay if self._clock else 0
+        self.timers.append(handle)
+        return handle
+
+    def run_timers(self):
+        now = self._clock() if self._clock else 0
+        due = [handle for handle in self.timers if handle.when <= now + 1e-9]
+        self.timers = [handle for handle in self.timers if handle not in due]
+        for handle in due:
+            if not handle.cancelled:
+                handle.callback()
+
+
+class FakeClock:
+    """Clock that only moves when its time is set."""
+    def __init__(self):
+        self.time = 0.0
+
+    def __call__(self):
+        return self.time
+
+
+class FakeMixer:
+    """Mixer that records the volumes written to it."""
+    def __init__(self, volume=0.5):
+        self._volume = volume
+        self.writes = []
+
+    @property
+    def volume(self):
+        return self._volume
+
+    @volume.setter
+    def volume(self, value):
+        self._volume = value
+        self.writes.append(value)
+
+
 class SignalReceiver:
     """Simple signal receiver that records if it was called once."""
     def __init__(self, signal):
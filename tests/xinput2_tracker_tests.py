@@ -42,6 +42,8 @@ def test_scroll_grab(ui):
     tracker.start()
     try:
         tracker.grab_scroll()
+        # The grab is only sent at the end of the event loop iteration.
+        ui.xcb_connection.batcher.flush()
 
         # Test the scroll up event.
         scroll_up = SignalReceiver(signals.SCROLL_UP)
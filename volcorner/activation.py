@@ -0,0 +1,133 @@
+"""Hot corner activation state machine."""
+
+import asyncio
+import logging
+
+__all__ = ['Activation']
+_log = logging.getLogger("activation")
+
+# Activation states
+INACTIVE = "inactive"
+ENTERING = "entering"
+ACTIVE = "active"
+LEAVING = "leaving"
+
+
+class Activation:
+    """Debounce entering and leaving the hot corner.
+
+    The corner only activates once the pointer has stayed inside for the dwell time, and only
+    deactivates once the pointer has stayed outside for the leave grace period.  Pointer jitter at
+    the edge of the corner within those times doesn't activate or deactivate anything, so the
+    scroll wheel isn't grabbed and ungrabbed, and the overlay animation isn't restarted.
+
+    With no dwell time or grace period, the corner activates and deactivates immediately.
+    """
+    def __init__(self, on_activate, on_deactivate, dwell=0.0, leave_grace=0.0, loop=None):
+        """
+        Initialize a new Activation.
+
+        :param on_activate: function to call when the corner activates
+        :param on_deactivate: function to call when the corner deactivates
+        :param float dwell: seconds the pointer must stay in the corner to activate it
+        :param float leave_grace: seconds the pointer must stay out of the corner to deactivate it
+        :param loop: asyncio event loop for the timers, or None for the current event loop
+        """
+        self._on_activate = on_activate
+        self._on_deactivate = on_deactivate
+        self.dwell = dwell
+        self.leave_grace = leave_grace
+        self._loop = loop
+        self._state = INACTIVE
+        self._timer = None
+        self.activations = 0
+        self.deactivations = 0
+        self.suppressed_enters = 0
+        self.suppressed_leaves = 0
+        self.redundant = 0
+
+    @property
+    def active(self):
+        """Check if the corner is active, including while waiting out the leave grace period."""
+        return self._state in (ACTIVE, LEAVING)
+
+    @property
+    def state(self):
+        """Get the activation state name."""
+        return self._state
+
+    def enter(self):
+        """Handle the pointer entering the corner."""
+        if self._state == INACTIVE:
+            if self.dwell > 0:
+                self._state = ENTERING
+                self._start_timer(self.dwell, self._on_dwell_finished)
+            else:
+                self._activate()
+        elif self._state == LEAVING:
+            _log.debug("Pointer came back during the leave grace period")
+            self._cancel_timer()
+            self._state = ACTIVE
+            self.suppressed_leaves += 1
+        else:
+            self.redundant += 1
+
+    def leave(self):
+        """Handle the pointer leaving the corner."""
+        if self._state == ACTIVE:
+            if self.leave_grace > 0:
+                self._state = LEAVING
+                self._start_timer(self.leave_grace, self._on_grace_finished)
+            else:
+                self._deactivate()
+        elif self._state == ENTERING:
+            _log.debug("Pointer left before the dwell time")
+            self._cancel_timer()
+            self._state = INACTIVE
+            self.suppressed_enters += 1
+        else:
+            self.redundant += 1
+
+    def cancel(self):
+        """Stop any pending timer, leaving the corner in its current state."""
+        self._cancel_timer()
+        if self._state == ENTERING:
+            self._state = INACTIVE
+        elif self._state == LEAVING:
+            self._state = ACTIVE
+
+    def log_stats(self):
+        """Log the transition counters."""
+        _log.debug("%d activations, %d deactivations, %d enters and %d leaves suppressed, "
+                   "%d redundant", self.activations, self.deactivations, self.suppressed_enters,
+                   self.suppressed_leaves, self.redundant)
+
+    def _on_dwell_finished(self):
+        self._timer = None
+        self._activate()
+
+    def _on_grace_finished(self):
+        self._timer = None
+        self._deactivate()
+
+    def _activate(self):
+        _log.debug("Activating")
+        self._state = ACTIVE
+        self.activations += 1
+        self._on_activate()
+
+    def _deactivate(self):
+        _log.debug("Deactivating")
+        self._state = INACTIVE
+        self.deactivations += 1
+        self._on_deactivate()
+
+    def _start_timer(self, delay, callback):
+        self._cancel_timer()
+        loop = self._loop or asyncio.get_event_loop()
+        self._timer = loop.call_later(delay, callback)
+
+    def _cancel_timer(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
@@ -2,27 +2,73 @@
 import asyncio
 
 import logging
-import math
 
 from volcorner.mixer import Mixer
 from . import mixercffi
+from .curves import CURVES, LinearCurve
+from .steps import StepTable
 
 __all__ = ['ALSAMixer']
 _log = logging.getLogger("audio")
 
-# ALSA Rounding direction parameter (0=exact)
-ROUND_DIR = 0
-
 
 class ALSAMixer(Mixer):
-    """ALSA mixer."""
-    def __init__(self, device="default", control="Master"):
+    """ALSA mixer.
+
+    The control's range is read once when the mixer is opened, and the current volume is kept in
+    memory.  It's only read from the control again when the mixer reports a change, so reading
+    the volume doesn't call into ALSA, and setting it costs a single write.
+
+    When the mixer is opened, every raw value of the control is converted to dB and normalized
+    with the volume curve, to build a table of the distinct steps the hardware can actually be
+    set to.  Setting the volume writes the nearest step, and skips the write if the hardware is
+    already there.
+
+    Only events on the tracked control are handled: a callback on its mixer element notes value
+    changes while the mixer handles its events, and the volume is only read after one.  Events
+    on the card's other controls, and on the control's other properties, are ignored.
+    """
+    def __init__(self, device="default", control="Master", curve="alsa", hw_mixer=None):
+        """
+        Initialize a new ALSAMixer.
+
+        :param str device: the ALSA mixer device name
+        :param str control: the mixer control name
+        :param str curve: the volume curve, from volcorner.alsa.curves.CURVES
+        :param mixercffi.Mixer hw_mixer: an open mixer for the device, shared with other
+                                         controls, or None to open one.  The owner of a shared
+                                         mixer polls it, and calls :meth:`handle_changes` after
+                                         handling its events.
+        """
         self._device_name = device
         self._control_name = control
+        self._curve_name = curve
+        self._hw_mixer = hw_mixer
         self._mixer = None
         self._control = None
-        self._supports_db = False
+        self._steps = None
+        self._raw = None
+        self._volume = 0.0
         self._listening_fds = []
+        self._value_changed = False
+        self.removed = False
+        self.writes = 0
+        self.skipped_writes = 0
+        self.control_events = 0
+        self.ignored_control_events = 0
+
+    def __repr__(self):
+        return '<ALSAMixer {} on {}>'.format(repr(self._control_name), repr(self._device_name))
+
+    @property
+    def device_name(self):
+        """Get the ALSA mixer device name."""
+        return self._device_name
+
+    @property
+    def control_name(self):
+        """Get the mixer control name."""
+        return self._control_name
 
     def open(self):
         if self._mixer is not None:
@@ -30,19 +76,35 @@ class ALSAMixer(Mixer):
             return
 
         # Open the mixer hardware.
-        self._mixer = mixercffi.Mixer(self._device_name)
+        if self._hw_mixer is not None:
+            self._mixer = self._hw_mixer
+        else:
+            self._mixer = mixercffi.Mixer(self._device_name)
         self._control = self._mixer.find_control(self._control_name)
+        if self._control is None:
+            self._close_mixer()
+            raise mixercffi.ALSAMixerError(message="No control {} on {}".format(
+                self._control_name, self._device_name))
 
         # Check if the hardware supports decibels.
+        db_range = None
         try:
             min, max = self._control.get_db_range()
-            self._supports_db = (min < max)
+            if min < max:
+                db_range = (min, max)
         except mixercffi.ALSAMixerError:
-            self._supports_db = False
-
-        # Listen for mixer updates.
+            pass
+        self._steps = self._build_steps(db_range)
+        self.on_steps_changed()
+        self._read_volume()
+        self._control.set_callback(self._on_control_event)
+
+        # Listen for mixer updates, unless the mixer is shared.
+        if self._hw_mixer is not None:
+            return
         for fd in self._mixer.get_poll_fds():
             asyncio.get_event_loop().add_reader(fd, self.on_mixer_ready)
+            self._listening_fds.append(fd)
 
     def close(self):
         if self._mixer is None:
@@ -51,84 +113,106 @@ class ALSAMixer(Mixer):
 
         for fd in self._listening_fds:
             asyncio.get_event_loop().remove_reader(fd)
+        self._listening_fds = []
+        if not self.removed:
+            self._control.set_callback(None)
+        self._control = None
+        self._close_mixer()
+        _log.debug("%d mixer writes, %d skipped", self.writes, self.skipped_writes)
+        _log.debug("%d control events, %d ignored; %d volume changes, %d dropped",
+                   self.control_events, self.ignored_control_events, self.volume_changes,
+                   self.dropped_volume_changes)
 
     @property
     def volume(self):
         assert self._control is not None
-        if self._supports_db:
-            min, max = self._control.get_db_range()
-            value = self._control.get_db()
-
-            if use_linear_db_scale(min, max):
-                return (value - min) / float(max - min)
-
-            normalized = exp10((value - max) / 6000.0)
-            if min != SND_CTL_TLV_DB_GAIN_MUTE:
-                min_norm = exp10((min - max) / 6000.0)
-                normalized = (normalized - min_norm) / (1 - min_norm)
-            return normalized
-        else:  # No dB support
-            min, max = self._control.get_raw_range()
-            if min == max:
-                raise mixercffi.ALSAMixerError(message="Unable to determine volume range")
-
-            value = self._control.get_raw_volume()
-            return (value - min) / float(max - min)
+        return self._volume
 
     @volume.setter
     def volume(self, value):
         assert self._control is not None
         assert 0.0 <= value <= 1.0
-        if self._supports_db:
-            min, max = self._control.get_db_range()
+        self._volume = value
+        raw = self._steps.raw(value)
+        if raw == self._raw:
+            self.skipped_writes += 1
+            return
+        _log.debug("Setting %d hw volume", raw)
+        self._control.set_raw_volume(raw)
+        self._raw = raw
+        self.writes += 1
+
+    def _close_mixer(self):
+        """Close the mixer hardware, unless it's shared."""
+        mixer, self._mixer = self._mixer, None
+        if (mixer is not None) and (self._hw_mixer is None):
+            mixer.close()
 
-            if use_linear_db_scale(min, max):
-                db = round_dir(value * (max - min), ROUND_DIR) + min
-                _log.debug("Setting %.02f dB", db / 100.0)
-                self._control.set_db(db)
-            else:
-                if min != SND_CTL_TLV_DB_GAIN_MUTE:
-                    min_norm = exp10((min - max) / 6000.0)
-                    value = value * (1 - min_norm) + min_norm
-                db = round_dir(6000.0 * math.log10(value), ROUND_DIR)
-                _log.debug("Setting %.02f dB", db / 100.0)
-                self._control.set_db(db)
-        else:  # No dB support
-            min, max = self._control.get_raw_range()
-            if min == max:
-                raise mixercffi.ALSAMixerError(message="Unable to determine volume range")
-            volume = int(value * (max - min) + min)
-            _log.debug("Setting %d hw volume", volume)
-            self._control.set_raw_volume(volume)
+    def next_step(self, volume, delta):
+        return self._steps.step(volume, delta)
+
+    @property
+    def steps(self):
+        return self._steps
+
+    def _build_steps(self, db_range):
+        """
+        Build the table of the control's distinct hardware steps.
+
+        :param db_range: the control's (min, max) dB × 100, or None if it doesn't support dB
+        """
+        raw_min, raw_max = self._control.get_raw_range()
+        if raw_min == raw_max:
+            raise mixercffi.ALSAMixerError(message="Unable to determine volume range")
+        raws = range(raw_min, raw_max + 1)
+        if (db_range is not None) and (self._curve_name != 'raw'):
+            db_curve = CURVES[self._curve_name](*db_range)
+            try:
+                ask_db = self._control.ask_db
+                steps = StepTable((raw, max(0.0, min(1.0, db_curve.to_normalized(ask_db(raw)))))
+                                  for raw in raws)
+                _log.debug("%d distinct volume steps in %d raw values", len(steps), len(raws))
+                return steps
+            except mixercffi.ALSAMixerError:
+                _log.warning("Unable to convert volumes to dB, using raw volume steps")
+        curve = LinearCurve(raw_min, raw_max)
+        return StepTable((raw, curve.to_normalized(raw)) for raw in raws)
+
+    def _read_volume(self):
+        """Read the volume from the control, as of the last mixer event."""
+        self._raw = self._control.get_raw_volume()
+        self._volume = self._steps.volume(self._raw)
 
     def on_mixer_ready(self):
         assert self._mixer is not None
-        _log.debug("Mixer is ready, handling events.")
         self._mixer.handle_events()
-        _log.debug("Finished handling mixer events.")
-        self.on_volume_changed(self.volume)
-
-
-#
-# Functions from volume_mapping.c in alsa-utils:
-#
-
-MAX_LINEAR_DB_SCALE = 24
-SND_CTL_TLV_DB_GAIN_MUTE = -9999999
-
-
-def use_linear_db_scale(min_db, max_db):
-    return max_db - min_db <= MAX_LINEAR_DB_SCALE * 100
-
-
-def exp10(x):
-    return math.exp(x * math.log(10))
-
+        if self.handle_changes():
+            self.on_volume_changed(self._volume)
+
+    def handle_changes(self):
+        """
+        Read the volume, if the control's value changed while its mixer handled events.
+
+        :return: True if the value changed
+        """
+        if (not self._value_changed) or self.removed:
+            return False
+        self._value_changed = False
+        self._read_volume()
+        return True
+
+    def _on_control_event(self, mask):
+        """Note a value change on the tracked control, called from handle_events()."""
+        self.control_events += 1
+        if mask == mixercffi.SND_CTL_EVENT_MASK_REMOVE:
+            # The element is freed after this, so it can't be touched again.
+            _log.info("Mixer control %s on %s was removed", self._control_name,
+                      self._device_name)
+            self.removed = True
+            self.ignored_control_events += 1
+            return
+        if not (mask & mixercffi.SND_CTL_EVENT_MASK_VALUE):
+            self.ignored_control_events += 1
+            return
+        self._value_changed = True
 
-def round_dir(x, dir):
-    if dir > 0:
-        return round(math.ceil(x))
-    elif dir < 0:
-        return round(math.floor(x))
-    else:
-        return round(x)
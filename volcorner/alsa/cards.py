@@ -0,0 +1,158 @@
+"""Sound card hotplug monitoring."""
+
+import asyncio
+from collections import namedtuple
+import logging
+import os
+import re
+import struct
+
+from cffi import FFI
+
+__all__ = [
+    'CardMonitor',
+    'ControlSpec',
+    'card_device',
+    'card_events',
+    'parse_control_specs',
+]
+_log = logging.getLogger("audio")
+
+CDEF = """
+int inotify_init1(int flags);
+int inotify_add_watch(int fd, const char *pathname, uint32_t mask);
+"""
+
+# Set up C bindings to libc
+ffi = FFI()
+ffi.cdef(CDEF)
+C = ffi.dlopen(None)
+
+# inotify flags, from inotify.h
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = os.O_CLOEXEC
+
+# Directory of ALSA device nodes; each card has a controlC<index> node
+SND_DEVICE_DIR = "/dev/snd"
+
+# Bytes to read from inotify at once, enough for dozens of events
+READ_SIZE = 4096
+
+_CONTROL_NODE = re.compile(r"^controlC(\d+)$")
+
+# struct inotify_event, without the name that follows it: wd, mask, cookie, len
+_EVENT_HEADER = struct.Struct("iIII")
+
+# A mixer control to open: a control name, and a device name, or None for every sound card
+ControlSpec = namedtuple('ControlSpec', 'control device')
+
+
+def parse_control_specs(text):
+    """
+    Parse a comma-separated list of mixer controls, each CONTROL or CONTROL@DEVICE.
+
+    :param str text: the list of controls
+    :return: list of :class:`ControlSpec`
+    """
+    specs = []
+    for item in text.split(','):
+        control, _, device = item.strip().partition('@')
+        if control:
+            specs.append(ControlSpec(control, device or None))
+    return specs
+
+
+def card_device(index):
+    """
+    Get the ALSA device name of a sound card.
+
+    :param int index: the card index
+    :return: the device name
+    """
+    return "hw:{}".format(index)
+
+
+def card_events(data):
+    """
+    Find the sound cards added and removed in a buffer of inotify events on the device directory.
+
+    :param bytes data: the inotify events
+    :return: list of (card index, True if it was added or False if it was removed) tuples
+    """
+    events = []
+    offset = 0
+    while offset + _EVENT_HEADER.size <= len(data):
+        wd, mask, cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+        offset += _EVENT_HEADER.size
+        name = data[offset:offset + length].rstrip(b'\0').decode('utf-8', 'replace')
+        offset += length
+        match = _CONTROL_NODE.match(name)
+        if match and (mask & (IN_CREATE | IN_DELETE)):
+            events.append((int(match.group(1)), bool(mask & IN_CREATE)))
+    return events
+
+
+class CardMonitor:
+    """Watch for sound cards being plugged in and unplugged.
+
+    Like `alsactl monitor`, this watches the ALSA device directory with inotify for cards'
+    control device nodes to appear and disappear.
+    """
+    def __init__(self, on_added, on_removed, path=SND_DEVICE_DIR, loop=None):
+        """
+        Initialize a new CardMonitor.
+
+        :param on_added: function to call with a card's index when it's plugged in
+        :param on_removed: function to call with a card's index when it's unplugged
+        :param str path: the ALSA device directory
+        :param loop: asyncio event loop to read events on, or None for the current event loop
+        """
+        self._on_added = on_added
+        self._on_removed = on_removed
+        self._path = path
+        self._loop = loop
+        self._fd = None
+
+    def open(self):
+        """
+        Start watching for cards.
+
+        :raises OSError: if inotify couldn't watch the device directory
+        """
+        if self._fd is not None:
+            _log.error("Tried to open already-open card monitor")
+            return
+
+        fd = C.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            raise OSError(ffi.errno, os.strerror(ffi.errno))
+        if C.inotify_add_watch(fd, self._path.encode('utf-8'), IN_CREATE | IN_DELETE) < 0:
+            errno = ffi.errno
+            os.close(fd)
+            raise OSError(errno, os.strerror(errno), self._path)
+        self._fd = fd
+        (self._loop or asyncio.get_event_loop()).add_reader(fd, self.on_ready)
+
+    def close(self):
+        """Stop watching for cards."""
+        if self._fd is None:
+            return
+        (self._loop or asyncio.get_event_loop()).remove_reader(self._fd)
+        os.close(self._fd)
+        self._fd = None
+
+    def on_ready(self):
+        """Read the pending inotify events."""
+        try:
+            data = os.read(self._fd, READ_SIZE)
+        except BlockingIOError:
+            return
+        for index, added in card_events(data):
+            if added:
+                _log.info("Sound card %d was plugged in", index)
+                self._on_added(index)
+            else:
+                _log.info("Sound card %d was unplugged", index)
+                self._on_removed(index)
@@ -0,0 +1,125 @@
+"""Volume curves, mapping a mixer control's values to normalized volumes."""
+
+import math
+
+__all__ = [
+    'AlsaCurve',
+    'CURVES',
+    'CubicCurve',
+    'Curve',
+    'LinearCurve',
+    'MAX_LINEAR_DB_SCALE',
+    'SND_CTL_TLV_DB_GAIN_MUTE',
+    'exp10',
+    'use_linear_db_scale',
+]
+
+#
+# Functions from volume_mapping.c in alsa-utils:
+#
+
+MAX_LINEAR_DB_SCALE = 24
+SND_CTL_TLV_DB_GAIN_MUTE = -9999999
+
+
+def use_linear_db_scale(min_db, max_db):
+    return max_db - min_db <= MAX_LINEAR_DB_SCALE * 100
+
+
+def exp10(x):
+    return math.exp(x * math.log(10))
+
+
+class Curve:
+    """Linear mapping between a control's values and normalized volumes.
+
+    Curves work on a control's values in dB × 100, except the raw curve, which works on its raw
+    values.
+    """
+    def __init__(self, min, max):
+        """
+        Initialize a new Curve.
+
+        :param int min: the control's minimum value
+        :param int max: the control's maximum value
+        """
+        self.min = min
+        self.max = max
+
+    def __repr__(self):
+        return '<{} {}..{}>'.format(type(self).__name__, self.min, self.max)
+
+    def to_normalized(self, value):
+        """
+        Convert a control value to a normalized volume.
+
+        :param value: the control value
+        :return: the normalized volume, between 0.0 and 1.0
+        """
+        return (value - self.min) / float(self.max - self.min)
+
+    def to_value(self, normalized):
+        """
+        Convert a normalized volume to a control value.
+
+        :param float normalized: the normalized volume between 0.0 and 1.0
+        :return: the control value, not rounded
+        """
+        return normalized * (self.max - self.min) + self.min
+
+
+class LinearCurve(Curve):
+    """Volume linear in dB (or raw values)."""
+
+
+class AlsaCurve(Curve):
+    """The alsa-utils curve, from volume_mapping.c.
+
+    Ranges up to 24 dB are linear in dB.  Larger ranges are logarithmic, with the bottom of the
+    range at 0.0, unless it mutes.
+    """
+    def __init__(self, min, max):
+        super().__init__(min, max)
+        self.linear = use_linear_db_scale(min, max)
+        self.min_norm = 0.0
+        if min != SND_CTL_TLV_DB_GAIN_MUTE:
+            self.min_norm = exp10((min - max) / 6000.0)
+
+    def to_normalized(self, value):
+        if self.linear:
+            return super().to_normalized(value)
+        normalized = 10.0 ** ((value - self.max) / 6000.0)
+        return (normalized - self.min_norm) / (1 - self.min_norm)
+
+    def to_value(self, normalized):
+        if self.linear:
+            return super().to_value(normalized)
+        normalized = normalized * (1 - self.min_norm) + self.min_norm
+        return 6000.0 * math.log10(normalized) + self.max
+
+
+class CubicCurve(Curve):
+    """The cube root of the amplitude, like PulseAudio's volume sliders."""
+    def __init__(self, min, max):
+        super().__init__(min, max)
+        self.min_norm = 0.0
+        if min != SND_CTL_TLV_DB_GAIN_MUTE:
+            self.min_norm = (10.0 ** ((min - max) / 2000.0)) ** (1 / 3)
+
+    def to_normalized(self, value):
+        normalized = (10.0 ** ((value - self.max) / 2000.0)) ** (1 / 3)
+        return (normalized - self.min_norm) / (1 - self.min_norm)
+
+    def to_value(self, normalized):
+        normalized = normalized * (1 - self.min_norm) + self.min_norm
+        return 2000.0 * math.log10(normalized ** 3) + self.max
+
+
+# Curves by name; the raw curve is linear in the control's raw values instead of dB
+CURVES = {
+    'alsa': AlsaCurve,
+    'linear': LinearCurve,
+    'cubic': CubicCurve,
+    'raw': LinearCurve,
+}
+
@@ -0,0 +1,293 @@
+"""Mixer controls on several sound cards."""
+
+import asyncio
+import logging
+
+from volcorner.mixer import Mixer
+from . import mixercffi
+from .alsamixer import ALSAMixer
+from .cards import CardMonitor, card_device
+
+__all__ = ['ALSAMixerManager']
+_log = logging.getLogger("audio")
+
+# Seconds to wait before retrying a card that was just plugged in, while udev sets up its
+# device permissions
+CARD_RETRY_DELAY = 0.5
+
+# Times to try opening a card that was just plugged in
+CARD_OPEN_ATTEMPTS = 5
+
+
+class ALSAMixerManager(Mixer):
+    """Mixer controls on several sound cards, with one of them active.
+
+    Each sound card is opened once, shared by all of its controls, and the poll fds of every card
+    are read by one set of event loop readers.  The volume, volume steps and CHANGE_VOLUME signals
+    all come from the active control; the others only keep their cached volume up to date, so
+    switching to one doesn't have to reopen or read anything.
+
+    Controls without a device are opened on every sound card, including cards plugged in later.
+    A card that's plugged in is opened by itself, and its control becomes active.  When a card is
+    unplugged, its controls are closed, and the most recently opened control left becomes active.
+    """
+    def __init__(self, specs, curve="alsa", hotplug=True, loop=None):
+        """
+        Initialize a new ALSAMixerManager.
+
+        :param specs: the controls to open, as :class:`volcorner.alsa.cards.ControlSpec`
+        :param str curve: the volume curve, from volcorner.alsa.curves.CURVES
+        :param bool hotplug: True to open and close cards as they're plugged in and unplugged
+        :param loop: asyncio event loop to read the mixers on, or None for the current event loop
+        """
+        self._specs = list(specs)
+        self._curve = curve
+        self._loop = loop
+        self._monitor = CardMonitor(self.on_card_added, self.on_card_removed, loop=loop) \
+            if hotplug else None
+        self._cards = {}
+        self._readers = {}
+        self._controls = []
+        self._active = None
+        self._retries = {}
+        self.card_opens = 0
+        self.card_closes = 0
+        self.switches = 0
+
+    @property
+    def controls(self):
+        """Get the open controls, as (device name, control name) tuples, oldest first."""
+        return [(control.device_name, control.control_name) for control in self._controls]
+
+    @property
+    def active(self):
+        """Get the active control, as a (device name, control name) tuple, or None."""
+        if self._active is None:
+            return None
+        return self._active.device_name, self._active.control_name
+
+    def select(self, device, control):
+        """
+        Make an open control the active one, without reopening anything.
+
+        :param str device: the ALSA mixer device name
+        :param str control: the mixer control name
+        :raises KeyError: if the control isn't open
+        """
+        for mixer in self._controls:
+            if (mixer.device_name, mixer.control_name) == (device, control):
+                self._activate(mixer)
+                return
+        raise KeyError((device, control))
+
+    def open(self):
+        self._open_named_devices()
+        try:
+            indexes = mixercffi.card_indexes()
+        except mixercffi.ALSAMixerError as e:
+            _log.warning("Unable to list sound cards (%s)", e.code)
+            indexes = []
+        for index in indexes:
+            self._try_open_device(card_device(index), self._card_specs(index))
+
+        if self._monitor is not None:
+            try:
+                self._monitor.open()
+            except OSError:
+                _log.warning("Unable to watch for sound cards", exc_info=True)
+                self._monitor = None
+        if self._active is None:
+            _log.warning("No mixer controls found; waiting for a sound card")
+
+    def close(self):
+        if self._monitor is not None:
+            self._monitor.close()
+        for handle in self._retries.values():
+            handle.cancel()
+        self._retries = {}
+        for device in list(self._cards):
+            self._close_device(device)
+        _log.debug("%d sound cards opened, %d closed, %d control switches", self.card_opens,
+                   self.card_closes, self.switches)
+
+    @property
+    def volume(self):
+        if self._active is None:
+            return 0.0
+        return self._active.volume
+
+    @volume.setter
+    def volume(self, value):
+        if self._active is None:
+            _log.debug("No mixer control to set the volume on")
+            return
+        self._active.volume = value
+
+    def next_step(self, volume, delta):
+        if self._active is None:
+            return super().next_step(volume, delta)
+        return self._active.next_step(volume, delta)
+
+    @property
+    def steps(self):
+        if self._active is None:
+            return None
+        return self._active.steps
+
+    def on_card_added(self, index, attempt=1):
+        """
+        Open a sound card that was just plugged in.
+
+        :param int index: the card index
+        :param int attempt: the number of times the card has been tried
+        """
+        self._retries.pop(index, None)
+        # A named device, like "default", may have been on a card that's back now.
+        self._open_named_devices()
+        try:
+            self._open_device(card_device(index), self._card_specs(index))
+        except mixercffi.ALSAMixerError as e:
+            # The device nodes may not be readable until udev has set their permissions.
+            if attempt >= CARD_OPEN_ATTEMPTS:
+                _log.warning("Unable to open sound card %d (%s)", index, e.code)
+                return
+            loop = self._loop or asyncio.get_event_loop()
+            self._retries[index] = loop.call_later(CARD_RETRY_DELAY, self.on_card_added, index,
+                                                   attempt + 1)
+
+    def on_card_removed(self, index):
+        """
+        Close a sound card that was just unplugged.
+
+        :param int index: the card index
+        """
+        handle = self._retries.pop(index, None)
+        if handle is not None:
+            handle.cancel()
+        device = card_device(index)
+        if device in self._cards:
+            self._close_device(device)
+
+    def _open_named_devices(self):
+        """Open the controls with a device name, on the devices that aren't open."""
+        for device in sorted({spec.device for spec in self._specs if spec.device is not None}):
+            if device not in self._cards:
+                self._try_open_device(device, [s for s in self._specs if s.device == device])
+
+    def _card_specs(self, index):
+        """Get the specs of the controls to open on a sound card."""
+        device = card_device(index)
+        return [spec for spec in self._specs if spec.device in (None, device)]
+
+    def _try_open_device(self, device, specs):
+        """Open controls on a device, logging instead of raising if it can't be opened."""
+        try:
+            self._open_device(device, specs)
+        except mixercffi.ALSAMixerError as e:
+            _log.warning("Unable to open mixer device %s (%s)", device, e.message or e.code)
+
+    def _open_device(self, device, specs):
+        """
+        Open controls on a device, and make the last one active.
+
+        :param str device: the ALSA mixer device name
+        :param specs: the controls to open on it
+        :raises mixercffi.ALSAMixerError: if the device couldn't be opened
+        """
+        if not specs:
+            return
+        hw_mixer = self._cards.get(device)
+        if hw_mixer is None:
+            hw_mixer = mixercffi.Mixer(device)
+
+        # Open the controls that aren't open yet.
+        opened = []
+        for spec in specs:
+            if (device, spec.control) in self.controls:
+                continue
+            control = ALSAMixer(device, spec.control, self._curve, hw_mixer=hw_mixer)
+            try:
+                control.open()
+            except mixercffi.ALSAMixerError as e:
+                _log.debug("Skipping mixer control %s on %s (%s)", spec.control, device,
+                           e.message or e.code)
+                continue
+            opened.append(control)
+        if device not in self._cards:
+            if not opened:
+                hw_mixer.close()
+                return
+            self._add_card(device, hw_mixer)
+
+        self._controls.extend(opened)
+        if opened:
+            self._activate(opened[-1])
+
+    def _add_card(self, device, hw_mixer):
+        """Start reading a newly opened card's poll fds."""
+        _log.info("Opened mixer device %s", device)
+        self._cards[device] = hw_mixer
+        self.card_opens += 1
+        loop = self._loop or asyncio.get_event_loop()
+        for fd in hw_mixer.get_poll_fds():
+            loop.add_reader(fd, self._on_card_ready, device)
+            self._readers[fd] = device
+
+    def _close_device(self, device):
+        """Close a device and its controls, choosing another active control if needed."""
+        _log.info("Closing mixer device %s", device)
+        loop = self._loop or asyncio.get_event_loop()
+        for fd in [fd for fd, reader in self._readers.items() if reader == device]:
+            loop.remove_reader(fd)
+            del self._readers[fd]
+
+        for control in [c for c in self._controls if c.device_name == device]:
+            control.close()
+            self._controls.remove(control)
+        try:
+            self._cards.pop(device).close()
+        except mixercffi.ALSAMixerError as e:
+            _log.debug("Error closing mixer device %s (%s)", device, e.code)
+        self.card_closes += 1
+
+        if (self._active is not None) and (self._active not in self._controls):
+            self._active = None
+            if self._controls:
+                self._activate(self._controls[-1])
+            else:
+                _log.warning("No mixer controls left; waiting for a sound card")
+                self.on_steps_changed()
+
+    def _activate(self, control):
+        """Make a control active, and show its volume."""
+        if control is self._active:
+            return
+        _log.info("Using mixer control %s on %s", control.control_name, control.device_name)
+        self._active = control
+        self.switches += 1
+        self.on_steps_changed()
+        # Always show the new control's volume, even if it's the same as the old one's.
+        self._emitted_volume = None
+        self.on_volume_changed(control.volume)
+
+    def _on_card_ready(self, device):
+        """Handle a card's mixer events, and read the changed volumes."""
+        hw_mixer = self._cards.get(device)
+        if hw_mixer is None:
+            return
+        try:
+            hw_mixer.handle_events()
+        except mixercffi.ALSAMixerError as e:
+            _log.warning("Error reading mixer device %s (%s)", device, e.code)
+            self._close_device(device)
+            return
+
+        removed = False
+        for control in self._controls:
+            if control.device_name != device:
+                continue
+            removed = removed or control.removed
+            if control.handle_changes() and (control is self._active):
+                self.on_volume_changed(control.volume)
+        if removed:
+            self._close_device(device)
@@ -2,10 +2,14 @@
 
 from cffi import FFI
 
+from .mixercffi_build import CDEF
+
 __all__ = [
+    "API_MODE",
     "ALSAMixerError",
     "Control",
     "Mixer",
+    "card_indexes",
     "SND_MIXER_SCHN_UNKNOWN",
     "SND_MIXER_SCHN_FRONT_LEFT",
     "SND_MIXER_SCHN_FRONT_RIGHT",
@@ -18,71 +22,23 @@ __all__ = [
     "SND_MIXER_SCHN_REAR_CENTER",
     "SND_MIXER_SCHN_LAST",
     "SND_MIXER_SCHN_MONO",
+    "SND_CTL_EVENT_MASK_VALUE",
+    "SND_CTL_EVENT_MASK_INFO",
+    "SND_CTL_EVENT_MASK_ADD",
+    "SND_CTL_EVENT_MASK_TLV",
+    "SND_CTL_EVENT_MASK_REMOVE",
 ]
 
-CDEF = """
-typedef ... snd_mixer_t;
-typedef ... snd_mixer_class_t;
-typedef ... snd_mixer_selem_id_t;
-typedef ... snd_mixer_elem_t;
-
-typedef enum _snd_mixer_selem_channel_id {
- SND_MIXER_SCHN_UNKNOWN = -1,
- SND_MIXER_SCHN_FRONT_LEFT = 0,
- SND_MIXER_SCHN_FRONT_RIGHT,
- SND_MIXER_SCHN_REAR_LEFT,
- SND_MIXER_SCHN_REAR_RIGHT,
- SND_MIXER_SCHN_FRONT_CENTER,
- SND_MIXER_SCHN_WOOFER,
- SND_MIXER_SCHN_SIDE_LEFT,
- SND_MIXER_SCHN_SIDE_RIGHT,
- SND_MIXER_SCHN_REAR_CENTER,
- SND_MIXER_SCHN_LAST = 31,
- SND_MIXER_SCHN_MONO = SND_MIXER_SCHN_FRONT_LEFT
-} snd_mixer_selem_channel_id_t;
-
-struct pollfd {
-    int   fd;         /* file descriptor */
-    short events;     /* requested events */
-    short revents;    /* returned events */
-};
-
-int snd_mixer_open(snd_mixer_t **mixer, int mode);
-int snd_mixer_attach(snd_mixer_t *mixer, const char *name);
-int snd_mixer_load(snd_mixer_t *mixer);
-int snd_mixer_poll_descriptors_count(snd_mixer_t *mixer);
-int snd_mixer_poll_descriptors(snd_mixer_t *mixer, struct pollfd *pfds, unsigned int space);
-int snd_mixer_poll_descriptors_revents(snd_mixer_t *mixer, struct pollfd *pfds, unsigned int nfds,
-                                       unsigned short *revents);
-
-int snd_mixer_selem_register(snd_mixer_t *mixer,
-        struct snd_mixer_selem_regopt *options,
-        snd_mixer_class_t **classp);
-int snd_mixer_selem_id_malloc(snd_mixer_selem_id_t **ptr);
-void snd_mixer_selem_id_free(snd_mixer_selem_id_t *obj);
-void snd_mixer_selem_id_set_name(snd_mixer_selem_id_t *obj, const char *val);
-snd_mixer_elem_t *snd_mixer_find_selem(snd_mixer_t *mixer,
-           const snd_mixer_selem_id_t *id);
-int snd_mixer_selem_set_playback_volume(snd_mixer_elem_t *elem,
-                                        snd_mixer_selem_channel_id_t
-                                        channel, long value);
-int snd_mixer_selem_set_playback_volume_all(snd_mixer_elem_t *elem, long value);
-int snd_mixer_selem_get_playback_volume(snd_mixer_elem_t *elem,
-                                        snd_mixer_selem_channel_id_t channel,
-                                        long *value);
-int snd_mixer_handle_events(snd_mixer_t *mixer);
-
-int snd_mixer_selem_get_playback_dB_range(snd_mixer_elem_t *, long *, long *);
-int snd_mixer_selem_get_playback_volume_range(snd_mixer_elem_t *, long *, long *);
-int snd_mixer_selem_get_playback_dB(snd_mixer_elem_t *, snd_mixer_selem_channel_id_t, long *);
-int snd_mixer_selem_set_playback_dB(snd_mixer_elem_t *, snd_mixer_selem_channel_id_t, long, int);
-int snd_mixer_selem_set_playback_dB_all(snd_mixer_elem_t *, long, int);
-"""
-
-# Set up C bindings
-ffi = FFI()
-ffi.cdef(CDEF)
-C = ffi.dlopen("libasound.so.2")
+
+# Set up C bindings, with the compiled API mode module if it was built, or in ABI mode.
+try:
+    from ._mixercffi import ffi, lib as C
+    API_MODE = True
+except ImportError:
+    ffi = FFI()
+    ffi.cdef(CDEF)
+    C = ffi.dlopen("libasound.so.2")
+    API_MODE = False
 
 # Python version of constants
 SND_MIXER_SCHN_UNKNOWN = C.SND_MIXER_SCHN_UNKNOWN
@@ -98,6 +54,13 @@ SND_MIXER_SCHN_REAR_CENTER = C.SND_MIXER_SCHN_REAR_CENTER
 SND_MIXER_SCHN_LAST = C.SND_MIXER_SCHN_LAST
 SND_MIXER_SCHN_MONO = C.SND_MIXER_SCHN_MONO
 
+# Element callback event masks, from control.h
+SND_CTL_EVENT_MASK_VALUE = 1 << 0
+SND_CTL_EVENT_MASK_INFO = 1 << 1
+SND_CTL_EVENT_MASK_ADD = 1 << 2
+SND_CTL_EVENT_MASK_TLV = 1 << 3
+SND_CTL_EVENT_MASK_REMOVE = 0xffffffff
+
 
 class Mixer:
     """ALSA mixer."""
@@ -122,6 +85,12 @@ class Mixer:
     def __repr__(self):
         return '<Mixer {}>'.format(repr(self.name))
 
+    def close(self):
+        """Close the mixer.  Its controls can't be used after this."""
+        if self.mixer is not None:
+            mixer, self.mixer = self.mixer, None
+            _chk(C.snd_mixer_close(mixer))
+
     def find_control(self, name):
         """
         Find a mixer control.
@@ -181,7 +150,11 @@ class Mixer:
 
 
 class Control:
-    """ALSA Mixer Control."""
+    """ALSA Mixer Control.
+
+    The getters share preallocated out-parameters instead of allocating them for every call, so
+    calls on one Control mustn't overlap across threads.
+    """
     def __init__(self, elem, name):
         """Initialize an ALSA mixer control.
         
@@ -191,20 +164,43 @@ class Control:
         """
         self.elem = elem
         self.name = name
+        self._callback = None
+        self._out = ffi.new("long[2]")
 
     def __repr__(self):
         return "<Control {}>".format(repr(self.name))
 
+    def set_callback(self, func):
+        """
+        Set a function to call when this control has an event.
+
+        The function is called from :meth:`Mixer.handle_events` with the event mask, made of the
+        SND_CTL_EVENT_MASK_* flags.
+
+        :param func: function taking the event mask, or None to remove the callback
+        """
+        if func is None:
+            C.snd_mixer_elem_set_callback(self.elem, ffi.NULL)
+            self._callback = None
+            return
+
+        def callback(elem, mask):
+            func(mask)
+            return 0
+
+        # Keep a reference, or the callback is freed while ALSA still points at it.
+        self._callback = ffi.callback("snd_mixer_elem_callback_t", callback)
+        C.snd_mixer_elem_set_callback(self.elem, self._callback)
+
     def get_raw_range(self):
         """
         Get the range of this control.
 
         :return: (min, max) tuple
         """
-        min_ptr = ffi.new("long *")
-        max_ptr = ffi.new("long *")
-        _chk(C.snd_mixer_selem_get_playback_volume_range(self.elem, min_ptr, max_ptr))
-        return min_ptr[0], max_ptr[0]
+        out = self._out
+        _chk(C.snd_mixer_selem_get_playback_volume_range(self.elem, out, out + 1))
+        return out[0], out[1]
 
     def get_raw_volume(self, channel=0):
         """
@@ -213,9 +209,8 @@ class Control:
         :param int channel: The channel number
         :return: The volume
         """
-        volume_ptr = ffi.new("long *")
-        _chk(C.snd_mixer_selem_get_playback_volume(self.elem, channel, volume_ptr))
-        return volume_ptr[0]
+        _chk(C.snd_mixer_selem_get_playback_volume(self.elem, channel, self._out))
+        return self._out[0]
 
     def set_raw_volume(self, volume, channel=None):
         """
@@ -236,10 +231,9 @@ class Control:
 
         :return: (min, max) tuple
         """
-        min_ptr = ffi.new("long *")
-        max_ptr = ffi.new("long *")
-        _chk(C.snd_mixer_selem_get_playback_dB_range(self.elem, min_ptr, max_ptr))
-        return min_ptr[0], max_ptr[0]
+        out = self._out
+        _chk(C.snd_mixer_selem_get_playback_dB_range(self.elem, out, out + 1))
+        return out[0], out[1]
 
     def get_db(self, channel=0):
         """
@@ -248,9 +242,18 @@ class Control:
         :param int channel: The channel number
         :return: The volume
         """
-        volume_ptr = ffi.new("long *")
-        _chk(C.snd_mixer_selem_get_playback_dB(self.elem, channel, volume_ptr))
-        return volume_ptr[0]
+        _chk(C.snd_mixer_selem_get_playback_dB(self.elem, channel, self._out))
+        return self._out[0]
+
+    def ask_db(self, volume):
+        """
+        Convert a raw volume of this control to decibels × 100.
+
+        :param volume: The raw volume
+        :return: The volume in decibels × 100
+        """
+        _chk(C.snd_mixer_selem_ask_playback_vol_dB(self.elem, volume, self._out))
+        return self._out[0]
 
     def set_db(self, volume, channel=None, dir=0):
         """
@@ -267,6 +270,21 @@ class Control:
             _chk(C.snd_mixer_selem_set_playback_dB(self.elem, channel, volume, dir))
 
 
+def card_indexes():
+    """
+    Get the indexes of the sound cards present.
+
+    :return: list of card indexes, for "hw:N" device names
+    """
+    card_ptr = ffi.new("int *", -1)
+    cards = []
+    while True:
+        _chk(C.snd_card_next(card_ptr))
+        if card_ptr[0] < 0:
+            return cards
+        cards.append(card_ptr[0])
+
+
 class ALSAMixerError(Exception):
     """ALSA mixer error."""
     def __init__(self, message=None, code=None):
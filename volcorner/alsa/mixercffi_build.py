@@ -0,0 +1,87 @@
+"""Out-of-line API mode build of the ALSA mixer CFFI binding.
+
+API mode calls libasound through compiled C, with less overhead per call than loading it at
+runtime in ABI mode, but it needs a C compiler and the ALSA headers.  If the compiled module
+isn't there, mixercffi falls back to ABI mode.
+
+Build it in place from the top level directory with: python volcorner/alsa/mixercffi_build.py
+Or install with it by setting VOLCORNER_CFFI_API=1.
+"""
+
+from cffi import FFI
+
+__all__ = ['CDEF', 'ffibuilder']
+
+CDEF = """
+typedef ... snd_mixer_t;
+typedef ... snd_mixer_class_t;
+typedef ... snd_mixer_selem_id_t;
+typedef ... snd_mixer_elem_t;
+
+typedef enum _snd_mixer_selem_channel_id {
+ SND_MIXER_SCHN_UNKNOWN = -1,
+ SND_MIXER_SCHN_FRONT_LEFT = 0,
+ SND_MIXER_SCHN_FRONT_RIGHT,
+ SND_MIXER_SCHN_REAR_LEFT,
+ SND_MIXER_SCHN_REAR_RIGHT,
+ SND_MIXER_SCHN_FRONT_CENTER,
+ SND_MIXER_SCHN_WOOFER,
+ SND_MIXER_SCHN_SIDE_LEFT,
+ SND_MIXER_SCHN_SIDE_RIGHT,
+ SND_MIXER_SCHN_REAR_CENTER,
+ SND_MIXER_SCHN_LAST = 31,
+ SND_MIXER_SCHN_MONO = SND_MIXER_SCHN_FRONT_LEFT
+} snd_mixer_selem_channel_id_t;
+
+typedef int (*snd_mixer_elem_callback_t)(snd_mixer_elem_t *elem, unsigned int mask);
+
+struct pollfd {
+    int   fd;         /* file descriptor */
+    short events;     /* requested events */
+    short revents;    /* returned events */
+};
+
+int snd_card_next(int *card);
+
+int snd_mixer_open(snd_mixer_t **mixer, int mode);
+int snd_mixer_close(snd_mixer_t *mixer);
+int snd_mixer_attach(snd_mixer_t *mixer, const char *name);
+int snd_mixer_load(snd_mixer_t *mixer);
+int snd_mixer_poll_descriptors_count(snd_mixer_t *mixer);
+int snd_mixer_poll_descriptors(snd_mixer_t *mixer, struct pollfd *pfds, unsigned int space);
+int snd_mixer_poll_descriptors_revents(snd_mixer_t *mixer, struct pollfd *pfds, unsigned int nfds,
+                                       unsigned short *revents);
+
+int snd_mixer_selem_register(snd_mixer_t *mixer,
+        struct snd_mixer_selem_regopt *options,
+        snd_mixer_class_t **classp);
+int snd_mixer_selem_id_malloc(snd_mixer_selem_id_t **ptr);
+void snd_mixer_selem_id_free(snd_mixer_selem_id_t *obj);
+void snd_mixer_selem_id_set_name(snd_mixer_selem_id_t *obj, const char *val);
+snd_mixer_elem_t *snd_mixer_find_selem(snd_mixer_t *mixer,
+           const snd_mixer_selem_id_t *id);
+int snd_mixer_selem_set_playback_volume(snd_mixer_elem_t *elem,
+                                        snd_mixer_selem_channel_id_t
+                                        channel, long value);
+int snd_mixer_selem_set_playback_volume_all(snd_mixer_elem_t *elem, long value);
+int snd_mixer_selem_get_playback_volume(snd_mixer_elem_t *elem,
+                                        snd_mixer_selem_channel_id_t channel,
+                                        long *value);
+int snd_mixer_handle_events(snd_mixer_t *mixer);
+void snd_mixer_elem_set_callback(snd_mixer_elem_t *obj, snd_mixer_elem_callback_t val);
+
+int snd_mixer_selem_get_playback_dB_range(snd_mixer_elem_t *, long *, long *);
+int snd_mixer_selem_get_playback_volume_range(snd_mixer_elem_t *, long *, long *);
+int snd_mixer_selem_get_playback_dB(snd_mixer_elem_t *, snd_mixer_selem_channel_id_t, long *);
+int snd_mixer_selem_set_playback_dB(snd_mixer_elem_t *, snd_mixer_selem_channel_id_t, long, int);
+int snd_mixer_selem_set_playback_dB_all(snd_mixer_elem_t *, long, int);
+int snd_mixer_selem_ask_playback_vol_dB(snd_mixer_elem_t *elem, long value, long *dBvalue);
+"""
+
+ffibuilder = FFI()
+ffibuilder.cdef(CDEF)
+ffibuilder.set_source("volcorner.alsa._mixercffi", "#include <alsa/asoundlib.h>",
+                      libraries=["asound"])
+
+if __name__ == '__main__':
+    ffibuilder.compile(verbose=True)
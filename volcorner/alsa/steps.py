@@ -0,0 +1,81 @@
+"""Table of a mixer control's hardware volume steps."""
+
+from bisect import bisect_left, bisect_right
+
+__all__ = ['StepTable']
+
+
+class StepTable:
+    """The distinct volume steps a mixer control's hardware can actually be set to.
+
+    Neighbouring raw values often map to the same dB value, and so the same normalized volume.
+    Only the lowest raw value of each run is kept, so every step in the table sounds different.
+    """
+    def __init__(self, steps):
+        """
+        Initialize a new StepTable.
+
+        :param steps: (raw value, normalized volume) pairs, in raw value order
+        """
+        self._raws = []
+        self._volumes = []
+        for raw, volume in steps:
+            if self._volumes and volume <= self._volumes[-1]:
+                continue
+            self._raws.append(raw)
+            self._volumes.append(volume)
+        if not self._raws:
+            raise ValueError("No volume steps")
+
+    def __len__(self):
+        return len(self._raws)
+
+    def volume(self, raw):
+        """
+        Get the normalized volume of a raw value.
+
+        :param int raw: the raw hardware value
+        :return: the normalized volume of the step the raw value is in
+        """
+        return self._volumes[max(0, bisect_right(self._raws, raw) - 1)]
+
+    def index(self, volume):
+        """
+        Find the step nearest to a normalized volume.
+
+        :param float volume: the normalized volume
+        :return: the step index
+        """
+        volumes = self._volumes
+        i = bisect_left(volumes, volume)
+        if i == len(volumes):
+            return i - 1
+        if (i > 0) and (volume - volumes[i - 1] < volumes[i] - volume):
+            return i - 1
+        return i
+
+    def raw(self, volume):
+        """
+        Get the raw value of the step nearest to a normalized volume.
+
+        :param float volume: the normalized volume
+        :return: the raw hardware value
+        """
+        return self._raws[self.index(volume)]
+
+    def step(self, volume, delta):
+        """
+        Change a normalized volume, moving at least to the next step in that direction.
+
+        :param float volume: the current normalized volume
+        :param float delta: the amount to change the volume by
+        :return: the new normalized volume, between 0.0 and 1.0
+        """
+        target = max(0.0, min(1.0, volume + delta))
+        current = self.index(volume)
+        if (delta == 0) or (self.index(target) != current):
+            return target
+        # The change would round to the same step, so skip to the next one.
+        nearest = current + (1 if delta > 0 else -1)
+        nearest = max(0, min(len(self._volumes) - 1, nearest))
+        return self._volumes[nearest]
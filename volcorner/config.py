@@ -19,9 +19,22 @@ __all__ = [
     'SECTION_DEFAULTS',
     'DEFAULTS',
     'KEY_ACTIVATE_SIZE',
+    'KEY_BARRIER_PRESSURE',
     'KEY_DEACTIVATE_SIZE',
     'KEY_CORNER',
+    'KEY_DWELL_TIME',
+    'KEY_LEAVE_GRACE',
+    'KEY_MAX_POINTER_SPEED',
+    'KEY_MIXER_CONTROLS',
+    'KEY_MIXER_IO',
+    'KEY_MONITOR',
+    'KEY_RAMP_TIME',
+    'KEY_TRACKING',
     'KEY_VERBOSE',
+    'KEY_VOLUME_CURVE',
+    'MIXER_IO_MODES',
+    'TRACKING_MODES',
+    'VOLUME_CURVES',
 
     # Functions
     'get_config',
@@ -43,16 +56,47 @@ SECTION_DEFAULTS = 'Defaults'
 
 # Config file keys
 KEY_ACTIVATE_SIZE = "activate_size"
+KEY_BARRIER_PRESSURE = "barrier_pressure"
 KEY_DEACTIVATE_SIZE = "deactivate_size"
 KEY_CORNER = "corner"
+KEY_DWELL_TIME = "dwell_time"
+KEY_LEAVE_GRACE = "leave_grace"
+KEY_MAX_POINTER_SPEED = "max_pointer_speed"
+KEY_MIXER_CONTROLS = "mixer_controls"
+KEY_MIXER_IO = "mixer_io"
+KEY_MONITOR = "monitor"
+KEY_RAMP_TIME = "ramp_time"
+KEY_TRACKING = "tracking"
 KEY_VERBOSE = "verbose"
-ALL_KEYS = (KEY_ACTIVATE_SIZE, KEY_DEACTIVATE_SIZE, KEY_CORNER, KEY_VERBOSE)
+KEY_VOLUME_CURVE = "volume_curve"
+ALL_KEYS = (KEY_ACTIVATE_SIZE, KEY_DEACTIVATE_SIZE, KEY_CORNER, KEY_MONITOR, KEY_DWELL_TIME,
+            KEY_LEAVE_GRACE, KEY_RAMP_TIME, KEY_VOLUME_CURVE, KEY_MIXER_CONTROLS, KEY_MIXER_IO,
+            KEY_TRACKING, KEY_BARRIER_PRESSURE, KEY_MAX_POINTER_SPEED, KEY_VERBOSE)
+
+# Mouse tracking modes
+TRACKING_MODES = ('motion', 'raw-motion', 'sentinel', 'barrier')
+
+# Volume curves, matching volcorner.alsa.curves.CURVES
+VOLUME_CURVES = ('alsa', 'linear', 'cubic', 'raw')
+
+# Where mixer calls run: on the event loop, or on a worker thread
+MIXER_IO_MODES = ('loop', 'thread')
 
 # Default configuration (non-platform specific)
 DEFAULTS = {
     KEY_CORNER: 'top-left',
+    KEY_MONITOR: 'primary',
     KEY_ACTIVATE_SIZE: 1,
     KEY_DEACTIVATE_SIZE: 100,
+    KEY_DWELL_TIME: 0,
+    KEY_LEAVE_GRACE: 0,
+    KEY_RAMP_TIME: 100,
+    KEY_VOLUME_CURVE: 'alsa',
+    KEY_MIXER_CONTROLS: 'Master@default',
+    KEY_MIXER_IO: 'loop',
+    KEY_TRACKING: 'motion',
+    KEY_BARRIER_PRESSURE: 0,
+    KEY_MAX_POINTER_SPEED: 0,
     KEY_VERBOSE: 0,
 }
 
@@ -94,6 +138,35 @@ def get_config(argv=sys.argv[1:], app_dirs=APP_DIRS, defaults=DEFAULTS):
                         help="hot corner deactivation size, in pixels")
     parser.add_argument('-x', flag(KEY_CORNER), choices=[c.id for c in Corner],
                         help="corner to use")
+    parser.add_argument('-o', flag(KEY_MONITOR), metavar='NAME',
+                        help="monitor to use the corner of: 'primary', or an output name like "
+                             "DP-1")
+    parser.add_argument('-w', flag(KEY_DWELL_TIME), type=int, metavar='MS',
+                        help="time the pointer must stay in the corner to activate it, in "
+                             "milliseconds")
+    parser.add_argument('-g', flag(KEY_LEAVE_GRACE), type=int, metavar='MS',
+                        help="time the pointer must stay out of the corner to deactivate it, in "
+                             "milliseconds")
+    parser.add_argument('-r', flag(KEY_RAMP_TIME), type=int, metavar='MS',
+                        help="time to ramp the volume to each new level, in milliseconds (0 to "
+                             "jump straight to it)")
+    parser.add_argument('-u', flag(KEY_VOLUME_CURVE), choices=VOLUME_CURVES,
+                        help="volume curve: alsa-utils' curve, linear dB, cubic, or linear raw "
+                             "hardware values")
+    parser.add_argument('-k', flag(KEY_MIXER_CONTROLS), metavar='CONTROLS',
+                        help="comma-separated mixer controls, each CONTROL@DEVICE, or CONTROL to "
+                             "use it on every sound card as it's plugged in")
+    parser.add_argument('-i', flag(KEY_MIXER_IO), choices=MIXER_IO_MODES,
+                        help="run mixer calls on the event loop, or on a worker thread for slow "
+                             "sound devices")
+    parser.add_argument('-t', flag(KEY_TRACKING), choices=TRACKING_MODES,
+                        help="mouse tracking mode")
+    parser.add_argument('-p', flag(KEY_BARRIER_PRESSURE), type=float, metavar='N',
+                        help="pixels to push against the corner before activating, in barrier "
+                             "tracking mode")
+    parser.add_argument('-m', flag(KEY_MAX_POINTER_SPEED), type=float, metavar='N',
+                        help="maximum pointer speed in pixels per second, to skip testing points "
+                             "that can't have reached the corner yet (default: disabled)")
     parser.add_argument('-v', dest=KEY_VERBOSE, action='count',
                         help="increase verbosity (up to -vvv)")
     parser.add_argument('-s', '--save', action='store_true',
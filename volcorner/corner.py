@@ -1,9 +1,16 @@
 """Screen corners."""
 
+from collections import namedtuple
 from enum import Enum
+from functools import lru_cache
 
 from volcorner.rect import Rect
 
+__all__ = ['Corner', 'CornerGeometry', 'corner_geometry']
+
+# The regions derived from a corner of a monitor
+CornerGeometry = namedtuple('CornerGeometry', 'activate deactivate overlay')
+
 
 class Corner(Enum):
     """A corner of the screen."""
@@ -19,17 +26,19 @@ class Corner(Enum):
         self.y_root = y_root
         self.y_direction = y_direction
 
-    def rect(self, screen_size, corner_size):
+    def rect(self, screen_size, corner_size, origin=None):
         """
         Calculate a Rect for this Corner.
 
-        :param Size screen_size: the screen size
+        :param Size screen_size: the screen (or monitor) size
         :param Size corner_size: the size of the Rect to return
+        :param Point origin: the screen (or monitor) position in the root window, or None for 0, 0
         :return: the rect for this Corner
         """
+        x, y = origin or (0, 0)
         # Find the corners by starting at the root, and adding size*direction.
         # Use the screen size + 1 to offset subtracting 1 when using the bottom/right of the screen.
-        screen = Rect.make(0, 0, screen_size.width + 1, screen_size.height + 1)
+        screen = Rect.make(x, y, screen_size.width + 1, screen_size.height + 1)
         x1 = getattr(screen, self.x_root)
         x2 = x1 + corner_size.width * self.x_direction
         y1 = getattr(screen, self.y_root)
@@ -46,3 +55,22 @@ class Corner(Enum):
             return match[0]
         else:
             raise ValueError("Unknown Corner id {}".format(ident))
+
+
+@lru_cache(maxsize=16)
+def corner_geometry(corner, monitor, activate_size, deactivate_size, overlay_size):
+    """
+    Calculate the activate, deactivate and overlay Rects for a corner of a monitor.
+
+    The results are cached, since they only change when the monitor layout does.
+
+    :param Corner corner: the corner
+    :param Rect monitor: the monitor (or screen) Rect
+    :param Size activate_size: the activation region size
+    :param Size deactivate_size: the deactivation region size
+    :param Size overlay_size: the UI overlay size
+    :rtype: CornerGeometry
+    """
+    return CornerGeometry(corner.rect(monitor.size, activate_size, monitor.origin),
+                          corner.rect(monitor.size, deactivate_size, monitor.origin),
+                          corner.rect(monitor.size, overlay_size, monitor.origin))
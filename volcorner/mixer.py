@@ -9,6 +9,19 @@ __all__ = ['Mixer']
 
 
 class Mixer(metaclass=ABCMeta):
+    # The volume last sent with CHANGE_VOLUME
+    _emitted_volume = None
+
+    # Function to call with volume changes instead of sending CHANGE_VOLUME, or None
+    volume_listener = None
+
+    # Function to call with the new step table when it changes, or None
+    steps_listener = None
+
+    # Volume changes reported by subclasses, and the ones dropped because the volume was the same
+    volume_changes = 0
+    dropped_volume_changes = 0
+
     @abstractmethod
     def open(self):
         """Open the mixer and start monitoring for volume changes."""
@@ -36,10 +49,47 @@ class Mixer(metaclass=ABCMeta):
         :param float value: the new volume, between 0.0 and 1.0
         """
 
+    def next_step(self, volume, delta):
+        """
+        Change a volume by a step.
+
+        Subclasses with coarse hardware steps should move at least one hardware step, so the step
+        isn't lost to rounding.
+
+        :param float volume: the current volume, between 0.0 and 1.0
+        :param float delta: the amount to change the volume by
+        :return: the new volume, between 0.0 and 1.0
+        """
+        return max(0.0, min(1.0, volume + delta))
+
+    @property
+    def steps(self):
+        """
+        Get the table of hardware steps that :meth:`next_step` moves between.
+
+        :return: a :class:`volcorner.alsa.steps.StepTable`, or None for continuous volumes
+        """
+        return None
+
+    def on_steps_changed(self):
+        """Subclasses should call this when :attr:`steps` has changed."""
+        if self.steps_listener is not None:
+            self.steps_listener(self.steps)
+
     def on_volume_changed(self, value):
         """
         Subclasses should call this when the volume is changed outside of this app.
 
+        The change is dropped if the volume is the same as the last one sent.
+
         :param float value: the new volume, between 0.0 and 1.0
         """
-        smokesignal.emit(signals.CHANGE_VOLUME, value)
+        self.volume_changes += 1
+        if value == self._emitted_volume:
+            self.dropped_volume_changes += 1
+            return
+        self._emitted_volume = value
+        if self.volume_listener is not None:
+            self.volume_listener(value)
+        else:
+            smokesignal.emit(signals.CHANGE_VOLUME, value)
@@ -0,0 +1,338 @@
+"""Mixer I/O on a worker thread."""
+
+import asyncio
+from concurrent import futures
+import logging
+import queue
+import threading
+import time
+
+import smokesignal
+
+from volcorner import signals
+from volcorner.mixer import Mixer
+
+__all__ = ['ThreadedMixer']
+_log = logging.getLogger("audio")
+
+# Maximum commands waiting for the mixer thread
+COMMAND_QUEUE_SIZE = 32
+
+# Seconds to wait for the mixer thread to open the mixer
+OPEN_TIMEOUT = 5.0
+
+# Seconds to wait for the mixer thread to close the mixer, and to finish
+CLOSE_TIMEOUT = 1.0
+
+
+class ThreadedMixer(Mixer):
+    """Run a mixer on a worker thread, so the event loop never waits on the audio hardware.
+
+    Every call into the mixer is a command on a bounded queue, run in order by one worker thread.
+    The volume is kept in memory on the event loop's side: setting it only queues a write, and a
+    write that's still queued is updated in place, so a burst of changes can't fill the queue.
+
+    The mixer's poll fds are still watched by the event loop, but its events are handled on the
+    worker thread, and its volume changes come back to the event loop with
+    call_soon_threadsafe().  So does its step table whenever it changes, so volume steps are
+    found on the event loop without touching the mixer.  Only opening and closing the mixer wait for the worker, and only up
+    to a timeout.
+
+    If the hardware stalls and the queue fills up, commands that can't be queued are retried once
+    the worker has drained the queue, and readers stay paused until then.
+    """
+    def __init__(self, create_mixer, queue_size=COMMAND_QUEUE_SIZE, loop=None,
+                 clock=time.monotonic, close_timeout=CLOSE_TIMEOUT):
+        """
+        Initialize a new ThreadedMixer.
+
+        :param create_mixer: function taking an event loop and returning the mixer to run on the
+                             worker thread; the mixer must use that loop for its readers and timers
+        :param int queue_size: maximum commands waiting for the worker thread
+        :param loop: asyncio event loop, or None for the current event loop
+        :param clock: function returning the current time in seconds
+        :param float close_timeout: seconds to wait for the worker thread when closing
+        """
+        self._create_mixer = create_mixer
+        self._queue = queue.Queue(queue_size)
+        self._loop = loop
+        self._clock = clock
+        self.close_timeout = close_timeout
+        self._main_loop = None
+        self._mixer = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._pending_volume = None
+        self._volume = 0.0
+        self._steps = None
+        self._stalled = threading.Event()
+        self._retries = []
+        self.commands = 0
+        self.dropped_commands = 0
+        self.max_depth = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.total_run = 0.0
+        self.max_run = 0.0
+
+    def open(self):
+        if self._thread is not None:
+            _log.error("Tried to open already-open mixer")
+            return
+
+        self._main_loop = self._loop or asyncio.get_event_loop()
+        self._mixer = self._create_mixer(_WorkerLoop(self))
+        self._mixer.volume_listener = self._on_mixer_volume_changed
+        self._mixer.steps_listener = self._on_mixer_steps_changed
+        self._thread = threading.Thread(target=self._run, name="mixer", daemon=True)
+        self._thread.start()
+        try:
+            self._volume, self._steps = self._call(self._open_mixer, timeout=OPEN_TIMEOUT)
+        except futures.TimeoutError:
+            _log.error("Mixer thread didn't open the mixer within %.1f s", OPEN_TIMEOUT)
+            raise
+
+    def close(self):
+        if self._thread is None:
+            _log.error("Tried to close already-closed mixer")
+            return
+
+        try:
+            self._call(self._mixer.close, timeout=self.close_timeout)
+        except futures.TimeoutError:
+            # The worker is a daemon thread, so a hung device can't keep the process alive.
+            _log.error("Mixer thread didn't close the mixer within %.1f s; abandoning it",
+                       self.close_timeout)
+        else:
+            self._queue.put(None)
+            self._thread.join(self.close_timeout)
+        self._thread = None
+        self.log_stats()
+
+    @property
+    def volume(self):
+        return self._volume
+
+    @volume.setter
+    def volume(self, value):
+        self._volume = value
+        with self._lock:
+            queued = self._pending_volume is not None
+            self._pending_volume = value
+        if not queued:
+            self._submit_write()
+
+    def next_step(self, volume, delta):
+        if self._steps is None:
+            return super().next_step(volume, delta)
+        return self._steps.step(volume, delta)
+
+    @property
+    def steps(self):
+        return self._steps
+
+    def select(self, *args):
+        """
+        Switch the active control of the mixer on the worker thread, without waiting.
+
+        The arguments are passed to the mixer's select(), like
+        :meth:`volcorner.alsa.manager.ALSAMixerManager.select`.  Errors are logged by the worker.
+
+        :return: True if it was queued, or False if the queue was full
+        """
+        return self._submit(self._mixer.select, *args)
+
+    def log_stats(self):
+        """Log the command queue counters."""
+        count = max(1, self.commands)
+        _log.debug("%d mixer commands, %d dropped, max queue depth %d; wait %.1f ms avg, "
+                   "%.1f ms max; run %.1f ms avg, %.1f ms max", self.commands,
+                   self.dropped_commands, self.max_depth, self.total_wait / count * 1000,
+                   self.max_wait * 1000, self.total_run / count * 1000, self.max_run * 1000)
+
+    def _submit(self, func, *args, retry=None):
+        """
+        Queue a command for the worker thread, without waiting.
+
+        :param retry: function to call on the event loop once the worker has drained the queue,
+                      if the command couldn't be queued
+        :return: True if it was queued, or False if the queue was full
+        """
+        try:
+            self._queue.put_nowait((func, args, None, self._clock()))
+        except queue.Full:
+            self.dropped_commands += 1
+            if not self._stalled.is_set():
+                _log.warning("Mixer thread is busy; waiting for it to catch up")
+            if retry is not None:
+                self._retries.append(retry)
+            self._stalled.set()
+            # The worker may have drained the queue before it could see the stall.
+            if self._queue.empty():
+                self._main_loop.call_soon(self._resume)
+            return False
+        self.max_depth = max(self.max_depth, self._queue.qsize())
+        return True
+
+    def _submit_write(self):
+        """Queue a write of the pending volume."""
+        if self._pending_volume is not None:
+            self._submit(self._write_volume, retry=self._submit_write)
+
+    def _resume(self):
+        """Retry the commands that didn't fit in the queue, on the event loop."""
+        self._stalled.clear()
+        retries, self._retries = self._retries, []
+        for retry in retries:
+            retry()
+
+    def _call(self, func, *args, timeout):
+        """
+        Run a command on the worker thread, and wait for its result.
+
+        :param float timeout: seconds to wait for the result
+        :raises concurrent.futures.TimeoutError: if the worker didn't finish it in time
+        """
+        future = futures.Future()
+        try:
+            self._queue.put((func, args, future, self._clock()), timeout=timeout)
+        except queue.Full:
+            raise futures.TimeoutError()
+        return future.result(timeout)
+
+    def _run(self):
+        """Run commands until the None command."""
+        while True:
+            command = self._queue.get()
+            if command is None:
+                return
+            func, args, future, queued = command
+            start = self._clock()
+            try:
+                result = func(*args)
+            except Exception as e:
+                if future is None:
+                    _log.exception("Mixer command failed")
+                else:
+                    future.set_exception(e)
+            else:
+                if future is not None:
+                    future.set_result(result)
+            end = self._clock()
+            self.commands += 1
+            self.total_wait += start - queued
+            self.max_wait = max(self.max_wait, start - queued)
+            self.total_run += end - start
+            self.max_run = max(self.max_run, end - start)
+            if self._stalled.is_set() and self._queue.empty():
+                self._stalled.clear()
+                self._main_loop.call_soon_threadsafe(self._resume)
+
+    def _open_mixer(self):
+        """Open the mixer, on the worker thread."""
+        self._mixer.open()
+        return self._mixer.volume, self._mixer.steps
+
+    def _write_volume(self):
+        """Write the newest volume, on the worker thread."""
+        with self._lock:
+            value, self._pending_volume = self._pending_volume, None
+        self._mixer.volume = value
+
+    def _on_mixer_volume_changed(self, value):
+        """Send a volume change from the worker thread to the event loop."""
+        self._main_loop.call_soon_threadsafe(self._deliver_volume, value)
+
+    def _on_mixer_steps_changed(self, steps):
+        """Send a new step table from the worker thread to the event loop."""
+        self._main_loop.call_soon_threadsafe(self._deliver_steps, steps)
+
+    def _deliver_steps(self, steps):
+        """Use a new step table on the event loop."""
+        self._steps = steps
+        self.on_steps_changed()
+
+    def _deliver_volume(self, value):
+        """Handle a volume change on the event loop."""
+        # A write that's still queued is newer than the change.
+        if self._pending_volume is None:
+            self._volume = value
+        # The mixer has already dropped unchanged volumes.
+        smokesignal.emit(signals.CHANGE_VOLUME, value)
+
+
+class _WorkerLoop:
+    """The parts of an event loop a mixer uses, for a mixer on the worker thread.
+
+    Readers are watched by the real event loop, and their callbacks are queued for the worker.
+    A reader is paused while its callback is waiting, so the event loop doesn't spin on an fd the
+    worker hasn't read yet.  Timers run on the real event loop, and their callbacks are queued the
+    same way.
+    """
+    def __init__(self, threaded):
+        self._threaded = threaded
+        self._readers = {}
+        self._busy = set()
+
+    @property
+    def _loop(self):
+        return self._threaded._main_loop
+
+    def add_reader(self, fd, callback, *args):
+        self._loop.call_soon_threadsafe(self._add_reader, fd, callback, args)
+
+    def remove_reader(self, fd):
+        self._loop.call_soon_threadsafe(self._remove_reader, fd)
+
+    def call_later(self, delay, callback, *args):
+        timer = _WorkerTimer()
+        self._loop.call_soon_threadsafe(self._loop.call_later, delay, self._on_timer, timer,
+                                        callback, args)
+        return timer
+
+    def _add_reader(self, fd, callback, args):
+        self._readers[fd] = (callback, args)
+        if fd not in self._busy:
+            self._loop.add_reader(fd, self._on_ready, fd)
+
+    def _remove_reader(self, fd):
+        if (self._readers.pop(fd, None) is not None) and (fd not in self._busy):
+            self._loop.remove_reader(fd)
+
+    def _on_ready(self, fd):
+        callback, args = self._readers[fd]
+        self._loop.remove_reader(fd)
+        self._busy.add(fd)
+        # If the queue is full, the reader stays paused until the worker has drained it.
+        self._threaded._submit(self._run_reader, fd, callback, args,
+                               retry=lambda: self._rearm(fd))
+
+    def _run_reader(self, fd, callback, args):
+        try:
+            callback(*args)
+        finally:
+            self._loop.call_soon_threadsafe(self._rearm, fd)
+
+    def _rearm(self, fd):
+        self._busy.discard(fd)
+        if fd in self._readers:
+            self._loop.add_reader(fd, self._on_ready, fd)
+
+    def _on_timer(self, timer, callback, args):
+        if not timer.cancelled:
+            self._threaded._submit(self._run_timer, timer, callback, args,
+                                   retry=lambda: self._on_timer(timer, callback, args))
+
+    @staticmethod
+    def _run_timer(timer, callback, args):
+        if not timer.cancelled:
+            callback(*args)
+
+
+class _WorkerTimer:
+    """Handle for a timer from :class:`_WorkerLoop`."""
+    def __init__(self):
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
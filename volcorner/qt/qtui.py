@@ -24,6 +24,8 @@ import volcorner
 from volcorner.corner import Corner
 from volcorner.rect import Rect
 from volcorner.ui import XCBUI
+from volcorner.x11.events import EventDispatcher
+from volcorner.x11.pipeline import setup_connection
 
 _log = logging.getLogger("qtgui")
 
@@ -33,30 +35,46 @@ DURATION = 200
 # X11 desktop ID for "all desktops"
 ALL_DESKTOPS = -1
 
+# Atoms the overlay window needs, to intern at startup
+OVERLAY_ATOMS = ['_NET_WM_DESKTOP']
+
 
 class QtUI(XCBUI):
-    """Qt user interface."""
-    def __init__(self):
+    """Qt user interface.
+
+    Each X screen gets its own QtUI with its own overlay window, but they all share one
+    application, X connection and event dispatcher.
+    """
+    def __init__(self, screen_num=0, app=None):
+        """
+        Initialize a new QtUI.
+
+        :param int screen_num: the X screen (root window) number to show the overlay on
+        :param OverlayApplication app: the application shared with the other screens' UIs, or
+                                       None to create it
+        """
         super().__init__()
-        self.app = OverlayApplication()
+        self.app = app or OverlayApplication()
+        self.screen_num = screen_num
         self.xcb_connection = self.app.xcb_connection
-        self._eventFilters = {}
+        self.dispatcher = self.app.dispatcher
+        self.overlay = Overlay(self.xcb_connection, screen_num)
         self.loaded = False
 
     def load(self):
-        self.app.load()
-        self.app.on_update_volume(self.volume)
-        self.app.on_update_rect(self.overlay_rect)
+        self.overlay.load()
+        self.overlay.on_update_volume(self.volume)
+        self.overlay.on_update_rect(self.overlay_rect)
 
     def set_event_loop(self):
         loop = QEventLoop(self.app)
         asyncio.set_event_loop(loop)
 
     def show(self):
-        self.app.show_overlay.emit()
+        self.overlay.show_overlay.emit()
 
     def hide(self):
-        self.app.hide_overlay.emit()
+        self.overlay.hide_overlay.emit()
 
     @property
     def corner(self):
@@ -66,8 +84,8 @@ class QtUI(XCBUI):
     @corner.setter
     def corner(self, corner):
         XCBUI.corner.__set__(self, corner)
-        self.app.corner = corner
-        self.app.update_transform.emit(corner)
+        self.overlay.corner = corner
+        self.overlay.update_transform.emit(corner)
 
     @property
     def overlay_rect(self):
@@ -76,9 +94,12 @@ class QtUI(XCBUI):
     # Can't call super().property.__set__: http://bugs.python.org/issue14965
     @overlay_rect.setter
     def overlay_rect(self, overlay_rect):
+        # Don't move the window if nothing changed.
+        if overlay_rect == self.overlay_rect:
+            return
         XCBUI.overlay_rect.__set__(self, overlay_rect)
-        self.app.overlay_rect = overlay_rect
-        self.app.update_rect.emit(overlay_rect)
+        self.overlay.overlay_rect = overlay_rect
+        self.overlay.update_rect.emit(overlay_rect)
 
     @property
     def volume(self):
@@ -88,33 +109,59 @@ class QtUI(XCBUI):
     @volume.setter
     def volume(self, volume):
         XCBUI.volume.__set__(self, volume)
-        self.app.update_volume.emit(volume)
+        self.overlay.update_volume.emit(volume)
 
-    def install_event_filter(self, event_filter):
-        # Wrap filter function in required class
-        filter_obj = NativeEventFilter(self.xcb_connection, event_filter)
-        self._eventFilters[event_filter] = filter_obj
-        self.app.installNativeEventFilter(filter_obj)
+    def install_event_filter(self, event_filter, event_types=None):
+        self.dispatcher.install(event_filter, event_types)
 
     def remove_event_filter(self, event_filter):
-        # Uninstall previously wrapped filter object
         try:
-            filter_obj = self._eventFilters[event_filter]
+            self.dispatcher.remove(event_filter)
         except KeyError:
             _log.warning("Tried to uninstall event filter that's not installed: %r", event_filter)
-            return
-        self.app.removeNativeEventFilter(filter_obj)
 
 
 class OverlayApplication(QtWidgets.QApplication):
+    def __init__(self, args=None):
+        super().__init__(args or [])
+        self.xcb_connection = self.wrap_connection()
+        # One native event filter dispatches to all the event filters, for every screen.
+        self.dispatcher = EventDispatcher(self.xcb_connection)
+        self._native_filter = NativeEventFilter(self.dispatcher)
+        self.installNativeEventFilter(self._native_filter)
+
+        # TODO: can Qt do 1-bit alpha channel?
+        # Qt5 lost isCompositingManagerRunning() until 5.7
+        if (hasattr(QX11Info, 'isCompositingManagerRunning') and
+                not getattr(QX11Info, 'isCompositingManagerRunning')()):
+            _log.warning("Compositing window manager NOT detected!  Translucency will be broken.")
+
+    @staticmethod
+    def wrap_connection():
+        """
+        Wrap the current Qt xcb connection in an xcffib Connection object.
+
+        :return: xcffib object
+        """
+        qt_conn = QX11Info.connection()
+        conn_ptr = sip.unwrapinstance(qt_conn)
+        conn = setup_connection(xcffib.wrap(conn_ptr))
+        conn.xfixes = _load_xfixes(conn)
+        return conn
+
+
+class Overlay(QtCore.QObject):
+    """The overlay window on one X screen."""
     show_overlay = QtCore.pyqtSignal()
     hide_overlay = QtCore.pyqtSignal()
     update_transform = QtCore.pyqtSignal(Corner)
     update_volume = QtCore.pyqtSignal(float)
     update_rect = QtCore.pyqtSignal(Rect)
 
-    def __init__(self, args=None):
-        super().__init__(args or [])
+    def __init__(self, xcb_connection, screen_num=0):
+        super().__init__()
+        self.xcb_connection = xcb_connection
+        self.screen_num = screen_num
         self.background = None
         self.background_rotation = None
         self.background_scale = None
@@ -122,12 +169,16 @@ class OverlayApplication(QtWidgets.QApplication):
         self.dot_rotation = None
         self.segments = None
         self.current_animation = None
+        self.current_animation_func = None
         self.next_animation = None
+        self.suppressed_animations = 0
         self.overlay_rect = None
         self.corner = None
         self.window = None
         self._has_set_advanced_window_state = False
-        self.xcb_connection = self.wrap_connection()
+
+        # The overlay starts out hidden.
+        self.animation_target = self._animate_hide
 
         self.show_overlay.connect(self.on_show)
         self.hide_overlay.connect(self.on_hide)
@@ -135,12 +186,6 @@ class OverlayApplication(QtWidgets.QApplication):
         self.update_volume.connect(self.on_update_volume)
         self.update_rect.connect(self.on_update_rect)
 
-        # TODO: can Qt do 1-bit alpha channel?
-        # Qt5 lost isCompositingManagerRunning() until 5.7
-        if (hasattr(QX11Info, 'isCompositingManagerRunning') and
-                not getattr(QX11Info, 'isCompositingManagerRunning')()):
-            _log.warning("Compositing window manager NOT detected!  Translucency will be broken.")
-
     def load(self):
         assert self.overlay_rect is not None
         assert self.corner is not None
@@ -168,10 +213,19 @@ class OverlayApplication(QtWidgets.QApplication):
         self.window = self._create_window(scene)
 
     def queue_animation(self, anim_func):
+        # Don't restart an animation to where the overlay is already going.
+        if anim_func == self.animation_target:
+            _log.debug('Already animating to {}'.format(anim_func.__name__))
+            self.suppressed_animations += 1
+            return
+        self.animation_target = anim_func
+
         if self.current_animation is None:
-            _log.debug('Starting animation {}'.format(anim_func.__name__))
-            self.current_animation = anim_func()
-            self.current_animation.finished.connect(self.on_animation_finished)
+            self._start_animation(anim_func)
+        elif anim_func == self.current_animation_func:
+            _log.debug('Dropping queued animation, already running {}'.format(anim_func.__name__))
+            self.next_animation = None
+            self.suppressed_animations += 1
         else:
             _log.debug('Queueing animation {}'.format(anim_func.__name__))
             self.next_animation = anim_func
@@ -179,10 +233,17 @@ class OverlayApplication(QtWidgets.QApplication):
     def on_animation_finished(self):
         _log.debug('Animation finished')
         self.current_animation = None
+        self.current_animation_func = None
         if self.next_animation:
-            self.queue_animation(self.next_animation)
+            self._start_animation(self.next_animation)
             self.next_animation = None
 
+    def _start_animation(self, anim_func):
+        _log.debug('Starting animation {}'.format(anim_func.__name__))
+        self.current_animation = anim_func()
+        self.current_animation_func = anim_func
+        self.current_animation.finished.connect(self.on_animation_finished)
+
     def on_show(self):
         self.queue_animation(self._animate_show)
 
@@ -228,6 +289,9 @@ class OverlayApplication(QtWidgets.QApplication):
         window.setWindowFlags(Qt.FramelessWindowHint | Qt.WindowStaysOnTopHint | Qt.Tool)
         window.setAttribute(Qt.WA_TranslucentBackground)
         window.setFrameStyle(QtWidgets.QFrame.NoFrame)
+        # Create the native window now, so it can be moved to its screen before it's shown.
+        window.winId()
+        window.windowHandle().setScreen(qt_screen(self.screen_num))
         self.on_update_rect(self.overlay_rect)
         self.on_update_transform(self.corner)
         return window
@@ -282,20 +346,6 @@ class OverlayApplication(QtWidgets.QApplication):
             window_id = int(self.window.winId())
             set_window_desktop(self.xcb_connection, window_id, ALL_DESKTOPS)
             set_empty_window_shape(self.xcb_connection, self.xcb_connection.xfixes, window_id)
-            self.xcb_connection.flush()
-
-    @staticmethod
-    def wrap_connection():
-        """
-        Wrap the current Qt xcb connection in an xcffib Connection object.
-
-        :return: xcffib object
-        """
-        qt_conn = QX11Info.connection()
-        conn_ptr = sip.unwrapinstance(qt_conn)
-        conn = xcffib.wrap(conn_ptr)
-        conn.xfixes = _load_xfixes(conn)
-        return conn
 
 
 class SegmentObject(QtWidgets.QGraphicsObject):
@@ -393,6 +443,25 @@ def clamp(minimum, value, maximum):
     return max(minimum, min(maximum, value))
 
 
+def qt_screen(screen_num):
+    """Find a Qt screen on an X screen.
+
+    Qt has a QScreen per monitor, and the monitors of one X screen are virtual siblings, listed
+    in the order of the X screens.
+
+    :param int screen_num: the X screen (root window) number
+    :returns: one of the X screen's QScreens, or the primary screen if there's no such X screen
+    :rtype: QtGui.QScreen
+    """
+    x_screens = []
+    for screen in QtGui.QGuiApplication.screens():
+        if not any(screen in siblings for siblings in x_screens):
+            x_screens.append(screen.virtualSiblings())
+    if screen_num < len(x_screens):
+        return x_screens[screen_num][0]
+    return QtGui.QGuiApplication.primaryScreen()
+
+
 def set_window_desktop(conn, window_id, desktop):
     """Set the virtual desktop for a window.
 
@@ -401,14 +470,15 @@ def set_window_desktop(conn, window_id, desktop):
     :param desktop: desktop to set, or ALL_DESKTOPS to show on all desktops
     """
     net_wm_desktop = _intern_atom(conn, '_NET_WM_DESKTOP')
-    conn.core.ChangeProperty(xcffib.xproto.PropMode.Replace,
-                             window_id,
-                             net_wm_desktop,
-                             xcffib.xproto.Atom.CARDINAL,
-                             32,
-                             1,
-                             struct.pack('i', desktop),
-                             is_checked=True)
+    cookie = conn.core.ChangeProperty(xcffib.xproto.PropMode.Replace,
+                                      window_id,
+                                      net_wm_desktop,
+                                      xcffib.xproto.Atom.CARDINAL,
+                                      32,
+                                      1,
+                                      struct.pack('i', desktop),
+                                      is_checked=True)
+    conn.batcher.check(cookie, "set the window desktop")
 
 
 def set_empty_window_shape(conn, xfixes, window_id):
@@ -422,8 +492,9 @@ def set_empty_window_shape(conn, xfixes, window_id):
     """
     region_id = conn.generate_id()
     xfixes.CreateRegion(region_id, 0, [])
-    xfixes.SetWindowShapeRegion(window_id, xcffib.shape.SK.Input, 0, 0, region_id,
-                                is_checked=True)
+    cookie = xfixes.SetWindowShapeRegion(window_id, xcffib.shape.SK.Input, 0, 0, region_id,
+                                         is_checked=True)
+    conn.batcher.check(cookie, "set the window input shape")
 
 
 def _intern_atom(conn, name):
@@ -434,7 +505,7 @@ def _intern_atom(conn, name):
     :returns: atom
     :rtype: int
     """
-    return conn.core.InternAtom(False, len(name), name).reply().atom
+    return conn.atoms.get(name)
 
 
 def _load_xfixes(conn):
@@ -448,7 +519,7 @@ def _load_xfixes(conn):
     xfixes_major, xfixes_minor = (2, 0)
     try:
         xfixes = conn(xcffib.xfixes.key)
-        reply = xfixes.QueryVersion(xfixes_major, xfixes_minor).reply()
+        reply = conn.versions.reply(xcffib.xfixes.key, (xfixes_major, xfixes_minor))
     except:
         _log.error("Failed to get XFixes 2", exc_info=True)
         raise ValueError("XFixes 2 is required.")
@@ -460,10 +531,9 @@ def _load_xfixes(conn):
 
 
 class NativeEventFilter(QtCore.QAbstractNativeEventFilter):
-    def __init__(self, conn, event_filter):
+    def __init__(self, dispatcher):
         super().__init__()
-        self.conn = conn
-        self.event_filter = event_filter
+        self.dispatcher = dispatcher
 
     # Detected method signature is wrong.  Should be:
     # nativeEventFilter(self, Union[QByteArray, bytes, bytearray], sip.voidptr) -> Tuple[bool, int]
@@ -473,7 +543,8 @@ class NativeEventFilter(QtCore.QAbstractNativeEventFilter):
             _log.warning('Unexpected native event type %s', event_type)
             return False, 0
         generic_event = ffi.cast('xcb_generic_event_t *', message)
-        event = self.conn.hoist_event(generic_event)
-        result = self.event_filter(event)
+        result = self.dispatcher.push(generic_event)
+        # Qt delivers events one at a time, so flush coalesced motion on the next loop iteration.
+        self.dispatcher.flush_soon()
         dummy_result = 0  # Used on windows apparently
-        return bool(result), dummy_result
+        return result, dummy_result
@@ -0,0 +1,138 @@
+"""Volume ramps."""
+
+import asyncio
+import logging
+import time
+
+__all__ = ['VolumeRamp']
+_log = logging.getLogger("audio")
+
+# Default seconds to ramp to a new volume
+RAMP_DURATION = 0.1
+
+# Seconds between ramp steps
+RAMP_TICK = 1 / 50
+
+
+class VolumeRamp:
+    """Ramp the volume toward a target over time, instead of jumping to it.
+
+    Each tick moves the volume along a straight line from where it was when the target was set,
+    reaching the target after the ramp duration.  The volume is normalized with the mixer's own
+    curve (for ALSA, the alsa-utils dB mapping), so a straight line in it sounds even.  Setting a
+    new target mid-ramp starts a new ramp from the current volume.
+
+    Every step goes to the VolumeWriter and to the step callback, so the UI follows the ramp.
+    Ramp steps may be written once per tick, so each one reaches the mixer; only a jump without a
+    ramp is held to the writer's own interval.
+    """
+    def __init__(self, writer, on_step, duration=RAMP_DURATION, tick=RAMP_TICK, loop=None,
+                 clock=time.monotonic):
+        """
+        Initialize a new VolumeRamp.
+
+        :param volcorner.volume.VolumeWriter writer: the writer to send each step to
+        :param on_step: function to call with the volume at each step
+        :param float duration: seconds to ramp to a new target, or 0 to jump straight to it
+        :param float tick: seconds between steps
+        :param loop: asyncio event loop for the tick timer, or None for the current event loop
+        :param clock: function returning the current time in seconds
+        """
+        self._writer = writer
+        self._on_step = on_step
+        self.duration = duration
+        self.tick = tick
+        self._loop = loop
+        self._clock = clock
+        self._handle = None
+        self._start = 0.0
+        self._start_time = 0.0
+        self._position = 0.0
+        self._target = 0.0
+        self.ramps = 0
+        self.retargets = 0
+        self.steps = 0
+
+    @property
+    def active(self):
+        """Check if the volume is ramping."""
+        return self._handle is not None
+
+    @property
+    def volume(self):
+        """Get the current step's volume, or the written volume if it's not ramping."""
+        return self._position if self.active else self._writer.volume
+
+    @property
+    def target(self):
+        """Get the volume being ramped to, or the written volume if it's not ramping."""
+        return self._target if self.active else self._writer.volume
+
+    def change(self, delta):
+        """
+        Ramp the volume relative to the current target.
+
+        :param float delta: the amount to change the target by
+        :return: the new target volume
+        """
+        return self.ramp_to(self.target + delta)
+
+    def ramp_to(self, target):
+        """
+        Ramp the volume to a new target.
+
+        :param float target: the new target volume, clamped between 0.0 and 1.0
+        :return: the new target volume
+        """
+        target = max(0.0, min(1.0, target))
+        if self.duration <= 0:
+            self._step(target)
+            return target
+
+        # Start from wherever the volume is now, even in the middle of another ramp.
+        self._start = self.volume
+        self._start_time = self._clock()
+        self._position = self._start
+        self._target = target
+        if self.active:
+            self.retargets += 1
+        else:
+            self.ramps += 1
+            loop = self._loop or asyncio.get_event_loop()
+            self._handle = loop.call_later(self.tick, self._on_tick)
+        return target
+
+    def finish(self):
+        """Jump to the end of the ramp."""
+        if self.active:
+            self._cancel_timer()
+            self._step(self._target)
+
+    def cancel(self):
+        """Stop ramping, leaving the volume at the current step."""
+        self._cancel_timer()
+
+    def log_stats(self):
+        """Log the ramp counters."""
+        _log.debug("%d ramps, %d retargeted, %d steps", self.ramps, self.retargets, self.steps)
+
+    def _on_tick(self):
+        self._handle = None
+        progress = (self._clock() - self._start_time) / self.duration
+        if progress >= 1.0:
+            self._step(self._target)
+            return
+        self._step(self._start + (self._target - self._start) * progress)
+        loop = self._loop or asyncio.get_event_loop()
+        self._handle = loop.call_later(self.tick, self._on_tick)
+
+    def _step(self, value):
+        self._position = value
+        self.steps += 1
+        self._writer.set(value, self.tick if self.duration > 0 else None)
+        self._on_step(value)
+
+    def _cancel_timer(self):
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
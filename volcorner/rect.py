@@ -3,6 +3,7 @@
 from collections import namedtuple
 
 __all__ = [
+    'Bounds',
     'Point',
     'Size',
     'Rect',
@@ -56,3 +57,44 @@ class Rect(namedtuple('Rect', 'origin size')):
         x1, y1 = self.origin
         x2, y2 = self.x2, self.y2
         return (x1 <= px <= x2) and (y1 <= py <= y2)
+
+
+class Bounds:
+    """Inclusive integer bounds of a rectangle, precomputed for fast point tests."""
+    __slots__ = ('x1', 'y1', 'x2', 'y2')
+
+    def __init__(self, x1, y1, x2, y2):
+        self.x1 = x1
+        self.y1 = y1
+        self.x2 = x2
+        self.y2 = y2
+
+    @classmethod
+    def from_rect(cls, rect):
+        return cls(rect.x1, rect.y1, rect.x2, rect.y2)
+
+    def __eq__(self, other):
+        return (isinstance(other, Bounds) and
+                (self.x1, self.y1, self.x2, self.y2) == (other.x1, other.y1, other.x2, other.y2))
+
+    def __repr__(self):
+        return "Bounds(x1={}, y1={}, x2={}, y2={})".format(self.x1, self.y1, self.x2, self.y2)
+
+    def contains(self, point):
+        """
+        Test if these bounds contain a point.
+
+        :param Point point: The point to test
+        :return: True if the bounds contain the point
+        """
+        return self.contains_xy(point.x, point.y)
+
+    def contains_xy(self, x, y):
+        """
+        Test if these bounds contain a point, given as integer coordinates.
+
+        :param int x: The point's X coordinate
+        :param int y: The point's Y coordinate
+        :return: True if the bounds contain the point
+        """
+        return (self.x1 <= x <= self.x2) and (self.y1 <= y <= self.y2)
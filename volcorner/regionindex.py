@@ -0,0 +1,108 @@
+"""Spatial index of named regions."""
+
+from volcorner.rect import Bounds
+
+__all__ = ['RegionGrid']
+
+# Default grid cell width and height, in pixels
+DEFAULT_CELL_SIZE = 64
+
+# Maximum number of grid cells along each side; the cells grow to cover larger bounds
+MAX_CELLS_PER_SIDE = 256
+
+
+class RegionGrid:
+    """Uniform grid of named regions, for looking up the region containing a point.
+
+    The grid covers the bounding box of all the regions.  Each cell lists the regions overlapping
+    it, so a lookup only tests the few regions in one cell, however many regions there are.  When
+    regions overlap, the first one added wins.
+    """
+    def __init__(self, regions=None, cell_size=DEFAULT_CELL_SIZE):
+        """
+        Initialize a new RegionGrid.
+
+        :param dict regions: region ID to Rect, in priority order
+        :param int cell_size: minimum grid cell width and height, in pixels
+        """
+        self._regions = dict(regions or {})
+        self._min_cell_size = cell_size
+        self.bounds = None
+        self.cell_size = cell_size
+        self._x1 = 0
+        self._y1 = 0
+        self._cols = 0
+        self._rows = 0
+        self._cells = []
+        self._build()
+
+    @property
+    def regions(self):
+        """Get a dict of region ID to Rect."""
+        return dict(self._regions)
+
+    def __len__(self):
+        return len(self._regions)
+
+    def __contains__(self, region_id):
+        return region_id in self._regions
+
+    def get(self, region_id):
+        """
+        Get a region by ID.
+
+        :param region_id: the region ID
+        :return: the Rect, or None if there's no such region
+        """
+        return self._regions.get(region_id)
+
+    def lookup(self, x, y):
+        """
+        Find the region containing a point.
+
+        :param int x: the point's X coordinate
+        :param int y: the point's Y coordinate
+        :return: the region ID, or None if the point isn't in any region
+        """
+        col = (x - self._x1) // self.cell_size
+        row = (y - self._y1) // self.cell_size
+        if not ((0 <= col < self._cols) and (0 <= row < self._rows)):
+            return None
+        for region_id, x1, y1, x2, y2 in self._cells[row * self._cols + col]:
+            if (x1 <= x <= x2) and (y1 <= y <= y2):
+                return region_id
+        return None
+
+    def _build(self):
+        """Build the grid cells from the regions."""
+        regions = [(region_id, rect) for region_id, rect in self._regions.items()
+                   if (rect.width > 0) and (rect.height > 0)]
+        if not regions:
+            self.bounds = None
+            self._cols = self._rows = 0
+            self._cells = []
+            return
+
+        x1 = min(rect.x1 for _, rect in regions)
+        y1 = min(rect.y1 for _, rect in regions)
+        x2 = max(rect.x2 for _, rect in regions)
+        y2 = max(rect.y2 for _, rect in regions)
+        self.bounds = Bounds(x1, y1, x2, y2)
+
+        # Grow the cells until the grid is small enough.
+        longest_side = max(x2 - x1, y2 - y1) + 1
+        cell_size = max(self._min_cell_size, -(-longest_side // MAX_CELLS_PER_SIDE))
+        self.cell_size = cell_size
+        self._x1 = x1
+        self._y1 = y1
+        self._cols = (x2 - x1) // cell_size + 1
+        self._rows = (y2 - y1) // cell_size + 1
+
+        cells = [[] for _ in range(self._cols * self._rows)]
+        # Cells hold flat (region_id, x1, y1, x2, y2) tuples, to avoid attribute lookups.
+        for region_id, rect in regions:
+            entry = (region_id, rect.x1, rect.y1, rect.x2, rect.y2)
+            for row in range((rect.y1 - y1) // cell_size, (rect.y2 - y1) // cell_size + 1):
+                for col in range((rect.x1 - x1) // cell_size, (rect.x2 - x1) // cell_size + 1):
+                    cells[row * self._cols + col].append(entry)
+        self._cells = [tuple(cell) for cell in cells]
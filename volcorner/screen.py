@@ -1,13 +1,29 @@
 """Abstract base class for screen info."""
 
+from collections import namedtuple
+import logging
+
 import smokesignal
 
 from abc import ABCMeta, abstractmethod
 from volcorner import signals
+from volcorner.rect import Rect
+
+__all__ = ['Monitor', 'PRIMARY_MONITOR', 'Screen']
+_log = logging.getLogger("screen")
+
+# A monitor: its output name, whether it's the primary monitor, and its Rect in the root window
+Monitor = namedtuple('Monitor', 'name primary rect')
+
+# Monitor name that selects the primary monitor
+PRIMARY_MONITOR = 'primary'
 
 
 class Screen(metaclass=ABCMeta):
     """Abstract base class for screen info."""
+    # X screen (root window) number, published with resolution changes
+    screen_num = 0
+
     @abstractmethod
     def open(self):
         """
@@ -29,10 +45,40 @@ class Screen(metaclass=ABCMeta):
         :rtype: Size
         """
 
+    @property
+    def monitors(self):
+        """
+        Return the cached monitor table.
+
+        :return: the monitors, or an empty tuple if they aren't known
+        :rtype: tuple of Monitor
+        """
+        return ()
+
+    def monitor_rect(self, name=PRIMARY_MONITOR):
+        """
+        Look up a monitor's Rect in the cached monitor table.  This never makes a request.
+
+        :param str name: a monitor's output name, or PRIMARY_MONITOR
+        :return: the monitor's Rect, or the whole screen if there's no such monitor
+        :rtype: Rect
+        """
+        monitors = self.monitors
+        for monitor in monitors:
+            if (monitor.name == name) or ((name == PRIMARY_MONITOR) and monitor.primary):
+                return monitor.rect
+        # Without a primary monitor, the first one will do.
+        if (name == PRIMARY_MONITOR) and monitors:
+            return monitors[0].rect
+        if monitors:
+            _log.debug("No monitor named %s, using the whole screen", name)
+        size = self.size
+        return Rect.make(0, 0, size.width, size.height)
+
     def on_resolution_changed(self, size):
         """
         Called by the subclass when the screen resolution has changed.
 
         :param Size size: the new resolution
         """
-        smokesignal.emit(signals.CHANGE_RESOLUTION, size)
+        smokesignal.emit(signals.CHANGE_RESOLUTION, size, screen_num=self.screen_num)
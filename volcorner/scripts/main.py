@@ -7,13 +7,24 @@ import signal
 import asyncio
 import smokesignal
 from volcorner import signals
-from volcorner.alsa.alsamixer import ALSAMixer
+from volcorner.activation import Activation
+from volcorner.alsa.cards import parse_control_specs
+from volcorner.alsa.manager import ALSAMixerManager
 from volcorner.config import get_config, log_level_for_verbosity, write_config
-from volcorner.config import KEY_CORNER, KEY_ACTIVATE_SIZE, KEY_DEACTIVATE_SIZE, KEY_VERBOSE
-from volcorner.corner import Corner
-from volcorner.qt.qtui import QtUI
+from volcorner.config import KEY_CORNER, KEY_ACTIVATE_SIZE, KEY_DEACTIVATE_SIZE, KEY_TRACKING
+from volcorner.config import KEY_DWELL_TIME, KEY_LEAVE_GRACE, KEY_MONITOR, KEY_RAMP_TIME
+from volcorner.config import KEY_BARRIER_PRESSURE, KEY_MAX_POINTER_SPEED, KEY_VERBOSE
+from volcorner.config import KEY_MIXER_CONTROLS, KEY_MIXER_IO, KEY_VOLUME_CURVE
+from volcorner.corner import Corner, corner_geometry
+from volcorner.qt.qtui import OVERLAY_ATOMS, QtUI
+from volcorner.mixerthread import ThreadedMixer
+from volcorner.ramp import VolumeRamp
 from volcorner.rect import Size
+from volcorner.volume import VolumeWriter
+from volcorner.x11.barriertracker import BarrierMouseTracker
+from volcorner.x11.pipeline import negotiate
 from volcorner.x11.randrscreen import RandRScreen
+from volcorner.x11.sentineltracker import SentinelMouseTracker
 from volcorner.x11.xinput2tracker import XInput2MouseTracker
 
 # Amount to step the volume per scroll event
@@ -25,7 +36,128 @@ OVERLAY_SIZE = Size(200, 200)
 _log = logging.getLogger("volcorner")
 
 
+class ScreenCorner:
+    """The hot corner on one X screen, with its own screen monitor, mouse tracker and overlay."""
+    def __init__(self, app, screen_num, ui):
+        """
+        Initialize a new ScreenCorner.
+
+        :param Volcorner app: the app, for its configuration and mixer
+        :param int screen_num: the X screen (root window) number
+        :param QtUI ui: the UI for this screen
+        """
+        self.app = app
+        self.screen_num = screen_num
+        self.ui = ui
+        self.screen = None
+        self.tracker = None
+        self._geometry = None
+        self._activate_region = None
+        self._deactivate_region = None
+        self._in_corner = False
+        self.activation = Activation(self._activate, self._deactivate, app.dwell_time,
+                                     app.leave_grace)
+
+    def open(self):
+        """Open the screen monitor and mouse tracker, and load the overlay."""
+        app = self.app
+        _log.debug("Opening screen %d", self.screen_num)
+        self.screen = RandRScreen(self.ui, self.screen_num)
+        self.screen.open()
+        _log.info("Screen %d ready", self.screen_num)
+
+        _log.debug("Opening mouse tracker on screen %d", self.screen_num)
+        self.tracker = app.create_tracker(self.ui, self.screen_num)
+        self.tracker.max_speed = app.max_pointer_speed
+        self._update_tracking_regions()
+        self.tracker.start()
+        _log.info("Mouse tracker running on screen %d", self.screen_num)
+
+        _log.debug("Loading UI on screen %d", self.screen_num)
+        self.ui.corner = app.corner
+        self.ui.volume = app.mixer.volume
+        self._update_ui_rect()
+        self.ui.load()
+        _log.info("UI loaded on screen %d", self.screen_num)
+
+    def close(self):
+        """Stop the mouse tracker and screen monitor."""
+        self.activation.cancel()
+        self.activation.log_stats()
+        if self.tracker is not None:
+            self.tracker.stop()
+        if self.screen is not None:
+            self.screen.close()
+
+    def on_enter(self):
+        """Activate the hot corner, once the pointer has dwelled in it."""
+        self.activation.enter()
+
+    def on_leave(self):
+        """Deactivate the hot corner, once the leave grace period is over."""
+        self.activation.leave()
+
+    def _activate(self):
+        """Expand the hotspot to the scroll capture region, and begin capturing scroll events."""
+        self._in_corner = True
+        self.tracker.region = self._deactivate_region
+        self.tracker.grab_scroll()
+        self.ui.show()
+
+    def _deactivate(self):
+        """Reduce the hotspot to the corner, and stop capturing scroll events."""
+        self._in_corner = False
+        self.tracker.region = self._activate_region
+        self.tracker.ungrab_scroll()
+        self.ui.hide()
+
+    def on_change_resolution(self):
+        """Update the tracking regions for the new resolution."""
+        geometry = self._corner_geometry()
+        if geometry == self._geometry:
+            _log.debug("Corner geometry is unchanged on screen %d", self.screen_num)
+            return
+        self._geometry = geometry
+        self._update_tracking_regions()
+        self._update_ui_rect()
+
+    def _corner_geometry(self):
+        """Get the corner regions on the current monitor layout."""
+        assert (self.screen is not None) and (self.screen.size is not None)
+        app = self.app
+        monitor = self.screen.monitor_rect(app.monitor)
+        return corner_geometry(app.corner, monitor, app.activate_size, app.deactivate_size,
+                               OVERLAY_SIZE)
+
+    def _update_tracking_regions(self):
+        """Update the tracking regions for the current screen resolution."""
+        assert self.tracker is not None
+        if self._geometry is None:
+            self._geometry = self._corner_geometry()
+        self._activate_region = self._geometry.activate
+        self._deactivate_region = self._geometry.deactivate
+        # Track the current region.
+        if not self._in_corner:
+            self.tracker.region = self._activate_region
+        else:
+            self.tracker.region = self._deactivate_region
+        _log.debug("Now tracking region %r on screen %d", self.tracker.region, self.screen_num)
+
+    def _update_ui_rect(self):
+        """Update the display geometry for the UI overlay."""
+        assert self.ui is not None
+        if self._geometry is None:
+            self._geometry = self._corner_geometry()
+        self.ui.overlay_rect = self._geometry.overlay
+        _log.debug("New overlay rect %r on screen %d", self.ui.overlay_rect, self.screen_num)
+
+
 class Volcorner:
+    """The volcorner app.
+
+    Every X screen on the connection gets a :class:`ScreenCorner`, sharing one event loop, X
+    connection and mixer.
+    """
     def __init__(self, config, config_path):
         """
         Initialize the app.
@@ -36,18 +168,17 @@ class Volcorner:
         self.config = config
         self.config_path = config_path
         self._process_config(config)
-        self.screen = None
-        self._activate_region = None
-        self._deactivate_region = None
-        self.tracker = None
-        self._in_corner = False
+        self.corners = []
         self.mixer = None
+        self.volume = None
+        self.ramp = None
         self.ui = None
 
         smokesignal.on(signals.ENTER_REGION, self.on_enter)
         smokesignal.on(signals.LEAVE_REGION, self.on_leave)
         smokesignal.on(signals.SCROLL_UP, self.on_scroll_up)
         smokesignal.on(signals.SCROLL_DOWN, self.on_scroll_down)
+        smokesignal.on(signals.SCROLL, self.on_scroll)
         smokesignal.on(signals.CHANGE_RESOLUTION, self.on_change_resolution)
         smokesignal.on(signals.CHANGE_VOLUME, self.on_change_volume)
 
@@ -57,28 +188,28 @@ class Volcorner:
         self.ui.set_event_loop()
         _log.debug("Event loop ready")
 
+        # Query all the X extensions and atoms at once, instead of a round-trip for each one.
+        negotiate(self.ui.xcb_connection,
+                  versions=self._tracker_class().extension_versions() +
+                  RandRScreen.extension_versions(),
+                  atoms=OVERLAY_ATOMS)
+        _log.debug("X extensions negotiated")
+
         _log.debug("Opening mixer")
-        self.mixer = ALSAMixer()
+        self.mixer = self._create_mixer()
         self.mixer.open()
+        self.volume = VolumeWriter(self.mixer)
+        self.ramp = VolumeRamp(self.volume, self._show_volume, self._ramp_time)
         _log.info("Mixer ready")
 
-        _log.debug("Opening screen")
-        self.screen = RandRScreen(self.ui)
-        self.screen.open()
-        _log.info("Screen ready")
-
-        _log.debug("Opening mouse tracker")
-        self.tracker = XInput2MouseTracker(self.ui)
-        self._update_tracking_regions()
-        self.tracker.start()
-        _log.info("Mouse tracker running")
-
-        _log.debug("Loading UI")
-        self.ui.corner = self._corner
-        self.ui.volume = self.mixer.volume
-        self._update_ui_rect()
-        self.ui.load()
-        _log.info("UI loaded")
+        # Every screen shares the first UI's application and X connection.
+        screen_count = len(self.ui.xcb_connection.setup.roots)
+        _log.info("Found %d X screen(s)", screen_count)
+        for screen_num in range(screen_count):
+            ui = self.ui if screen_num == 0 else QtUI(screen_num, self.ui.app)
+            corner = ScreenCorner(self, screen_num, ui)
+            self.corners.append(corner)
+            corner.open()
 
         _log.info("Initialization complete; running main loop")
         try:
@@ -91,8 +222,12 @@ class Volcorner:
             asyncio.get_event_loop().run_forever()
         finally:
             _log.info("Shutting down")
-            self.tracker.stop()
-            self.screen.close()
+            for corner in self.corners:
+                corner.close()
+            self.ramp.finish()
+            self.ramp.log_stats()
+            self.volume.flush()
+            self.volume.log_stats()
             self.mixer.close()
 
     def on_interrupt(self):
@@ -100,51 +235,70 @@ class Volcorner:
         _log.info("Received interrupt, gracefully shutting down.")
         self.ui.stop()
 
-    def on_enter(self):
-        """Expand the hotspot to the scroll capture region, and begin capturing scroll events."""
-        self.tracker.region = self._deactivate_region
-        self.tracker.grab_scroll()
-        self.ui.show()
+    def on_enter(self, region_id=None, screen_num=0):
+        """Activate the hot corner on a screen, once the pointer has dwelled in it."""
+        self.corners[screen_num].on_enter()
 
-    def on_leave(self):
-        """Reduce the hotspot to the corner, and stop capturing scroll events."""
-        self.tracker.region = self._activate_region
-        self.tracker.ungrab_scroll()
-        self.ui.hide()
+    def on_leave(self, region_id=None, screen_num=0):
+        """Deactivate the hot corner on a screen, once the leave grace period is over."""
+        self.corners[screen_num].on_leave()
 
     def on_scroll_up(self):
         """Increment the volume."""
-        value = min(1.0, self.mixer.volume + VOL_STEP)
+        value = self.ramp.ramp_to(self.mixer.next_step(self.ramp.target, VOL_STEP))
         _log.info("Increasing volume to %.02f", value)
-        self.mixer.volume = value
 
     def on_scroll_down(self):
         """Decrement the volume."""
-        value = max(0.0, self.mixer.volume - VOL_STEP)
+        value = self.ramp.ramp_to(self.mixer.next_step(self.ramp.target, -VOL_STEP))
         _log.info("Decreasing volume to %.02f", value)
-        self.mixer.volume = value
 
-    def on_change_resolution(self, screen_size):
-        """Update the tracking regions for the new resolution."""
-        self._update_tracking_regions()
-        self._update_ui_rect()
+    def on_scroll(self, amount):
+        """Change the volume by a smooth scroll amount, in wheel clicks."""
+        value = self.ramp.change(amount * VOL_STEP)
+        _log.info("Scrolling volume to %.02f", value)
+
+    def on_change_resolution(self, screen_size, screen_num=0):
+        """Update the tracking regions for a screen's new resolution."""
+        self.corners[screen_num].on_change_resolution()
 
     def on_change_volume(self, volume):
-        """Update the UI when the volume is changed, by this or another program."""
-        self.ui.volume = volume
+        """Update every screen's UI when the volume is changed, by this or another program."""
+        # Until the scrolled volume is written, the UI already shows it.
+        if self.ramp.active or self.volume.pending:
+            return
+        self._show_volume(volume)
+
+    def _show_volume(self, volume):
+        """Show a volume on every screen's UI, before it's written to the mixer."""
+        for corner in self.corners:
+            corner.ui.volume = volume
 
     def _process_config(self, config):
         """Initialize instance variables from the config."""
         cvars = vars(config)
 
         corner_id = cvars[KEY_CORNER]
-        self._corner = Corner.from_id(corner_id)
+        self.corner = Corner.from_id(corner_id)
+        self.monitor = cvars[KEY_MONITOR]
 
         activate_dim = cvars[KEY_ACTIVATE_SIZE]
-        self._activate_size = Size(activate_dim, activate_dim)
+        self.activate_size = Size(activate_dim, activate_dim)
 
         deactivate_dim = cvars[KEY_DEACTIVATE_SIZE]
-        self._deactivate_size = Size(deactivate_dim, deactivate_dim)
+        self.deactivate_size = Size(deactivate_dim, deactivate_dim)
+
+        # Activation times are configured in milliseconds.
+        self.dwell_time = cvars[KEY_DWELL_TIME] / 1000.0
+        self.leave_grace = cvars[KEY_LEAVE_GRACE] / 1000.0
+        self._ramp_time = cvars[KEY_RAMP_TIME] / 1000.0
+        self._volume_curve = cvars[KEY_VOLUME_CURVE]
+        self._mixer_controls = parse_control_specs(cvars[KEY_MIXER_CONTROLS])
+        self._mixer_io = cvars[KEY_MIXER_IO]
+
+        self._tracking = cvars[KEY_TRACKING]
+        self._barrier_pressure = cvars[KEY_BARRIER_PRESSURE]
+        self.max_pointer_speed = cvars[KEY_MAX_POINTER_SPEED]
 
         verbosity = cvars[KEY_VERBOSE]
         log_level = log_level_for_verbosity(verbosity)
@@ -155,26 +309,38 @@ class Volcorner:
         if cvars['save']:
             write_config(config, self.config_path)
 
-    def _update_tracking_regions(self):
-        """Update the tracking regions for the current screen resolution."""
-        assert (self.screen is not None) and (self.screen.size is not None)
-        assert self.tracker is not None
-        # Calculate the new regions.
-        self._activate_region = self._corner.rect(self.screen.size, self._activate_size)
-        self._deactivate_region = self._corner.rect(self.screen.size, self._deactivate_size)
-        # Track the current region.
-        if not self._in_corner:
-            self.tracker.region = self._activate_region
-        else:
-            self.tracker.region = self._deactivate_region
-        _log.debug("Now tracking region %r", self.tracker.region)
+    def _create_mixer(self):
+        """Create the mixer, running on a worker thread if configured."""
+        def create_manager(loop=None):
+            return ALSAMixerManager(self._mixer_controls, curve=self._volume_curve, loop=loop)
 
-    def _update_ui_rect(self):
-        """Update the display geometry for the UI overlay."""
-        assert (self.screen is not None) and (self.screen.size is not None)
-        assert self.ui is not None
-        self.ui.overlay_rect = self._corner.rect(self.screen.size, OVERLAY_SIZE)
-        _log.debug("New overlay rect %r", self.ui.overlay_rect)
+        if self._mixer_io == 'thread':
+            return ThreadedMixer(create_manager)
+        return create_manager()
+
+    def _tracker_class(self):
+        """Get the mouse tracker class for the configured tracking mode."""
+        if self._tracking == 'sentinel':
+            return SentinelMouseTracker
+        if self._tracking == 'barrier':
+            return BarrierMouseTracker
+        return XInput2MouseTracker
+
+    def create_tracker(self, ui, screen_num):
+        """
+        Create the mouse tracker for the configured tracking mode.
+
+        :param QtUI ui: the screen's UI
+        :param int screen_num: the X screen (root window) number to track
+        """
+        tracker_class = self._tracker_class()
+        if tracker_class is BarrierMouseTracker:
+            return BarrierMouseTracker(ui, self.corner, self._barrier_pressure,
+                                       screen_num=screen_num)
+        if tracker_class is SentinelMouseTracker:
+            return SentinelMouseTracker(ui, screen_num=screen_num)
+        return XInput2MouseTracker(ui, raw_motion=(self._tracking == 'raw-motion'),
+                                   screen_num=screen_num)
 
 
 def main():
@@ -6,6 +6,7 @@ CHANGE_VOLUME = "change_volume"
 # Mouse tracking signals
 ENTER_REGION = "enter_region"
 LEAVE_REGION = "leave_region"
+SCROLL = "scroll"
 SCROLL_DOWN = "scroll_down"
 SCROLL_UP = "scroll_up"
 
@@ -2,34 +2,54 @@
 
 from abc import ABCMeta, abstractmethod
 import logging
+import time
 
 import smokesignal
 
 from volcorner import signals
+from volcorner.rect import Point
+from volcorner.regionindex import RegionGrid
 
-__all__ = ['MouseTracker']
+__all__ = ['ArrivalGate', 'DEFAULT_REGION', 'MouseTracker']
 _log = logging.getLogger("tracking")
 
+# ID of the region set with MouseTracker.region
+DEFAULT_REGION = "default"
+
 
 class MouseTracker(metaclass=ABCMeta):
-    """Mouse tracking abstract base class."""
-    def __init__(self, region=None):
+    """Mouse tracking abstract base class.
+
+    The tracker watches a set of named regions, and publishes which one the cursor enters or
+    leaves.  The :attr:`region` property is a shortcut for a single region named
+    :data:`DEFAULT_REGION`.
+
+    Each tracker watches one X screen; the enter and leave signals carry its screen number, so
+    one process can run a tracker per screen.
+    """
+    def __init__(self, region=None, screen_num=0):
         """
         Initialize a MouseTracker.
 
         :param Rect region: The region to track
+        :param int screen_num: the X screen (root window) number to track
         """
-        self._region = region
+        self.screen_num = screen_num
+        self._index = RegionGrid({DEFAULT_REGION: region} if region is not None else None)
+        # The last point is kept as ints, and only built into a Point when it's asked for.
+        self._x = None
+        self._y = None
         self._last_point = None
-        self._in_region = False
+        self._region_id = None
+        self._gate = None
 
     @abstractmethod
     def start(self):
         """
         Start the mouse tracker.
 
-        While the mouse tracker is running, it should update the :attr:`last_point` property
-        with the latest mouse cursor position.
+        While the mouse tracker is running, it should update the :attr:`last_point` property, or
+        call :meth:`update_point`, with the latest mouse cursor position.
         """
 
     @abstractmethod
@@ -51,32 +71,115 @@ class MouseTracker(metaclass=ABCMeta):
 
     @property
     def region(self):
-        """Get the region of interest."""
-        return self._region
+        """Get the default region of interest."""
+        return self._index.get(DEFAULT_REGION)
 
     @region.setter
     def region(self, region):
-        """Set the region of interest."""
-        assert (region is None) or callable(region.contains)
-        self._region = region
+        """Set the default region of interest, replacing any other regions."""
+        self.regions = {DEFAULT_REGION: region} if region is not None else {}
+
+    @property
+    def regions(self):
+        """Get a dict of region ID to region of interest."""
+        return self._index.regions
+
+    @regions.setter
+    def regions(self, regions):
+        """
+        Set the regions of interest.
+
+        :param dict regions: region ID to Rect.  Where regions overlap, the first one wins.
+        """
+        assert all(callable(region.contains) for region in regions.values())
+        if regions == self._index.regions:
+            return
+        self._index = RegionGrid(regions)
+        if self._gate is not None:
+            self._gate.reset()
         self._update_in_region()
 
+    def set_region(self, region_id, region):
+        """
+        Add, replace or remove a single region of interest.
+
+        :param region_id: the region ID
+        :param Rect region: the region, or None to remove it
+        """
+        regions = self._index.regions
+        if region is None:
+            regions.pop(region_id, None)
+        else:
+            regions[region_id] = region
+        self.regions = regions
+
+    def region_at(self, point):
+        """
+        Find the region of interest containing a point.
+
+        :param Point point: the point to look up
+        :return: the region ID, or None if the point isn't in any region
+        """
+        return self._index.lookup(point.x, point.y)
+
     @property
     def last_point(self):
         """Get the last cursor point."""
+        if (self._last_point is None) and (self._x is not None):
+            self._last_point = Point(self._x, self._y)
         return self._last_point
 
     @last_point.setter
     def last_point(self, point):
         """Set the last cursor point."""
         assert (point is None) or (hasattr(point, 'x') and hasattr(point, 'y'))
-        self._last_point = point
+        if point is None:
+            self._x = self._y = None
+            self._last_point = None
+            self._update_in_region()
+        else:
+            self.update_point(point.x, point.y)
+            self._last_point = point
+
+    def update_point(self, x, y):
+        """
+        Set the last cursor point from integer coordinates.
+
+        This is the motion event fast path: no Point is built unless :attr:`last_point` is read.
+
+        :param int x: the cursor X coordinate
+        :param int y: the cursor Y coordinate
+        """
+        self._x = x
+        self._y = y
+        self._last_point = None
+        if (self._gate is not None) and self._gate.can_skip(x, y):
+            return
         self._update_in_region()
 
+    @property
+    def max_speed(self):
+        """Get the maximum pointer speed used to skip region tests, or None if disabled."""
+        return self._gate.max_speed if self._gate is not None else None
+
+    @max_speed.setter
+    def max_speed(self, max_speed):
+        """
+        Set the maximum pointer speed used to skip region tests.
+
+        :param float max_speed: the maximum speed in pixels per second, or None to disable
+        """
+        self._gate = ArrivalGate(max_speed) if max_speed else None
+
     @property
     def in_region(self):
-        """Check if the current cursor point is within the region of interest."""
-        return self._in_region
+        """Check if the current cursor point is within a region of interest."""
+        return self._region_id is not None
+
+    @property
+    def region_id(self):
+        """Get the ID of the region containing the current cursor point, or None."""
+        return self._region_id
 
     def on_scroll_up(self):
         """
@@ -94,26 +197,105 @@ class MouseTracker(metaclass=ABCMeta):
         _log.debug("Scrolled down")
         smokesignal.emit(signals.SCROLL_DOWN)
 
+    def on_scroll(self, amount):
+        """
+        Subclasses should call this when the scroll wheel has been grabbed, and a smooth scroll
+        event has occurred.
+
+        :param float amount: amount scrolled up, in wheel clicks (negative for down)
+        """
+        _log.debug("Scrolled %.02f", amount)
+        smokesignal.emit(signals.SCROLL, amount)
+
     def _update_in_region(self):
         """
-        Update whether the point is in the region of interest.
+        Update which region of interest the point is in.
 
-        If the point has moved in or out of the region, publish a notification.
+        If the point has moved in or out of a region, publish a notification with the region ID.
         """
-        was_in_region = self._in_region
+        old_region_id = self._region_id
 
-        # Only test if we have both a point and a region.
-        if None in (self._last_point, self._region):
-            self._in_region = False
+        # Only test if we have a point.
+        x = self._x
+        if x is None:
+            self._region_id = None
         else:
-            self._in_region = self._region.contains(self._last_point)
+            self._region_id = self._index.lookup(x, self._y)
+            # Outside the regions, skip testing again until the pointer could have reached one.
+            if self._gate is None:
+                pass
+            elif (self._region_id is not None) or (self._index.bounds is None):
+                self._gate.reset()
+            else:
+                self._gate.start(x, self._y, self._index.bounds)
 
-        # Check if we entered or left the region.
-        if self._in_region != was_in_region:
-            _log.debug("In region: %s", self._in_region)
+        # Check if we entered or left a region.
+        if self._region_id != old_region_id:
+            _log.debug("In region: %s", self._region_id)
 
-            # Grab the scroll wheel while inside the region.
-            if self._in_region:
-                smokesignal.emit(signals.ENTER_REGION)
-            else:
-                smokesignal.emit(signals.LEAVE_REGION)
+            if old_region_id is not None:
+                smokesignal.emit(signals.LEAVE_REGION, old_region_id, screen_num=self.screen_num)
+            if self._region_id is not None:
+                smokesignal.emit(signals.ENTER_REGION, self._region_id,
+                                 screen_num=self.screen_num)
+
+
+class ArrivalGate:
+    """Skip region tests until the pointer could possibly have reached the region.
+
+    After a point is found outside the region, its distance to the region and the maximum pointer
+    speed give the earliest time the pointer could arrive.  Points before then don't need to be
+    tested, unless the pointer has jumped at least that distance (e.g. it was warped).
+    """
+    def __init__(self, max_speed, clock=time.monotonic):
+        """
+        Initialize a new ArrivalGate.
+
+        :param float max_speed: the maximum pointer speed, in pixels per second
+        :param clock: function returning the current time in seconds
+        """
+        self.max_speed = max_speed
+        self._clock = clock
+        self._origin_x = None
+        self._origin_y = None
+        self._distance = 0
+        self._deadline = 0.0
+        self.skipped = 0
+
+    def reset(self):
+        """Test the next point, e.g. because the region has changed."""
+        self._origin_x = None
+
+    def start(self, x, y, region):
+        """
+        Start skipping tests after a point was found outside a region.
+
+        :param int x: the X coordinate of the point that was tested
+        :param int y: the Y coordinate of the point that was tested
+        :param region: the Rect or Bounds it was tested against
+        """
+        dx = max(region.x1 - x, x - region.x2, 0)
+        dy = max(region.y1 - y, y - region.y2, 0)
+        self._distance = max(dx, dy)
+        self._deadline = self._clock() + self._distance / self.max_speed
+        self._origin_x = x
+        self._origin_y = y
+
+    def can_skip(self, x, y):
+        """
+        Check if testing a point can be skipped.
+
+        :param int x: the new point's X coordinate
+        :param int y: the new point's Y coordinate
+        :return: True if the point can't be in the region
+        """
+        if self._origin_x is None:
+            return False
+        if self._clock() >= self._deadline:
+            return False
+        # Anything that moved at least as far as the region might be in it.
+        if (abs(x - self._origin_x) >= self._distance or
+                abs(y - self._origin_y) >= self._distance):
+            return False
+        self.skipped += 1
+        return True
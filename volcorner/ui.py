@@ -21,10 +21,11 @@ class UI(metaclass=ABCMeta):
         """Call asyncio.set_event_loop with the event loop for this UI."""
 
     @abstractmethod
-    def install_event_filter(self, event_filter):
+    def install_event_filter(self, event_filter, event_types=None):
         """Install an event filter.
 
         :param event_filter: platform-specific event filter (e.g. QAbstractNativeEventFilter)
+        :param event_types: platform-specific event types to filter, or None for all events
         """
 
     @abstractmethod
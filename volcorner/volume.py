@@ -0,0 +1,109 @@
+"""Write-behind volume changes."""
+
+import asyncio
+import logging
+import time
+
+__all__ = ['VolumeWriter']
+_log = logging.getLogger("audio")
+
+# Minimum seconds between writes to the mixer
+WRITE_INTERVAL = 0.1
+
+
+class VolumeWriter:
+    """Coalesce volume changes in memory before writing them to the mixer.
+
+    Each change updates the target volume right away, but the mixer is only written on a later
+    event loop iteration, and at most once per write interval.  A burst of scroll events only
+    writes the newest target, instead of one ALSA write (and one mixer event back) per click.
+    """
+    def __init__(self, mixer, interval=WRITE_INTERVAL, loop=None, clock=time.monotonic):
+        """
+        Initialize a new VolumeWriter.
+
+        :param volcorner.mixer.Mixer mixer: the mixer to write to
+        :param float interval: minimum seconds between writes
+        :param loop: asyncio event loop for the write timer, or None for the current event loop
+        :param clock: function returning the current time in seconds
+        """
+        self._mixer = mixer
+        self.interval = interval
+        self._loop = loop
+        self._clock = clock
+        self._target = None
+        self._handle = None
+        self._last_write = None
+        self.changes = 0
+        self.writes = 0
+
+    @property
+    def volume(self):
+        """Get the target volume, or the mixer's volume if nothing is waiting to be written."""
+        if self._target is not None:
+            return self._target
+        return self._mixer.volume
+
+    @property
+    def pending(self):
+        """Check if a volume is waiting to be written."""
+        return self._target is not None
+
+    def change(self, delta):
+        """
+        Change the volume relative to the target volume.
+
+        :param float delta: the amount to change the volume by
+        :return: the new target volume
+        """
+        return self.set(self.volume + delta)
+
+    def set(self, value, interval=None):
+        """
+        Set the target volume, and schedule it to be written.
+
+        :param float value: the new volume, clamped between 0.0 and 1.0
+        :param float interval: minimum seconds since the last write, or None for the writer's
+                               interval
+        :return: the new target volume
+        """
+        value = max(0.0, min(1.0, value))
+        self._target = value
+        self.changes += 1
+        if self._handle is None:
+            delay = 0
+            if self._last_write is not None:
+                if interval is None:
+                    interval = self.interval
+                delay = max(0, self._last_write + interval - self._clock())
+            loop = self._loop or asyncio.get_event_loop()
+            self._handle = loop.call_later(delay, self._on_write_ready)
+        return value
+
+    def flush(self):
+        """Write the target volume now."""
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        target, self._target = self._target, None
+        if (target is None) or (target == self._mixer.volume):
+            return
+        _log.debug("Writing volume %.02f", target)
+        self._mixer.volume = target
+        self._last_write = self._clock()
+        self.writes += 1
+
+    def cancel(self):
+        """Drop the target volume without writing it."""
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        self._target = None
+
+    def log_stats(self):
+        """Log the write counters."""
+        _log.debug("%d volume changes, %d mixer writes", self.changes, self.writes)
+
+    def _on_write_ready(self):
+        self._handle = None
+        self.flush()
@@ -0,0 +1,108 @@
+"""Base class for event-armed XInput2 mouse trackers."""
+
+from abc import ABCMeta, abstractmethod
+import logging
+
+from volcorner.x11.xinput2tracker import XInput2MouseTracker
+
+__all__ = ['ArmedMouseTracker']
+_log = logging.getLogger("tracking")
+
+
+class ArmedMouseTracker(XInput2MouseTracker, metaclass=ABCMeta):
+    """XInput2 mouse tracker that only tracks motion while the pointer is inside the region.
+
+    While the pointer is outside the region of interest, the tracker is "armed": subclasses set up
+    something the X server watches for us, and report the entry point with :attr:`last_point`.
+    No motion events are selected, so we aren't woken up while the pointer is elsewhere.  Once the
+    pointer is inside, the tracker is disarmed and motion events are selected until the pointer
+    leaves the region.
+
+    Only the default :attr:`region` is armed.
+    """
+    def __init__(self, ui, raw_motion=False, screen_num=0):
+        """
+        Initialize a new ArmedMouseTracker.
+
+        :param volcorner.ui.XCBUI ui: UI to install an event handler and get XCB connection from
+        :param bool raw_motion: True to track raw motion events with QueryPointer
+        :param int screen_num: the X screen (root window) number to track
+        """
+        super().__init__(ui, raw_motion, screen_num=screen_num)
+        self._tracking_motion = False
+
+    def start(self):
+        self._load_root()
+        self._conn.xinput = self._load_xinput()
+        self._setup()
+        self._select_motion_events(False)
+
+        # Listen for input events.
+        self._ui.install_event_filter(self.on_event, self._event_types())
+        self._is_listening = True
+        self._update_armed()
+        self._conn.batcher.flush()
+
+    def stop(self):
+        if not self._is_listening:
+            return
+
+        super().stop()
+        if self._tracking_motion:
+            self._select_motion_events(False)
+        self._teardown()
+        self._conn.batcher.flush()
+        self._tracking_motion = False
+        self._is_listening = False
+
+    @abstractmethod
+    def _setup(self):
+        """Prepare X resources when the tracker is started."""
+
+    @abstractmethod
+    def _teardown(self):
+        """Release X resources when the tracker is stopped."""
+
+    @abstractmethod
+    def _arm(self, region):
+        """
+        Wait for the pointer to enter a region.
+
+        This is called again whenever the region changes, so it should do nothing if it's already
+        armed for this region.
+
+        :param Rect region: the region to watch
+        :return: True if any requests were sent
+        """
+
+    @abstractmethod
+    def _disarm(self):
+        """
+        Stop waiting for the pointer to enter the region.
+
+        :return: True if any requests were sent
+        """
+
+    def _update_in_region(self):
+        super()._update_in_region()
+        if self._is_listening:
+            self._update_armed()
+
+    def _update_armed(self):
+        """Switch between waiting for the pointer to enter and tracking motion."""
+        if self.in_region:
+            if not self._tracking_motion:
+                _log.debug("Pointer is inside the region, tracking motion")
+                self._disarm()
+                self._select_motion_events(True)
+                self._tracking_motion = True
+        elif self.region is None:
+            if self._disarm():
+                self._conn.batcher.flush_soon()
+        else:
+            if self._tracking_motion:
+                _log.debug("Pointer left the region, waiting for it to enter again")
+                self._select_motion_events(False)
+                self._tracking_motion = False
+            if self._arm(self.region):
+                self._conn.batcher.flush_soon()
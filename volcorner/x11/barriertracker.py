@@ -0,0 +1,165 @@
+"""Pointer barrier mouse tracker."""
+
+import logging
+
+import xcffib
+import xcffib.xfixes
+from xcffib.xfixes import BarrierDirections
+from xcffib.xinput import BarrierHitEvent, BarrierLeaveEvent, XIEventMask
+from volcorner.logging import TRACE
+from volcorner.x11.armedtracker import ArmedMouseTracker
+from volcorner.x11.scroll import fp3232_to_float
+
+__all__ = ['BarrierMouseTracker']
+_log = logging.getLogger("tracking")
+
+
+class BarrierMouseTracker(ArmedMouseTracker):
+    """Mouse tracker that waits for the pointer to push against barriers at the screen corner.
+
+    While the pointer is outside the region of interest, XFixes pointer barriers are placed along
+    the two screen edges of the region, and only XInput 2.3 barrier events are selected.  Each
+    push against a barrier adds its motion delta to the barrier "pressure", and the region is
+    entered once the pressure reaches the threshold.  Once the pointer is inside, the barriers are
+    removed and motion events are selected until the pointer leaves the region.
+    """
+    # Barrier events were added in XInput 2.3
+    xinput_version = (2, 3)
+    # Pointer barriers were added in XFixes 5
+    xfixes_version = (5, 0)
+
+    def __init__(self, ui, corner, threshold=0, raw_motion=False, screen_num=0):
+        """
+        Initialize a new BarrierMouseTracker.
+
+        :param volcorner.ui.XCBUI ui: UI to install an event handler and get XCB connection from
+        :param Corner corner: the screen corner the region is in
+        :param float threshold: pressure, in pixels, to push against a barrier before entering
+        :param bool raw_motion: True to track raw motion events with QueryPointer
+        :param int screen_num: the X screen (root window) number to track
+        """
+        super().__init__(ui, raw_motion, screen_num)
+        self._corner = corner
+        self._threshold = threshold
+        self._barriers = []
+        self._barrier_rect = None
+        self._hit_id = None
+        self._pressure = 0.0
+
+    @property
+    def pressure(self):
+        """Get the accumulated pressure against the barriers since the pointer last hit them."""
+        return self._pressure
+
+    @classmethod
+    def extension_versions(cls):
+        return super().extension_versions() + [(xcffib.xfixes.key, cls.xfixes_version)]
+
+    def _setup(self):
+        """Load XFixes for pointer barriers."""
+        self._conn.xfixes = self._load_xfixes()
+
+    def _teardown(self):
+        """Remove any barriers."""
+        self._disarm()
+
+    def _other_events(self):
+        return super()._other_events() | XIEventMask.BarrierHit | XIEventMask.BarrierLeave
+
+    def _event_types(self):
+        return super()._event_types() + [BarrierHitEvent, BarrierLeaveEvent]
+
+    def _load_xfixes(self):
+        """Return the XFixes extension, checking for pointer barrier support.
+
+        Throw a ValueError if there is a problem.
+
+        """
+        xfixes_major, xfixes_minor = self.xfixes_version
+        try:
+            xfixes = self._conn(xcffib.xfixes.key)
+            reply = self._conn.versions.reply(xcffib.xfixes.key, self.xfixes_version)
+        except:
+            _log.error("Failed to get XFixes 5", exc_info=True)
+            raise ValueError("XFixes 5 is required.")
+        if reply.major_version < xfixes_major:
+            _log.error("Need XFixes 5, but only %d.%d is available", reply.major_version,
+                       reply.minor_version)
+            raise ValueError("XFixes 5 is required.")
+        return xfixes
+
+    def _arm(self, region):
+        """Place barriers along the screen edges of a region."""
+        if self._barriers and region == self._barrier_rect:
+            return False
+        self._disarm()
+
+        # Barriers block motion towards the screen edge, right on the edge itself.
+        if self._corner.x_direction > 0:
+            x, x_directions = region.x1, BarrierDirections.PositiveX
+        else:
+            x, x_directions = region.x2 + 1, BarrierDirections.NegativeX
+        if self._corner.y_direction > 0:
+            y, y_directions = region.y1, BarrierDirections.PositiveY
+        else:
+            y, y_directions = region.y2 + 1, BarrierDirections.NegativeY
+        _log.debug("Placing barriers at x=%d and y=%d", x, y)
+        self._create_barrier(x, region.y1, x, region.y2 + 1, x_directions)
+        self._create_barrier(region.x1, y, region.x2 + 1, y, y_directions)
+        self._barrier_rect = region
+        return True
+
+    def _disarm(self):
+        """Remove the barriers."""
+        if not self._barriers:
+            return False
+        for barrier in self._barriers:
+            self._conn.xfixes.DeletePointerBarrier(barrier)
+        self._barriers = []
+        self._barrier_rect = None
+        self._reset_pressure()
+        return True
+
+    def _create_barrier(self, x1, y1, x2, y2, directions):
+        """Create a pointer barrier on the root window for all devices."""
+        barrier = self._conn.generate_id()
+        self._conn.xfixes.CreatePointerBarrier(barrier, self._root, x1, y1, x2, y2, directions,
+                                               0, [])
+        self._barriers.append(barrier)
+
+    def _reset_pressure(self):
+        """Forget the pressure from the last barrier hit."""
+        self._hit_id = None
+        self._pressure = 0.0
+
+    def on_event(self, event):
+        """Handle an X event."""
+        if isinstance(event, BarrierHitEvent):
+            self._on_barrier_hit(event)
+        elif isinstance(event, BarrierLeaveEvent):
+            _log.log(TRACE, "Barrier leave event %d", event.eventid)
+            self._reset_pressure()
+        else:
+            super().on_event(event)
+
+    def _on_barrier_hit(self, event):
+        """Add a barrier hit to the pressure, and enter the region once it's high enough."""
+        if event.barrier not in self._barriers:
+            return
+        # Each new approach to the barrier has a new event ID.
+        if event.eventid != self._hit_id:
+            self._hit_id = event.eventid
+            self._pressure = 0.0
+
+        # Only the motion into the barrier counts towards its pressure.
+        if event.barrier == self._barriers[0]:
+            delta = fp3232_to_float(event.dx)
+        else:
+            delta = fp3232_to_float(event.dy)
+        self._pressure += abs(delta)
+        _log.log(TRACE, "Barrier hit event %d, pressure %.02f", event.eventid, self._pressure)
+
+        if self._pressure >= self._threshold:
+            # Barrier event root coordinates are FP1616 fixed point.
+            _log.debug("Barrier pressure %.02f reached threshold", self._pressure)
+            self.update_point(event.root_x >> 16, event.root_y >> 16)
@@ -0,0 +1,233 @@
+"""X event dispatching and coalescing."""
+
+import asyncio
+import logging
+
+from xcffib import ffi
+from xcffib.xproto import GeGenericEvent, MotionNotifyEvent
+from xcffib.xinput import MotionEvent, RawMotionEvent
+from volcorner.logging import TRACE
+
+__all__ = ['EventCoalescer', 'EventDispatcher', 'event_key', 'is_motion_event', 'raw_event_key']
+_log = logging.getLogger("events")
+
+# Response type of GenericEvent, which carries extension events like XInput2's
+GE_GENERIC = 35
+
+# Events that only report a new pointer position.  Unhoisted XInput2 events arrive as
+# GeGenericEvent, and the only ones we select are motion events.
+MOTION_EVENTS = (MotionEvent, RawMotionEvent, MotionNotifyEvent, GeGenericEvent)
+
+
+def is_motion_event(event):
+    """Check if an event only reports a new pointer position."""
+    return isinstance(event, MOTION_EVENTS)
+
+
+class EventCoalescer:
+    """Collapse runs of consecutive motion events into the latest one.
+
+    Motion events are held back until a non-motion event arrives, or until the batch is flushed.
+    Any other event flushes the pending motion events first, so event ordering is preserved and
+    no other events are ever dropped.  Each XInput2 master device keeps its own latest motion
+    event, so several pointers (MPX) don't hide each other.
+    """
+    def __init__(self, dispatch):
+        """
+        Initialize a new EventCoalescer.
+
+        :param dispatch: function to call with each event that survives coalescing
+        """
+        self._dispatch = dispatch
+        self._pending = {}
+        self._batch_coalesced = 0
+        self._flush_scheduled = False
+        self.coalesced = 0
+
+    def push(self, event):
+        """
+        Add an event to the current batch.
+
+        :param event: the hoisted xcffib event
+        :return: the dispatch result, or None if the event was held back
+        """
+        if is_motion_event(event):
+            # Move the device to the end, so pending events are flushed in arrival order.
+            device = getattr(event, 'deviceid', None)
+            if self._pending.pop(device, None) is not None:
+                self._batch_coalesced += 1
+            self._pending[device] = event
+            return None
+        else:
+            self.flush()
+            return self._dispatch(event)
+
+    def flush(self):
+        """Dispatch the pending motion events, if any."""
+        self._flush_scheduled = False
+        if not self._pending:
+            return
+        events = list(self._pending.values())
+        self._pending.clear()
+        if self._batch_coalesced:
+            _log.log(TRACE, "Coalesced %d motion events", self._batch_coalesced)
+            self.coalesced += self._batch_coalesced
+            self._batch_coalesced = 0
+        for event in events:
+            self._dispatch(event)
+
+    def flush_soon(self):
+        """Flush the pending motion events on the next event loop iteration."""
+        if self._pending and not self._flush_scheduled:
+            self._flush_scheduled = True
+            asyncio.get_event_loop().call_soon(self.flush)
+
+
+def event_key(conn, event_type):
+    """
+    Get the dispatch table key of an event class on a connection.
+
+    :param xcffib.Connection conn: the connection with the extensions set up
+    :param type event_type: the xcffib event class
+    :return: the response_type for core and extension events, or an (extension opcode, evtype)
+             tuple for GenericEvent extension events
+    :raises ValueError: if the connection doesn't know the event
+    """
+    for offset, opcode, events in conn._event_offsets.offsets:
+        for number, cls in events.items():
+            if cls is event_type:
+                if getattr(cls, 'xge', False):
+                    return opcode, number
+                return offset + number
+    raise ValueError("Unknown event type {}".format(event_type.__name__))
+
+
+def raw_event_key(generic_event):
+    """
+    Get the dispatch table key of a raw event, without hoisting it.
+
+    :param generic_event: xcb_generic_event_t pointer
+    :return: the dispatch table key, as from :func:`event_key`
+    """
+    # Events sent with SendEvent have the high bit set.
+    response_type = generic_event.response_type & 0x7F
+    if response_type != GE_GENERIC:
+        return response_type
+    # xcb_ge_generic_event_t has the extension opcode in byte 1, and the evtype in bytes 8-9.
+    extension = ffi.cast("uint8_t *", generic_event)[1]
+    evtype = ffi.cast("uint16_t *", generic_event)[4]
+    return extension, evtype
+
+
+class EventDispatcher:
+    """Route raw XCB events to the event filters that want them.
+
+    Each event filter is installed with the event classes it handles.  Raw events are looked up
+    by response_type, or by extension opcode and evtype for GenericEvents, and only the events
+    that some filter wants are hoisted into xcffib objects.  Filters installed without event
+    classes get every event, which hoists everything.
+
+    Hoisted events go through an :class:`EventCoalescer`, so runs of motion events only dispatch
+    the newest one.
+    """
+    def __init__(self, conn):
+        """
+        Initialize a new EventDispatcher.
+
+        :param xcffib.Connection conn: the connection the events come from
+        """
+        self._conn = conn
+        self._filters = {}
+        self._keys = {}
+        self._by_type = {}
+        self._catch_all = ()
+        self._coalescer = EventCoalescer(self._dispatch)
+        self.hoisted = 0
+        self.skipped = 0
+        self.errors = 0
+
+    @property
+    def coalesced(self):
+        """Get the number of motion events dropped by coalescing."""
+        return self._coalescer.coalesced
+
+    def install(self, event_filter, event_types=None):
+        """
+        Install an event filter.
+
+        :param event_filter: function to call with each hoisted event it wants
+        :param event_types: iterable of xcffib event classes to receive, or None for all events
+        """
+        self._filters[event_filter] = tuple(event_types) if event_types is not None else None
+        self._build_tables()
+
+    def remove(self, event_filter):
+        """
+        Remove an event filter.
+
+        :param event_filter: event_filter that was passed to install()
+        :raises KeyError: if the event filter isn't installed
+        """
+        del self._filters[event_filter]
+        self._build_tables()
+
+    def wants(self, generic_event):
+        """
+        Check if any event filter wants a raw event.
+
+        :param generic_event: xcb_generic_event_t pointer
+        """
+        return bool(self._catch_all) or (raw_event_key(generic_event) in self._keys)
+
+    def push(self, generic_event):
+        """
+        Hoist and dispatch a raw event, if any event filter wants it.
+
+        :param generic_event: xcb_generic_event_t pointer
+        :return: True if an event filter handled the event
+        """
+        if generic_event.response_type == 0:
+            # Unchecked requests, like grabs, barriers and pipelined queries, report errors here.
+            error = ffi.cast("xcb_generic_error_t *", generic_event)
+            self.errors += 1
+            _log.warning("X error %d on request %d.%d (sequence %d, resource 0x%x)",
+                         error.error_code, error.major_code, error.minor_code, error.sequence,
+                         error.resource_id)
+            return False
+        if not self.wants(generic_event):
+            self.skipped += 1
+            return False
+        self.hoisted += 1
+        return bool(self._coalescer.push(self._conn.hoist_event(generic_event)))
+
+    def flush(self):
+        """Dispatch any coalesced motion events now."""
+        self._coalescer.flush()
+
+    def flush_soon(self):
+        """Dispatch any coalesced motion events on the next event loop iteration."""
+        self._coalescer.flush_soon()
+
+    def log_stats(self):
+        """Log the event counters."""
+        _log.debug("Hoisted %d events, skipped %d, coalesced %d motion events, %d X errors",
+                   self.hoisted, self.skipped, self.coalesced, self.errors)
+
+    def _dispatch(self, event):
+        """Dispatch a hoisted event to the filters that want it."""
+        handled = False
+        for event_filter in self._by_type.get(type(event), self._catch_all):
+            if event_filter(event):
+                handled = True
+        return handled
+
+    def _build_tables(self):
+        """Rebuild the lookup tables from the installed filters."""
+        catch_all = tuple(f for f, event_types in self._filters.items() if event_types is None)
+        by_type = {}
+        for event_filter, event_types in self._filters.items():
+            for event_type in event_types or ():
+                by_type.setdefault(event_type, list(catch_all)).append(event_filter)
+        self._catch_all = catch_all
+        self._by_type = {event_type: tuple(filters) for event_type, filters in by_type.items()}
+        self._keys = {event_key(self._conn, event_type) for event_type in by_type}
@@ -0,0 +1,315 @@
+"""Non-blocking XCB request helpers."""
+
+import asyncio
+import logging
+
+import xcffib
+from xcffib import c_free, ffi, lib
+
+__all__ = ['AtomCache', 'RequestBatcher', 'VersionCache', 'negotiate', 'poll_for_reply',
+           'setup_connection']
+_log = logging.getLogger("x11")
+
+# Seconds to wait before checking for request errors again
+CHECK_RETRY = 0.01
+
+
+def setup_connection(conn):
+    """
+    Attach the request helpers to a new connection.
+
+    :param xcffib.Connection conn: the connection
+    :return: the connection
+    """
+    conn.batcher = RequestBatcher(conn)
+    conn.versions = VersionCache(conn)
+    conn.atoms = AtomCache(conn)
+    return conn
+
+
+def negotiate(conn, versions=(), atoms=()):
+    """
+    Negotiate extension versions and intern atoms, with one round-trip for all of them.
+
+    All the requests are sent before waiting for any reply, and the replies are cached on the
+    connection.  Failures aren't raised here, but when the reply is asked for.
+
+    :param xcffib.Connection conn: a connection set up with :func:`setup_connection`
+    :param versions: (extension key, (major, minor)) pairs to query
+    :param atoms: atom names to intern
+    """
+    for key, version in versions:
+        conn.versions.request(key, version)
+    conn.atoms.prefetch(*atoms)
+    conn.versions.collect()
+    conn.atoms.collect()
+
+
+def poll_for_reply(cookie):
+    """
+    Check if the reply to a request has arrived, without blocking.
+
+    :param xcffib.Cookie cookie: cookie from the request
+    :raises xcffib.ProtocolException: if the request failed
+    :return: (done, reply) tuple.  done is False if the reply hasn't arrived yet.  reply is None
+             for requests without a reply.
+    """
+    conn = cookie.conn
+    reply_p = ffi.new("void **")
+    error_p = ffi.new("xcb_generic_error_t **")
+    if not lib.xcb_poll_for_reply(conn._conn, cookie.sequence, reply_p, error_p):
+        return False, None
+
+    if error_p[0] != ffi.NULL:
+        try:
+            conn._process_error(error_p[0])
+        finally:
+            c_free(error_p[0])
+
+    if reply_p[0] == ffi.NULL:
+        return True, None
+    data = ffi.gc(reply_p[0], c_free)
+    if cookie.reply_type is None:
+        return True, None
+    reply = ffi.cast("xcb_generic_reply_t *", data)
+    # See xcffib.Connection.wait_for_reply() for the reply size.
+    return True, cookie.reply_type(xcffib.CffiUnpacker(data, known_max=32 + reply.length * 4))
+
+
+class RequestBatcher:
+    """Flush requests once per event loop iteration, and check them for errors without blocking.
+
+    XCB buffers requests until the connection is flushed.  Instead of flushing after each change,
+    the tracker, screen and UI call :meth:`flush_soon`, so all the requests sent during one event
+    loop iteration go out in one write.
+
+    Checked void requests are passed to :meth:`check` instead of blocking on
+    ``cookie.check()``.  A GetInputFocus request follows them as a sync marker; once its reply has
+    arrived, the server has processed everything before it, and any errors are collected and
+    logged.
+
+    One batcher is attached to each connection as ``conn.batcher``.
+    """
+    def __init__(self, conn):
+        """
+        Initialize a new RequestBatcher.
+
+        :param xcffib.Connection conn: the connection to batch requests on
+        """
+        self._conn = conn
+        self._flush_handle = None
+        self._checks = []
+        self._need_marker = False
+        self._marker = None
+        self._check_handle = None
+        self.flush_requests = 0
+        self.flushes = 0
+        self.errors = 0
+
+    def flush_soon(self):
+        """Flush the connection at the end of this event loop iteration."""
+        self.flush_requests += 1
+        if self._flush_handle is None:
+            self._flush_handle = asyncio.get_event_loop().call_soon(self.flush)
+
+    def flush(self):
+        """Flush the connection now."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if self._need_marker:
+            self._send_marker()
+        self._conn.flush()
+        self.flushes += 1
+
+    def check(self, cookie, description):
+        """
+        Check a checked void request for errors in the background.
+
+        :param xcffib.VoidCookie cookie: cookie from a request sent with is_checked=True
+        :param str description: what the request does, for the error log
+        """
+        self._checks.append((cookie, description))
+        self._need_marker = True
+        self.flush_soon()
+
+    def close(self):
+        """Flush any queued requests, and stop checking for errors."""
+        self.flush()
+        if self._check_handle is not None:
+            self._check_handle.cancel()
+            self._check_handle = None
+        for cookie, _ in self._checks:
+            cookie.discard_reply()
+        self._checks = []
+        if self._marker is not None:
+            self._marker.discard_reply()
+            self._marker = None
+        _log.debug("Flushed %d times for %d flush requests, %d request errors", self.flushes,
+                   self.flush_requests, self.errors)
+
+    def _send_marker(self):
+        """Send a request with a reply after the checked requests."""
+        if self._marker is not None:
+            self._marker.discard_reply()
+        self._marker = self._conn.core.GetInputFocus()
+        self._need_marker = False
+        if self._check_handle is None:
+            self._check_handle = asyncio.get_event_loop().call_later(CHECK_RETRY,
+                                                                     self._collect_errors)
+
+    def _collect_errors(self):
+        """Log the errors of checked requests that the server has processed."""
+        self._check_handle = None
+        if self._marker is None:
+            return
+        done, _ = poll_for_reply(self._marker)
+        if not done:
+            self._check_handle = asyncio.get_event_loop().call_later(CHECK_RETRY,
+                                                                     self._collect_errors)
+            return
+
+        sequence = self._marker.sequence
+        self._marker = None
+        remaining = []
+        for cookie, description in self._checks:
+            if cookie.sequence > sequence:
+                remaining.append((cookie, description))
+                continue
+            try:
+                poll_for_reply(cookie)
+            except xcffib.XcffibException:
+                self.errors += 1
+                _log.error("Failed to %s", description, exc_info=True)
+        self._checks = remaining
+
+
+class VersionCache:
+    """Extension version query replies for a connection.
+
+    Each extension's version is queried once, and the reply is shared by everything that needs
+    the extension.  It's only queried again when a higher version is required.
+    """
+    def __init__(self, conn):
+        """
+        Initialize a new VersionCache.
+
+        :param xcffib.Connection conn: the connection to query
+        """
+        self._conn = conn
+        self._requested = {}
+        self._cookies = {}
+        self._replies = {}
+
+    def request(self, key, version):
+        """
+        Send a version query for an extension without waiting for the reply.
+
+        :param key: the xcffib extension key
+        :param version: (major, minor) version the client supports
+        """
+        if self._requested.get(key, (0, 0)) >= version:
+            return
+        self._requested[key] = version
+        self._replies.pop(key, None)
+        try:
+            extension = self._conn(key)
+            # XInput calls it XIQueryVersion.
+            query = getattr(extension, 'XIQueryVersion', None) or extension.QueryVersion
+            self._cookies[key] = query(*version)
+        except Exception as e:
+            self._cookies.pop(key, None)
+            self._replies[key] = e
+
+    def reply(self, key, version):
+        """
+        Get the version query reply for an extension.
+
+        :param key: the xcffib extension key
+        :param version: (major, minor) version the client supports
+        :raises Exception: if the extension is missing or the query failed
+        :return: the QueryVersion reply
+        """
+        self.request(key, version)
+        self._collect(key)
+        reply = self._replies[key]
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+
+    def collect(self):
+        """Wait for all the outstanding replies."""
+        for key in list(self._cookies):
+            self._collect(key)
+
+    def _collect(self, key):
+        cookie = self._cookies.pop(key, None)
+        if cookie is None:
+            return
+        try:
+            self._replies[key] = cookie.reply()
+        except Exception as e:
+            self._replies[key] = e
+
+
+class AtomCache:
+    """Interned atoms for a connection."""
+    def __init__(self, conn):
+        """
+        Initialize a new AtomCache.
+
+        :param xcffib.Connection conn: the connection to intern atoms on
+        """
+        self._conn = conn
+        self._cookies = {}
+        self._atoms = {}
+        self._names = {}
+
+    def prefetch(self, *names):
+        """
+        Send InternAtom requests without waiting for the replies.
+
+        :param str names: the atom names
+        """
+        for name in names:
+            if (name not in self._atoms) and (name not in self._cookies):
+                self._cookies[name] = self._conn.core.InternAtom(False, len(name), name)
+
+    def get(self, name):
+        """
+        Get an atom, interning it if it isn't cached yet.
+
+        :param str name: the atom name
+        :return: the atom
+        :rtype: int
+        """
+        atom = self._atoms.get(name)
+        if atom is None:
+            self.prefetch(name)
+            atom = self._atoms[name] = self._cookies.pop(name).reply().atom
+            self._names[atom] = name
+        return atom
+
+    def names(self, atoms):
+        """
+        Get the names of atoms, sending one request for each atom that isn't cached yet.
+
+        :param atoms: the atoms
+        :return: list of atom names
+        """
+        cookies = {atom: self._conn.core.GetAtomName(atom) for atom in set(atoms)
+                   if atom not in self._names}
+        for atom, cookie in cookies.items():
+            name = cookie.reply().name.to_string()
+            self._names[atom] = name
+            self._atoms[name] = atom
+        return [self._names[atom] for atom in atoms]
+
+    def collect(self):
+        """Wait for all the outstanding replies."""
+        for name in list(self._cookies):
+            try:
+                self.get(name)
+            except xcffib.XcffibException:
+                # get() will try again.
+                _log.debug("Failed to intern atom %s", name, exc_info=True)
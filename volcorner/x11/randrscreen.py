@@ -1,62 +1,109 @@
 """XRandR screen monitor."""
 
+import asyncio
 import logging
 
 import xcffib
 import xcffib.xproto
 import xcffib.randr
 from xcffib.randr import ScreenChangeNotifyEvent
-from volcorner.rect import Size
-from volcorner.screen import Screen
+from volcorner.rect import Rect, Size
+from volcorner.screen import Monitor, Screen
 
 __all__ = ['RandRScreen']
 _log = logging.getLogger("screen")
 
+# Seconds to wait for screen change notifications to stop before updating the geometry
+SCREEN_SETTLE_TIME = 0.1
+
 
 class RandRScreen(Screen):
-    def __init__(self, ui):
+    """RandR screen monitor.
+
+    With RandR 1.5, the monitor table is fetched with GetMonitors when the screen is opened, and
+    again once screen change notifications settle.  Monitor lookups only read the cached table.
+
+    Changing the layout sends a burst of notifications, so they're debounced: the geometry is
+    only updated once no notification has arrived for the settle time, and listeners are only
+    notified if the size or monitors actually changed.
+    """
+    # Minimum RandR version required
+    randr_version = (1, 4)
+    # RandR version with GetMonitors
+    monitors_version = (1, 5)
+
+    def __init__(self, ui, screen_num=0, settle_time=SCREEN_SETTLE_TIME, loop=None):
         """Initialize a new RandRScreen.
 
         The given UI will be used for its xcb_connection to load the RandR extension,   
 
         :param volcorner.ui.XCBUI ui: UI to attach to
+        :param int screen_num: the X screen (root window) number to monitor
+        :param float settle_time: seconds to wait for screen change notifications to stop
+        :param loop: asyncio event loop for the settle timer, or None for the current event loop
         """
         self._ui = ui
         self._conn = ui.xcb_connection
+        self.screen_num = screen_num
         self._root = None
         self._size = None
+        self._has_monitors = False
+        self._monitors = ()
         self._opened_connection = False
         self._listening = False
+        self.settle_time = settle_time
+        self._loop = loop
+        self._settle_timer = None
+        self._pending_size = None
+        self.notifications = 0
+        self.updates = 0
 
     def open(self):
         # Connect to X server and load extensions.
-        self._root = self._conn.setup.roots[0].root
+        screen = self._conn.setup.roots[self.screen_num]
+        self._root = screen.root
         self._conn.randr = self._load_randr()
 
         # Select screen change events.
         self._select_screen_change_events()
 
         # Update the current size.
-        screen = self._conn.setup.roots[0]
         self._size = Size(screen.width_in_pixels, screen.height_in_pixels)
+        self._update_monitors()
 
         # Listen for events.
-        self._ui.install_event_filter(self.handle_event)
+        self._ui.install_event_filter(self.handle_event, [ScreenChangeNotifyEvent])
         self._listening = True
+        self._conn.batcher.flush()
 
     def close(self):
         # Do nothing if already stopped.
         if not self._listening:
             return
 
+        if self._settle_timer is not None:
+            self._settle_timer.cancel()
+            self._settle_timer = None
+        _log.debug("%d screen change notifications, %d geometry updates", self.notifications,
+                   self.updates)
         self._root = None
         self._size = None
+        self._monitors = ()
         self._listening = False
 
     @property
     def size(self):
         return self._size
 
+    @property
+    def monitors(self):
+        return self._monitors
+
+    @classmethod
+    def extension_versions(cls):
+        """Return the (extension key, (major, minor)) versions this screen needs."""
+        return [(xcffib.randr.key, cls.monitors_version)]
+
     def _load_randr(self):
         """
         Load the RandR extension, checking for RandR 1.4.
@@ -65,22 +112,63 @@ class RandRScreen(Screen):
 
         :return: the RandR extension object
         """
-        randr_major, randr_minor = (1, 4)
         try:
             randr = self._conn(xcffib.randr.key)
-            randr.QueryVersion(randr_major, randr_minor).reply()
-            return randr
+            # Ask for GetMonitors, but make do without it.
+            reply = self._conn.versions.reply(xcffib.randr.key, self.monitors_version)
         except:
             _log.error("Failed to get RandR", exc_info=True)
             raise ValueError("RandR is required.")
+        version = (reply.major_version, reply.minor_version)
+        if version < self.randr_version:
+            _log.error("Need RandR %d.%d, but only %d.%d is available", self.randr_version[0],
+                       self.randr_version[1], reply.major_version, reply.minor_version)
+            raise ValueError("RandR {}.{} is required.".format(*self.randr_version))
+        self._has_monitors = version >= self.monitors_version
+        if not self._has_monitors:
+            _log.info("RandR %d.%d has no monitor list, using the whole screen", *version)
+        return randr
 
     def _select_screen_change_events(self):
         """Select screen change events."""
         self._conn.randr.SelectInput(self._root, xcffib.randr.NotifyMask.ScreenChange)
-        self._conn.flush()
+        self._conn.batcher.flush_soon()
+
+    def _update_monitors(self):
+        """Fetch the monitor table."""
+        if not self._has_monitors:
+            return
+        reply = self._conn.randr.GetMonitors(self._root, True).reply()
+        names = self._conn.atoms.names([info.name for info in reply.monitors])
+        self._monitors = tuple(
+            Monitor(name, bool(info.primary), Rect.make(info.x, info.y, info.width, info.height))
+            for name, info in zip(names, reply.monitors))
+        for monitor in self._monitors:
+            _log.debug("Monitor %s%s at %r", monitor.name, " (primary)" if monitor.primary else "",
+                       monitor.rect)
 
     def handle_event(self, event):
         """Handle an X event."""
-        if isinstance(event, ScreenChangeNotifyEvent):
-            self._size = Size(event.width, event.height)
-            self.on_resolution_changed(self._size)
+        # Every screen's notifications come through the same connection.
+        if isinstance(event, ScreenChangeNotifyEvent) and event.root == self._root:
+            self.notifications += 1
+            self._pending_size = Size(event.width, event.height)
+            # Restart the settle timer, so a burst of notifications only updates once.
+            if self._settle_timer is not None:
+                self._settle_timer.cancel()
+            loop = self._loop or asyncio.get_event_loop()
+            self._settle_timer = loop.call_later(self.settle_time, self._settle)
+
+    def _settle(self):
+        """Update the geometry once screen change notifications have stopped."""
+        self._settle_timer = None
+        if not self._listening:
+            return
+        old = (self._size, self._monitors)
+        self._size = self._pending_size
+        self._update_monitors()
+        if (self._size, self._monitors) == old:
+            _log.debug("Screen geometry is unchanged")
+            return
+        self.updates += 1
+        self.on_resolution_changed(self._size)
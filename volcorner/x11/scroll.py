@@ -0,0 +1,147 @@
+"""XInput2 smooth scrolling."""
+
+from xcffib.xinput import DeviceClassType, ScrollType
+
+__all__ = ['SmoothScroll', 'fp3232_to_float', 'valuator_values']
+
+# Smallest scroll amount to report, in wheel clicks
+SCROLL_QUANTUM = 0.2
+
+
+def fp3232_to_float(value):
+    """Convert an XInput FP3232 fixed point value to a float."""
+    return value.integral + value.frac / float(1 << 32)
+
+
+def valuator_values(event):
+    """
+    Get the valuator values set in an XInput2 device event.
+
+    :param event: XInput2 device event with valuator_mask and axisvalues
+    :return: dict of valuator number to float value
+    """
+    values = {}
+    index = 0
+    for word_index, word in enumerate(event.valuator_mask):
+        bit = 0
+        while word:
+            if word & 1:
+                values[word_index * 32 + bit] = fp3232_to_float(event.axisvalues[index])
+                index += 1
+            word >>= 1
+            bit += 1
+    return values
+
+
+class SmoothScroll:
+    """Accumulate XInput2 vertical scroll valuator motion into scroll amounts, per device.
+
+    Scroll valuators report an absolute position that increases while scrolling down.  One wheel
+    click is one scroll class increment.  Fractional clicks are accumulated until at least the
+    quantum has built up, so high resolution touchpads don't produce a flood of tiny changes.
+
+    The X server also emulates wheel button presses from the valuators.  The clicks counted from
+    each device's valuators are kept, so only the presses for those clicks are ignored.
+    """
+    def __init__(self, quantum=SCROLL_QUANTUM):
+        """
+        Initialize a new SmoothScroll.
+
+        :param float quantum: smallest scroll amount to report, in wheel clicks
+        """
+        self.quantum = quantum
+        self._increments = {}
+        self._last_values = {}
+        self._accumulated = {}
+        self._counted_clicks = {}
+
+    def set_device_classes(self, deviceid, classes):
+        """
+        Update the scroll valuators for a device.
+
+        :param int deviceid: the XInput2 device ID
+        :param classes: the device's XInput2 DeviceClass list
+        """
+        increments = {}
+        for device_class in classes:
+            if (device_class.type == DeviceClassType.Scroll and
+                    device_class.scroll_type == ScrollType.Vertical):
+                increments[device_class.number] = fp3232_to_float(device_class.increment)
+        if increments:
+            self._increments[deviceid] = increments
+        else:
+            self._increments.pop(deviceid, None)
+        self.reset(deviceid)
+
+    def has_smooth_scroll(self, deviceid):
+        """Check if a device has a vertical scroll valuator."""
+        return deviceid in self._increments
+
+    def reset(self, deviceid=None):
+        """
+        Forget a device's last scroll position, and any partial scroll.
+
+        The next scroll event from the device only sets its position, since the valuator may have
+        changed while we weren't watching.
+
+        :param int deviceid: the XInput2 device ID, or None for all devices
+        """
+        if deviceid is None:
+            self._last_values.clear()
+            self._accumulated.clear()
+            self._counted_clicks.clear()
+        else:
+            for key in [k for k in self._last_values if k[0] == deviceid]:
+                del self._last_values[key]
+            self._accumulated.pop(deviceid, None)
+            self._counted_clicks.pop(deviceid, None)
+
+    def take_emulated_click(self, deviceid):
+        """
+        Check if an emulated wheel click from a device was already counted from its valuators.
+
+        An emulated click only duplicates valuator motion that was received.  The motion isn't
+        received when motion events aren't selected, or when another client's window took them.
+
+        :param int deviceid: the XInput2 device ID
+        :return: True if the click was counted, so it should be ignored
+        """
+        clicks = self._counted_clicks.get(deviceid, 0.0)
+        if clicks <= 0.0:
+            return False
+        self._counted_clicks[deviceid] = max(0.0, clicks - 1.0)
+        return True
+
+    def add_valuators(self, deviceid, values):
+        """
+        Add scroll valuator motion from a device event.
+
+        :param int deviceid: the XInput2 device ID the event came from
+        :param dict values: valuator number to value, from :func:`valuator_values`
+        :return: amount scrolled up, in wheel clicks (negative for down), or 0.0 while still
+                 accumulating
+        :rtype: float
+        """
+        increments = self._increments.get(deviceid)
+        if not increments:
+            return 0.0
+        accumulated = self._accumulated.get(deviceid, 0.0)
+        clicks = self._counted_clicks.get(deviceid, 0.0)
+        for number, increment in increments.items():
+            value = values.get(number)
+            if value is None:
+                continue
+            key = (deviceid, number)
+            last = self._last_values.get(key)
+            self._last_values[key] = value
+            if (last is not None) and increment:
+                delta = (value - last) / increment
+                accumulated -= delta
+                clicks += abs(delta)
+        self._counted_clicks[deviceid] = clicks
+
+        if abs(accumulated) < self.quantum:
+            self._accumulated[deviceid] = accumulated
+            return 0.0
+        self._accumulated[deviceid] = 0.0
+        return accumulated
@@ -0,0 +1,82 @@
+"""InputOnly sentinel window mouse tracker."""
+
+import logging
+
+from xcffib.xproto import CW, ConfigWindow, EnterNotifyEvent, EventMask
+from xcffib.xproto import StackMode, WindowClass
+from volcorner.x11.armedtracker import ArmedMouseTracker
+
+__all__ = ['SentinelMouseTracker']
+_log = logging.getLogger("tracking")
+
+
+class SentinelMouseTracker(ArmedMouseTracker):
+    """Mouse tracker that waits for the pointer to enter an InputOnly sentinel window.
+
+    While the pointer is outside the region of interest, a small override-redirect InputOnly
+    window covers the region, and only its EnterNotify event is selected.  The X server doesn't
+    wake us up at all while the pointer is elsewhere.  Once the pointer has entered, the sentinel
+    is unmapped and motion events are selected until the pointer leaves the region.
+
+    Clicks inside the sentinel go to the root window instead of the window underneath it.
+    """
+    def __init__(self, ui, raw_motion=False, screen_num=0):
+        """
+        Initialize a new SentinelMouseTracker.
+
+        :param volcorner.ui.XCBUI ui: UI to install an event handler and get XCB connection from
+        :param bool raw_motion: True to track raw motion events with QueryPointer
+        :param int screen_num: the X screen (root window) number to track
+        """
+        super().__init__(ui, raw_motion, screen_num)
+        self._window = None
+        self._window_rect = None
+        self._window_mapped = False
+
+    def _setup(self):
+        """Create the unmapped sentinel window."""
+        self._window = self._conn.generate_id()
+        value_mask = CW.OverrideRedirect | CW.EventMask
+        value_list = [1, EventMask.EnterWindow]
+        self._conn.core.CreateWindow(0, self._window, self._root, 0, 0, 1, 1, 0,
+                                     WindowClass.InputOnly, 0, value_mask, value_list)
+
+    def _teardown(self):
+        """Destroy the sentinel window."""
+        self._conn.core.DestroyWindow(self._window)
+        self._window = None
+        self._window_rect = None
+        self._window_mapped = False
+
+    def _event_types(self):
+        return super()._event_types() + [EnterNotifyEvent]
+
+    def _arm(self, region):
+        """Move the sentinel window over a region and raise it."""
+        if self._window_mapped and region == self._window_rect:
+            return False
+        _log.debug("Placing sentinel window at %r", region)
+        value_mask = (ConfigWindow.X | ConfigWindow.Y | ConfigWindow.Width |
+                      ConfigWindow.Height | ConfigWindow.StackMode)
+        value_list = [region.x1, region.y1, region.width, region.height, StackMode.Above]
+        self._conn.core.ConfigureWindow(self._window, value_mask, value_list)
+        self._conn.core.MapWindow(self._window)
+        self._window_rect = region
+        self._window_mapped = True
+        return True
+
+    def _disarm(self):
+        """Unmap the sentinel window."""
+        if not self._window_mapped:
+            return False
+        self._conn.core.UnmapWindow(self._window)
+        self._window_mapped = False
+        return True
+
+    def on_event(self, event):
+        """Handle an X event."""
+        if isinstance(event, EnterNotifyEvent) and event.event == self._window:
+            _log.debug("Entered sentinel window at %d, %d", event.root_x, event.root_y)
+            self.update_point(event.root_x, event.root_y)
+        else:
+            super().on_event(event)
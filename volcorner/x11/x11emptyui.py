@@ -1,9 +1,16 @@
 """X11 empty (overlayless) UI."""
 import asyncio
+import logging
+
 import xcffib
+from xcffib import c_free, ffi, lib
 from xcffib import xproto  # Required import for xcffib.connect() to work
 
 from volcorner.ui import XCBUI
+from volcorner.x11.events import EventDispatcher
+from volcorner.x11.pipeline import setup_connection
+
+_log = logging.getLogger("x11ui")
 
 
 class X11EmptyUI(XCBUI):
@@ -11,7 +18,7 @@ class X11EmptyUI(XCBUI):
         super().__init__()
         self.xcb_connection = None
         self.xcb_fd = None
-        self._event_filters = set()
+        self._dispatcher = None
 
     def load(self):
         if self.xcb_connection is None:
@@ -20,14 +27,16 @@ class X11EmptyUI(XCBUI):
 
     def stop(self):
         asyncio.get_event_loop().remove_reader(self.xcb_fd)
+        self._dispatcher.log_stats()
+        self.xcb_connection.batcher.close()
         self.xcb_connection.disconnect()
         self.xcb_connection = None
 
-    def install_event_filter(self, event_filter):
-        self._event_filters.add(event_filter)
+    def install_event_filter(self, event_filter, event_types=None):
+        self._dispatcher.install(event_filter, event_types)
 
     def remove_event_filter(self, event_filter):
-        self._event_filters.remove(event_filter)
+        self._dispatcher.remove(event_filter)
 
     def show(self):
         pass  # Nothing to show
@@ -36,16 +45,25 @@ class X11EmptyUI(XCBUI):
         pass  # Nothing to hide
 
     def set_event_loop(self):
-        self.xcb_connection = xcffib.connect()
+        self.xcb_connection = setup_connection(xcffib.connect())
         self.xcb_fd = self.xcb_connection.get_file_descriptor()
+        self._dispatcher = EventDispatcher(self.xcb_connection)
         # Use the standard event loop
 
     def on_xcb_ready(self):
+        conn = self.xcb_connection
         while True:
-            # Handle events until there are none left.
-            event = self.xcb_connection.poll_for_event()
-            if event is None:
-                return
-            # Dispatch to all event filters.
-            for event_filter in self._event_filters:
-                event_filter(event)
+            # Handle events until there are none left.  Poll the raw events, so only the ones
+            # an event filter wants get hoisted.
+            generic_event = lib.xcb_poll_for_event(conn._conn)
+            if generic_event == ffi.NULL:
+                conn.invalid()
+                break
+            if self._dispatcher.wants(generic_event):
+                # The hoisted event reads from the buffer, so free it along with the event.
+                self._dispatcher.push(ffi.gc(generic_event, c_free))
+            else:
+                self._dispatcher.push(generic_event)
+                c_free(generic_event)
+        # Only the newest motion event from this batch is left to dispatch.
+        self._dispatcher.flush()
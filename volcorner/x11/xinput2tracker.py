@@ -1,60 +1,151 @@
 """XInput2 mouse tracker."""
 
+import asyncio
 import logging
 
 import xcffib
-from xcffib.xproto import ButtonPressEvent, EventMask, GeGenericEvent, GrabMode, ModMask
+from xcffib.xproto import GeGenericEvent
 import xcffib.xinput
+from xcffib.xinput import ButtonPressEvent, DeviceChangedEvent, GrabMode22, GrabType, ModifierMask
+from xcffib.xinput import LeaveEvent, MotionEvent, NotifyDetail
+from xcffib.xinput import PointerEventFlags, RawMotionEvent, XIEventMask
 from volcorner.logging import TRACE
 from volcorner.rect import Point
 from volcorner.tracker import MouseTracker
+from volcorner.x11.pipeline import poll_for_reply
+from volcorner.x11.scroll import SmoothScroll, valuator_values
 
 __all__ = ['XInput2MouseTracker']
 _log = logging.getLogger("tracking")
 
+# Maximum number of pipelined QueryPointer requests waiting for a reply
+MAX_POINTER_QUERIES = 2
+
+# Seconds to wait before checking for a pipelined QueryPointer reply again
+POINTER_QUERY_RETRY = 0.005
+
 
 class XInput2MouseTracker(MouseTracker):
     """XInput mouse tracker."""
-    def __init__(self, ui):
+    # Minimum XInput version required
+    xinput_version = (2, 2)
+
+    def __init__(self, ui, raw_motion=False, pipeline_queries=True, screen_num=0):
         """
         Initialize a new XInput2MouseTracker.
 
+        By default, XI_Motion events are selected on the root window, and the pointer position is
+        read from the root coordinates carried by each event.  XI_Motion stops at the first window
+        under the pointer that selects it, so it doesn't reach the root window while the pointer
+        is over many toolkits' windows.  XI_RawMotion always does, so it's selected as well: a
+        raw event without any XI_Motion in the same batch of events falls back to querying the
+        pointer position.
+
+        Set raw_motion to only select XI_RawMotion, and query the pointer position after every
+        event.  This costs a round-trip to the X server per event.
+
+        QueryPointer requests are pipelined unless pipeline_queries is False:
+        the event handler only sends the request, and the reply is picked up on a later event
+        loop iteration.  At most MAX_POINTER_QUERIES requests are in flight; motion while the
+        pipeline is full sends one more request as soon as a reply arrives.  Once a newer reply
+        has arrived, older requests still in flight are stale, and their replies are discarded.
+
+        With several X screens, each screen needs its own tracker, and each one only handles the
+        events from its own root window.  Pointer motion stops being reported to a root window
+        once the pointer moves to another screen, so the root's XI_Leave is selected as well.
+
         :param volcorner.ui.XCBUI ui: UI to install an event handler and get XCB connection from
+        :param bool raw_motion: True to track raw motion events with QueryPointer
+        :param bool pipeline_queries: False to block on each QueryPointer reply
+        :param int screen_num: the X screen (root window) number to track
         """
-        super().__init__()
+        super().__init__(screen_num=screen_num)
         self._ui = ui
         self._conn = ui.xcb_connection
         self._root = None
+        self._multi_screen = False
         self._is_listening = False
+        self._raw_motion = raw_motion
+        self._pipeline_queries = pipeline_queries
+        self._pointer_queries = []
+        self._pointer_moved = False
+        self._resolve_handle = None
+        self._raw_fallback_handle = None
+        self._device_points = {}
+        self._active_device = None
+        self._scroll = SmoothScroll()
+        self._scroll_grabbed = False
+        self.pointer_events = 0
+        self.round_trips = 0
+        self.queries_sent = 0
+        self.replies_received = 0
+        self.queries_dropped = 0
+        self.queries_failed = 0
+        self.raw_fallbacks = 0
+
+    @property
+    def queries_in_flight(self):
+        """Get the number of pipelined QueryPointer requests waiting for a reply."""
+        return len(self._pointer_queries)
 
     def start(self):
-        self._root = self._conn.setup.roots[0].root
+        self._load_root()
         self._conn.xinput = self._load_xinput()
+        self._query_scroll_classes()
 
         # Select XInput motion events.
         self._select_motion_events()
 
         # Listen for input events.
-        self._ui.install_event_filter(self.on_event)
+        self._ui.install_event_filter(self.on_event, self._event_types())
         self._is_listening = True
+        self._conn.batcher.flush()
 
     def stop(self):
         if not self._is_listening:
             return
 
         self._ui.remove_event_filter(self.on_event)
+        self._cancel_pointer_queries()
+        _log.debug("Handled %d pointer events with %d QueryPointer round-trips",
+                   self.pointer_events, self.round_trips)
+        if self.queries_sent:
+            _log.debug("Pipelined %d QueryPointer requests, %d replies received, %d dropped, "
+                       "%d failed", self.queries_sent, self.replies_received,
+                       self.queries_dropped, self.queries_failed)
+        if self.raw_fallbacks:
+            _log.debug("Queried the pointer for %d raw motion batches without XI_Motion",
+                       self.raw_fallbacks)
 
     def grab_scroll(self):
+        if self._scroll_grabbed:
+            return
         # Buttons 4 and 5 are the scroll wheel.
         self._grab_button(4)
         self._grab_button(5)
-        self._conn.flush()
+        self._conn.batcher.flush_soon()
+        self._scroll.reset()
+        self._scroll_grabbed = True
 
     def ungrab_scroll(self):
+        if not self._scroll_grabbed:
+            return
         # Buttons 4 and 5 are the scroll wheel.
         self._ungrab_button(4)
         self._ungrab_button(5)
-        self._conn.flush()
+        self._conn.batcher.flush_soon()
+        self._scroll_grabbed = False
+
+    @classmethod
+    def extension_versions(cls):
+        """Return the (extension key, (major, minor)) versions this tracker needs."""
+        return [(xcffib.xinput.key, cls.xinput_version)]
+
+    def _load_root(self):
+        """Find the root window of the tracked screen."""
+        roots = self._conn.setup.roots
+        self._root = roots[self.screen_num].root
+        self._multi_screen = len(roots) > 1
 
     def _load_xinput(self):
         """Return the XInput extension, checking for XI2.
@@ -62,52 +153,276 @@ class XInput2MouseTracker(MouseTracker):
         Throw a ValueError if there is a problem.
 
         """
-        xinput_major, xinput_minor = (2, 2)
+        xinput_major, xinput_minor = self.xinput_version
         try:
             xinput = self._conn(xcffib.xinput.key)
-            xinput.XIQueryVersion(xinput_major, xinput_minor).reply()
-            return xinput
+            reply = self._conn.versions.reply(xcffib.xinput.key, self.xinput_version)
         except:
             _log.error("Failed to get XInput 2", exc_info=True)
             raise ValueError("XInput 2 is required.")
+        if (reply.major_version, reply.minor_version) < self.xinput_version:
+            _log.error("Need XInput %d.%d, but only %d.%d is available", xinput_major,
+                       xinput_minor, reply.major_version, reply.minor_version)
+            raise ValueError("XInput {}.{} is required.".format(xinput_major, xinput_minor))
+        return xinput
 
-    def _select_motion_events(self):
-        """Select raw motion events from all input devices."""
+    def _select_motion_events(self, enabled=True):
+        """
+        Select motion events (or raw motion events) from all master input devices.
+
+        :param bool enabled: False to deselect motion events instead
+        """
+        mask = self._other_events()
+        if enabled and self._raw_motion:
+            mask |= xcffib.xinput.XIEventMask.RawMotion
+        elif enabled:
+            mask |= xcffib.xinput.XIEventMask.Motion | xcffib.xinput.XIEventMask.RawMotion
         event_mask = xcffib.xinput.EventMask.synthetic(
             deviceid=xcffib.xinput.Device.AllMaster,
             mask_len=1,
-            mask=xcffib.List.synthetic(list=[xcffib.xinput.XIEventMask.RawMotion]))
+            mask=xcffib.List.synthetic(list=[mask]))
         self._conn.xinput.XISelectEvents(self._root, 1, [event_mask])
-        self._conn.flush()
+        self._conn.batcher.flush_soon()
+
+    def _other_events(self):
+        """Return the mask of XInput2 events to select on the root window besides motion."""
+        # Scroll valuators change when a master device switches to another slave device.
+        mask = XIEventMask.DeviceChanged
+        # The root window only gets a nonlinear XI_Leave when the pointer moves to another screen,
+        # but it gets one for every child window it enters, so only select it if that can happen.
+        if self._multi_screen:
+            mask |= XIEventMask.Leave
+        return mask
+
+    def _event_types(self):
+        """Return the event classes to receive from the UI."""
+        return [MotionEvent, RawMotionEvent, ButtonPressEvent, DeviceChangedEvent, LeaveEvent]
+
+    def _query_scroll_classes(self):
+        """Find the scroll valuators of every input device."""
+        reply = self._conn.xinput.XIQueryDevice(xcffib.xinput.Device.All).reply()
+        for info in reply.infos:
+            self._scroll.set_device_classes(info.deviceid, info.classes)
+            if self._scroll.has_smooth_scroll(info.deviceid):
+                _log.debug("Device %d has smooth scrolling", info.deviceid)
 
     def _grab_button(self, button):
-        """Grab press/release events for this button."""
+        """Grab press events for this button, and smooth scroll motion, on all master devices."""
         _log.debug("Grabbing button %s", button)
-        events = EventMask.ButtonPress | EventMask.ButtonRelease
-        mode = GrabMode.Async
-        modifiers = ModMask.Any
-        self._conn.core.GrabButton(0, self._root, events, mode, mode, 0, 0, button, modifiers)
+        mode = GrabMode22.Async
+        mask = XIEventMask.ButtonPress | XIEventMask.Motion
+        cookie = self._conn.xinput.XIPassiveGrabDevice(0, self._root, 0, button,
+                                                       xcffib.xinput.Device.AllMaster, 1, 1,
+                                                       GrabType.Button, mode, mode, False,
+                                                       [mask], [ModifierMask.Any],
+                                                       is_checked=False)
+        # The reply only lists modifiers that failed to grab, which can't happen with Any.
+        cookie.discard_reply()
 
     def _ungrab_button(self, button):
         """Ungrab all events for this button."""
         _log.debug("Ungrabbing button %s", button)
-        modifiers = ModMask.Any
-        self._conn.core.UngrabButton(button, self._root, modifiers)
+        self._conn.xinput.XIPassiveUngrabDevice(self._root, button,
+                                                xcffib.xinput.Device.AllMaster, 1,
+                                                GrabType.Button, [ModifierMask.Any])
+
+    def _query_pointer(self):
+        """Update the pointer position with a QueryPointer request."""
+        if not self._pipeline_queries:
+            pointer = self._conn.core.QueryPointer(self._root).reply()
+            self.round_trips += 1
+            self._on_pointer_reply(pointer)
+            return
+
+        # Pick up any replies that are already here before deciding to send another request.
+        self._resolve_pointer_queries()
+        if len(self._pointer_queries) >= MAX_POINTER_QUERIES:
+            self._pointer_moved = True
+        else:
+            self._send_pointer_query()
+
+    def _send_pointer_query(self):
+        """Send a pipelined QueryPointer request."""
+        self._pointer_queries.append(self._conn.core.QueryPointer(self._root))
+        self._conn.batcher.flush_soon()
+        self._pointer_moved = False
+        self.queries_sent += 1
+        self._schedule_resolve(0)
+
+    def _schedule_resolve(self, delay):
+        """Check for pipelined QueryPointer replies after a delay."""
+        if self._resolve_handle is None:
+            loop = asyncio.get_event_loop()
+            self._resolve_handle = loop.call_later(delay, self._on_resolve_ready)
+
+    def _on_resolve_ready(self):
+        self._resolve_handle = None
+        try:
+            self._resolve_pointer_queries()
+        finally:
+            if self._pointer_queries:
+                self._schedule_resolve(POINTER_QUERY_RETRY)
+
+    def _resolve_pointer_queries(self):
+        """Update the pointer position from the newest pipelined QueryPointer reply."""
+        # Replies arrive in order, so check from the newest request back.
+        for i in range(len(self._pointer_queries) - 1, -1, -1):
+            try:
+                done, pointer = poll_for_reply(self._pointer_queries[i])
+            except xcffib.ProtocolException as e:
+                # The request is finished, so drop it and keep looking for an older reply.
+                _log.warning("QueryPointer failed (%s)", e)
+                del self._pointer_queries[i]
+                self.queries_failed += 1
+                continue
+            if not done:
+                continue
+            # Older requests are stale now.
+            for stale in self._pointer_queries[:i]:
+                stale.discard_reply()
+                self.queries_dropped += 1
+            del self._pointer_queries[:i + 1]
+            self.replies_received += 1
+            self._on_pointer_reply(pointer)
+            _log.log(TRACE, "Pointer reply %s, %s (%d queries in flight)", self._x, self._y,
+                     len(self._pointer_queries))
+            break
+
+        # Catch up with any motion that happened while the pipeline was full.
+        if self._pointer_moved and len(self._pointer_queries) < MAX_POINTER_QUERIES:
+            self._send_pointer_query()
+
+    def _cancel_pointer_queries(self):
+        """Drop all pipelined QueryPointer requests."""
+        self._cancel_raw_fallback()
+        if self._resolve_handle is not None:
+            self._resolve_handle.cancel()
+            self._resolve_handle = None
+        for query in self._pointer_queries:
+            query.discard_reply()
+            self.queries_dropped += 1
+        self._pointer_queries = []
+        self._pointer_moved = False
+
+    def _on_pointer_reply(self, pointer):
+        """Update the pointer position from a QueryPointer reply."""
+        if pointer.same_screen:
+            self.update_point(pointer.root_x, pointer.root_y)
+        elif self._x is not None:
+            _log.debug("Pointer is on another screen")
+            self.last_point = None
 
     def on_event(self, event):
         """Handle an X event."""
-        if isinstance(event, GeGenericEvent):
-            # GeGenericEvent is an XInput2 pointer event.
-            # Update the pointer position.
-            pointer = self._conn.core.QueryPointer(self._root).reply()
-            self.last_point = Point(pointer.root_x, pointer.root_y)
-            _log.log(TRACE, "Pointer event %s", self._last_point)
+        if getattr(event, 'root', self._root) != self._root:
+            # Another screen's tracker handles this.
+            return
+        if isinstance(event, MotionEvent):
+            self.pointer_events += 1
+            self._cancel_raw_fallback()
+            if self._scroll_grabbed and self._scroll.has_smooth_scroll(event.sourceid):
+                self._on_scroll_valuators(event)
+            # XI_Motion root coordinates are FP1616 fixed point.
+            self._on_device_point(event.deviceid, event.root_x >> 16, event.root_y >> 16)
         elif isinstance(event, ButtonPressEvent):
-            # Button press is a scroll up/down event.
-            _log.debug("Button press event %s", event.detail)
-            if event.detail == 4:
-                self.on_scroll_up()
-            elif event.detail == 5:
-                self.on_scroll_down()
+            self._on_button_press(event)
+        elif isinstance(event, DeviceChangedEvent):
+            _log.debug("Device %d changed", event.sourceid)
+            self._scroll.set_device_classes(event.sourceid, event.classes)
+        elif isinstance(event, LeaveEvent):
+            if (event.event == self._root and
+                    event.detail in (NotifyDetail.Nonlinear, NotifyDetail.NonlinearVirtual)):
+                self._on_device_left_screen(event.deviceid)
+        elif isinstance(event, (GeGenericEvent, RawMotionEvent)):
+            # Any other XInput2 pointer event doesn't carry the position, so ask for it.
+            if self._raw_motion:
+                self.pointer_events += 1
+                self._query_pointer()
+                _log.log(TRACE, "Pointer event %s, %s (%d round-trips in %d events)", self._x,
+                         self._y, self.round_trips, self.pointer_events)
+            elif self._raw_fallback_handle is None:
+                # Wait for the rest of the batch, which has the XI_Motion if it reached the root.
+                loop = asyncio.get_event_loop()
+                self._raw_fallback_handle = loop.call_soon(self._on_raw_fallback)
         else:
             _log.log(TRACE, "Ignoring event %s", event)
+
+    def _on_raw_fallback(self):
+        """Query the pointer position after raw motion that had no XI_Motion."""
+        self._raw_fallback_handle = None
+        self.pointer_events += 1
+        self.raw_fallbacks += 1
+        _log.log(TRACE, "Raw motion without XI_Motion, querying the pointer")
+        self._query_pointer()
+
+    def _cancel_raw_fallback(self):
+        """Drop the pointer query waiting for the rest of a batch with raw motion."""
+        if self._raw_fallback_handle is not None:
+            self._raw_fallback_handle.cancel()
+            self._raw_fallback_handle = None
+
+    def _on_device_point(self, deviceid, x, y):
+        """
+        Update the pointer position of a master device.
+
+        With several master pointers (MPX), the pointer inside the region keeps it until it
+        leaves.  Otherwise the last moved pointer is tracked.  Only the positions of the other
+        pointers are kept as Points, so the usual single pointer doesn't build one per event.
+
+        :param int deviceid: the master device ID
+        :param int x: the new X coordinate
+        :param int y: the new Y coordinate
+        """
+        if deviceid != self._active_device:
+            if self.in_region:
+                self._device_points[deviceid] = Point(x, y)
+                return
+            self._switch_device(deviceid)
+        was_in_region = self.in_region
+        self.update_point(x, y)
+        _log.log(TRACE, "Motion event %d, %d from device %d", x, y, deviceid)
+
+        # Hand over to another pointer that's still inside.
+        if was_in_region and not self.in_region:
+            for other, other_point in self._device_points.items():
+                if self.region_at(other_point) is not None:
+                    _log.debug("Tracking device %d instead of %d", other, deviceid)
+                    self._switch_device(other)
+                    self.last_point = other_point
+                    break
+
+    def _on_device_left_screen(self, deviceid):
+        """Forget the position of a master device that moved to another screen."""
+        _log.debug("Device %d left the screen", deviceid)
+        if deviceid == self._active_device:
+            self._active_device = None
+            self.last_point = None
+        else:
+            self._device_points.pop(deviceid, None)
+
+    def _switch_device(self, deviceid):
+        """Track another master device, remembering the last position of the current one."""
+        if (self._active_device is not None) and (self._x is not None):
+            self._device_points[self._active_device] = self.last_point
+        self._device_points.pop(deviceid, None)
+        self._active_device = deviceid
+
+    def _on_scroll_valuators(self, event):
+        """Report scrolling from an event with scroll valuators."""
+        amount = self._scroll.add_valuators(event.sourceid, valuator_values(event))
+        if amount:
+            self.on_scroll(amount)
+
+    def _on_button_press(self, event):
+        """Report scrolling from a grabbed XInput2 button press."""
+        # Wheel clicks emulated from smooth scrolling were already counted from the valuators, if
+        # they were received.
+        emulated = event.flags & PointerEventFlags.PointerEmulated
+        if emulated and self._scroll.take_emulated_click(event.sourceid):
+            _log.log(TRACE, "Ignoring emulated button press %d", event.detail)
+            return
+        _log.debug("Button press event %s", event.detail)
+        if event.detail == 4:
+            self.on_scroll_up()
+        elif event.detail == 5:
+            self.on_scroll_down()